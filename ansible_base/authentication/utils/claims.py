@@ -490,15 +490,19 @@ class ReconcileUser:
 
     def apply_permissions(self) -> None:
         """See RoleUserAssignmentsCache for more details."""
-        for role_name, role_permissions in self.permissions_cache.items():
-            if not self.permissions_cache.rd_by_name(role_name):
-                # If we failed to load this role for some reason
-                # we can't continue setting the permissions, log message was already emitted
-                continue
-
-            for content_type_id, content_type_permissions in role_permissions.items():
-                for _object_id, object_with_status in content_type_permissions.items():
-                    self._apply_permission(object_with_status, role_name)
+        from ansible_base.rbac.triggers import deferred_rbac_updates
+
+        # Recompute RBAC data once for all the roles of the user, instead of after each assignment
+        with deferred_rbac_updates():
+            for role_name, role_permissions in self.permissions_cache.items():
+                if not self.permissions_cache.rd_by_name(role_name):
+                    # If we failed to load this role for some reason
+                    # we can't continue setting the permissions, log message was already emitted
+                    continue
+
+                for content_type_id, content_type_permissions in role_permissions.items():
+                    for _object_id, object_with_status in content_type_permissions.items():
+                        self._apply_permission(object_with_status, role_name)
 
     def _apply_permission(self, object_with_status, role_name):
         status = object_with_status['status']
@@ -1,19 +1,21 @@
+import hashlib
+import json
 import logging
+import time
 from typing import Optional, Tuple
 
 import jwt
 from django.apps import apps
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
 from django.db.models import Model
 from django.db.utils import IntegrityError
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 
-from ansible_base.jwt_consumer.common.cache import JWTCache
+from ansible_base.jwt_consumer.common.cache import JWTCache, verified_tokens
 from ansible_base.jwt_consumer.common.cert import JWTCert, JWTCertException
-from ansible_base.lib.utils.auth import get_user_by_ansible_id
 from ansible_base.lib.utils.translations import translatableConditionally as _
 from ansible_base.resource_registry.models import Resource, ResourceType
 from ansible_base.resource_registry.signals.handlers import no_reverse_sync
@@ -30,6 +32,9 @@ default_mapped_user_fields = [
     "is_superuser",
 ]
 
+# Seconds between checks for a user being provisioned by another request
+USER_LOCK_POLL_INTERVAL = 0.05
+
 _permission_registry = None
 
 
@@ -43,6 +48,12 @@ def permission_registry():
     return _permission_registry
 
 
+def get_assignments_digest(assignment_qs) -> str:
+    "Digest of the ids of the role assignments in the queryset, which changes when assignments are added or removed"
+    assignment_ids = ','.join(str(pk) for pk in sorted(assignment_qs.values_list('pk', flat=True)))
+    return hashlib.sha256(assignment_ids.encode('utf-8')).hexdigest()
+
+
 class JWTCommonAuth:
     def __init__(self, user_fields=default_mapped_user_fields) -> None:
         self.mapped_user_fields = user_fields
@@ -68,6 +79,9 @@ class JWTCommonAuth:
             return
         logger.debug(f"Received JWT auth token: {token_from_header}")
 
+        if self.use_verified_token(token_from_header):
+            return
+
         cert_object = JWTCert()
         try:
             cert_object.get_decryption_key()
@@ -79,7 +93,7 @@ class JWTCommonAuth:
             return None, None
 
         try:
-            self.token = self.validate_token(token_from_header, cert_object.key)
+            self.token = self.validate_token(token_from_header, cert_object.public_key)
         except jwt.exceptions.DecodeError as de:
             # This exception means the decryption key failed... maybe it was because the cache is bad.
             if not cert_object.cached:
@@ -97,42 +111,102 @@ class JWTCommonAuth:
                 self.log_and_raise(_("JWT decoding failed: %(e)s, cached key was correct; check your key and generated token"), {"e": de})
             # Since we got a new key, lets go ahead and try to validate the token again.
             # If it fails this time we can just raise whatever
-            self.token = self.validate_token(token_from_header, cert_object.key)
+            self.token = self.validate_token(token_from_header, cert_object.public_key)
 
-        # Let's see if we have the same user info in the cache already
-        is_cached, user_defaults = self.cache.check_user_in_cache(self.token)
-
-        self.user = None
-        if is_cached:
-            try:
-                self.user = get_user_by_ansible_id(self.token['sub'])
-            except ObjectDoesNotExist:
-                # ooofff... I'm sorry, you user was in the cache but deleted from the database?
-                # but now you have to pay the price to continue logging in
-                pass
-
-        if not self.user:
-            # Either the user wasn't cached or the requested user was not in the DB so we need to make a new one
-            try:
-                resource = Resource.create_resource(
-                    ResourceType.objects.get(name="shared.user"), resource_data=self.token["user_data"], ansible_id=self.token["sub"]
-                )
-                self.user = resource.content_object
-                logger.info(f"New user {self.user.username} created from JWT auth")
-            except IntegrityError as exc:
-                logger.debug(f'Existing user {self.token["user_data"]} is a conflict with local user, error: {exc}')
-                with no_reverse_sync():
-                    if user_defaults['is_superuser'] is False:
-                        user_defaults.pop('is_superuser')
-                    self.user, created = get_user_model().objects.update_or_create(
-                        username=self.token["user_data"]['username'],
-                        defaults=user_defaults,
-                    )
+        self.user = self.get_user_from_token()
 
         setattr(self.user, "resource_api_actions", self.token.get("resource_api_actions", None))
+        verified_tokens.set(token_from_header, self.token, self.user.pk)
 
         logger.info(f"User {self.user.username} authenticated from JWT auth")
 
+    def use_verified_token(self, token_from_header: str) -> bool:
+        """
+        If the token was already verified by this process and has not expired, set self.user and self.token
+        from that, so the signature, the claims and the user do not have to be checked again.
+        """
+        verified = verified_tokens.get(token_from_header)
+        if verified is None:
+            return False
+
+        claims = verified['claims']
+        # The username is checked in case the user was deleted, and its id was given to another user
+        user = get_user_model().objects.filter(pk=verified['user_id'], username=claims['user_data']['username']).first()
+        if user is None:
+            return False
+
+        self.token = claims
+        self.user = user
+        setattr(self.user, "resource_api_actions", self.token.get("resource_api_actions", None))
+        logger.info(f"User {self.user.username} authenticated from previously verified JWT")
+        return True
+
+    def get_user_state_digest(self) -> str:
+        "Digest of the subject and the user data of the token, the user is provisioned again when this changes"
+        return hashlib.sha256(json.dumps([self.token['sub'], self.token['user_data']], sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get_user_from_state(self, state: Optional[dict], digest: str) -> Optional[Model]:
+        if state is None or state.get('digest') != digest:
+            return None
+        # The username is checked in case the user was deleted, and its id was given to another user
+        return get_user_model().objects.filter(pk=state['user_id'], username=self.token['user_data']['username']).first()
+
+    def get_user_from_token(self) -> Model:
+        """
+        Get the user of the token, provisioning it if the user data of the token changed since it was last provisioned.
+        While the user data is unchanged this takes one cache read, one query and no cache writes.
+        The user is provisioned by only one request at a time, so concurrent first requests for a new user do not conflict.
+        """
+        ansible_id = self.token['sub']
+        digest = self.get_user_state_digest()
+        user = self.get_user_from_state(self.cache.get_user_state(ansible_id), digest)
+        if user is not None:
+            return user
+
+        locked = self.cache.acquire_user_lock(ansible_id)
+        try:
+            if not locked:
+                user = self.wait_for_user_state(digest)
+                if user is not None:
+                    return user
+                logger.warning(f"Timed out waiting for another request to provision user {ansible_id}, provisioning it")
+            user = self.provision_user()
+            self.cache.set_user_state(ansible_id, {'digest': digest, 'user_id': user.pk})
+            return user
+        finally:
+            if locked:
+                self.cache.release_user_lock(ansible_id)
+
+    def wait_for_user_state(self, digest: str) -> Optional[Model]:
+        "Wait for the request holding the lock of the user to provision it, returns None if that takes longer than the lock timeout"
+        deadline = time.monotonic() + self.cache.get_user_lock_timeout()
+        while time.monotonic() < deadline:
+            time.sleep(USER_LOCK_POLL_INTERVAL)
+            user = self.get_user_from_state(self.cache.get_user_state(self.token['sub']), digest)
+            if user is not None:
+                return user
+        return None
+
+    def provision_user(self) -> Model:
+        "Get the user with the ansible_id of the token, or create it"
+        resource = Resource.objects.filter(ansible_id=self.token['sub']).first()
+        if resource is not None and isinstance(resource.content_object, get_user_model()):
+            return resource.content_object
+
+        user_data = self.token['user_data']
+        try:
+            resource = Resource.create_resource(ResourceType.objects.get(name="shared.user"), resource_data=user_data, ansible_id=self.token["sub"])
+            logger.info(f"New user {resource.content_object.username} created from JWT auth")
+            return resource.content_object
+        except IntegrityError as exc:
+            logger.debug(f'Existing user {user_data} is a conflict with local user, error: {exc}')
+            user_defaults = {field: user_data[field] for field in ('first_name', 'last_name', 'email', 'is_superuser')}
+            if user_defaults['is_superuser'] is False:
+                user_defaults.pop('is_superuser')
+            with no_reverse_sync():
+                user, _ = get_user_model().objects.update_or_create(username=user_data['username'], defaults=user_defaults)
+            return user
+
     def log_and_raise(self, conditional_translate_object, expand_values={}):
         logger.error(conditional_translate_object.not_translated() % expand_values)
         raise AuthenticationFailed(conditional_translate_object.translated() % expand_values)
@@ -217,9 +291,18 @@ class JWTCommonAuth:
                 return rd
         return None
 
+    def get_rbac_claims_digest(self) -> str:
+        "Digest of the claims reconciled by process_rbac_permissions, and the roles that are managed by JWT"
+        claims = {key: self.token.get(key) for key in ('objects', 'object_roles', 'global_roles')}
+        claims['managed_roles'] = sorted(settings.ANSIBLE_BASE_JWT_MANAGED_ROLES)
+        return hashlib.sha256(json.dumps(claims, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
     def process_rbac_permissions(self):
         """
         This is a default process_permissions which should be usable if you are using RBAC from DAB
+
+        The roles are only reconciled when the role claims of the token, or the JWT managed assignments of the user,
+        changed since the last time they were reconciled.
         """
         if self.token is None or self.user is None:
             logger.error("Unable to process rbac permissions because user or token is not defined, please call authenticate first")
@@ -229,13 +312,41 @@ class JWTCommonAuth:
 
         role_diff = RoleUserAssignment.objects.filter(user=self.user, role_definition__name__in=settings.ANSIBLE_BASE_JWT_MANAGED_ROLES)
 
+        claims_digest = self.get_rbac_claims_digest()
+        if self.cache.get_rbac_state(self.user) == {'claims': claims_digest, 'assignments': get_assignments_digest(role_diff)}:
+            logger.debug(f"Role claims for {self.user.username} have not changed, skipping RBAC processing")
+            return
+
+        self.reconcile_rbac_permissions(role_diff)
+        self.cache.set_rbac_state(self.user, {'claims': claims_digest, 'assignments': get_assignments_digest(role_diff)})
+
+    def reconcile_rbac_permissions(self, role_diff):
+        """
+        Give the user the roles in the token that they do not have yet, and remove the JWT managed roles not in the token.
+        The objects of the token are looked up together, and missing object roles are given in bulk for each role definition.
+        """
+        role_definitions = {}
+
+        def get_role_definition(name):
+            if name not in role_definitions:
+                role_definitions[name] = self.get_role_definition(name)
+            return role_definitions[name]
+
+        assignment_keys = role_diff.values_list('pk', 'role_definition_id', 'content_type_id', 'object_id')
+        existing = {(rd_id, ct_id, object_id): pk for pk, rd_id, ct_id, object_id in assignment_keys}
+        keep = set()
+
         for system_role_name in self.token.get("global_roles", []):
             logger.debug(f"Processing system role {system_role_name} for {self.user.username}")
-            rd = self.get_role_definition(system_role_name)
+            rd = get_role_definition(system_role_name)
             if rd:
                 if rd.name in settings.ANSIBLE_BASE_JWT_MANAGED_ROLES:
+                    existing_pk = existing.get((rd.pk, None, None))
+                    if existing_pk:
+                        keep.add(existing_pk)
+                        continue
                     assignment = rd.give_global_permission(self.user)
-                    role_diff = role_diff.exclude(pk=assignment.pk)
+                    keep.add(assignment.pk)
                     logger.info(f"Granted user {self.user.username} global role {system_role_name}")
                 else:
                     logger.error(f"Unable to grant {self.user.username} system level role {system_role_name} because it is not a JWT managed role")
@@ -243,8 +354,13 @@ class JWTCommonAuth:
                 logger.error(f"Unable to grant {self.user.username} system level role {system_role_name} because it does not exist")
                 continue
 
+        # Look up the resources of all the objects in the token with one query
+        ansible_ids = [str(object_data['ansible_id']) for object_list in self.token.get('objects', {}).values() for object_data in object_list]
+        resources = {str(resource.ansible_id): resource for resource in Resource.objects.filter(ansible_id__in=ansible_ids).prefetch_related('content_object')}
+
+        to_give = {}
         for object_role_name in self.token.get('object_roles', {}).keys():
-            rd = self.get_role_definition(object_role_name)
+            rd = get_role_definition(object_role_name)
             if rd is None:
                 logger.error(f"Unable to grant {self.user.username} object role {object_role_name} because it does not exist")
                 continue
@@ -257,14 +373,29 @@ class JWTCommonAuth:
 
             for index in object_indexes:
                 object_data = self.token['objects'][object_type][index]
-                resource, obj = self.get_or_create_resource(object_type, object_data)
+                resource = resources.get(str(object_data['ansible_id']))
                 if resource is not None:
-                    assignment = rd.give_permission(self.user, obj)
-                    role_diff = role_diff.exclude(pk=assignment.pk)
-                    logger.info(f"Granted user {self.user.username} role {object_role_name} to object {obj.name} with ansible_id {object_data['ansible_id']}")
+                    obj = resource.content_object
+                else:
+                    resource, obj = self.get_or_create_resource(object_type, object_data)
+                if resource is None:
+                    continue
+
+                object_id = str(obj._meta.pk.get_db_prep_value(obj.pk, connection))
+                existing_pk = existing.get((rd.pk, resource.content_type_id, object_id))
+                if existing_pk:
+                    keep.add(existing_pk)
+                else:
+                    to_give.setdefault(rd, {})[object_id] = (obj, object_data['ansible_id'])
+
+        for rd, objects in to_give.items():
+            for assignment in rd.give_permission_bulk([self.user], [obj for obj, _ in objects.values()]):
+                keep.add(assignment.pk)
+            for obj, ansible_id in objects.values():
+                logger.info(f"Granted user {self.user.username} role {rd.name} to object {obj.name} with ansible_id {ansible_id}")
 
         # Remove all permissions not authorized by the JWT
-        for role_assignment in role_diff:
+        for role_assignment in role_diff.exclude(pk__in=keep):
             rd = role_assignment.role_definition
             content_object = role_assignment.content_object
             if content_object:
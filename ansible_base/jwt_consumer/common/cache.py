@@ -1,5 +1,10 @@
+import hashlib
 import logging
-from typing import Optional, Tuple
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
 
 from django.conf import settings
 from django.core.cache import caches
@@ -14,6 +19,11 @@ jwt_cache_name = getattr(settings, 'ANSIBLE_BASE_JWT_CACHE_NAME', 'default')
 cache = caches[jwt_cache_name]
 # This is the cache name we will use for the JWT key
 cache_key = 'ansible_base_jwt_public_key'
+# Prefix of the cache keys for the state of the JWT managed roles of each user
+rbac_state_key_prefix = 'ansible_base_jwt_rbac_state_'
+# Prefixes of the cache keys for the provisioned state of each user, and for the lock held while provisioning it
+user_state_key_prefix = 'ansible_base_jwt_user_state_'
+user_lock_key_prefix = 'ansible_base_jwt_user_lock_'
 
 
 class JWTCache:
@@ -22,21 +32,30 @@ class JWTCache:
         cache_timeout = get_setting('ANSIBLE_BASE_JWT_CACHE_TIMEOUT_SECONDS', 604800)
         return cache_timeout
 
-    def check_user_in_cache(self, validated_body: dict) -> Tuple[bool, dict]:
-        # These are the defaults which will get passed to the user creation and what we expect in the cache
-        expected_cache_value = {
-            "first_name": validated_body['user_data']["first_name"],
-            "last_name": validated_body['user_data']["last_name"],
-            "email": validated_body['user_data']["email"],
-            "is_superuser": validated_body['user_data']["is_superuser"],
-        }
-        cached_user = cache.get(validated_body["sub"], None)
-        # If the user was in the cache and the values of the cache match the expected values we had it in cache
-        if cached_user is not None and cached_user == expected_cache_value:
-            return True, expected_cache_value
-        # The user was not previously in the cache, set the user in the cache so it is found on future requests
-        cache.set(validated_body["sub"], expected_cache_value, timeout=self.get_cache_timeout())
-        return False, expected_cache_value
+    def get_user_lock_timeout(self) -> int:
+        # How long a request provisioning a user keeps other requests for the same user waiting
+        return get_setting('ANSIBLE_BASE_JWT_USER_LOCK_TIMEOUT_SECONDS', 10)
+
+    def get_user_state(self, ansible_id: str) -> Optional[dict]:
+        "Get the digest of the user data last provisioned for the ansible_id, and the id of the user it resolved to"
+        return cache.get(f'{user_state_key_prefix}{ansible_id}', None)
+
+    def set_user_state(self, ansible_id: str, state: dict) -> None:
+        cache.set(f'{user_state_key_prefix}{ansible_id}', state, timeout=self.get_cache_timeout())
+
+    def acquire_user_lock(self, ansible_id: str) -> bool:
+        "Returns True if this process is now the only one provisioning the user, the lock expires in case the process dies"
+        return cache.add(f'{user_lock_key_prefix}{ansible_id}', True, timeout=self.get_user_lock_timeout())
+
+    def release_user_lock(self, ansible_id: str) -> None:
+        cache.delete(f'{user_lock_key_prefix}{ansible_id}')
+
+    def get_rbac_state(self, user) -> Optional[dict]:
+        "Get the digests saved after the last reconcile of the JWT managed roles of the user"
+        return cache.get(f'{rbac_state_key_prefix}{user.pk}', None)
+
+    def set_rbac_state(self, user, state: dict) -> None:
+        cache.set(f'{rbac_state_key_prefix}{user.pk}', state, timeout=self.get_cache_timeout())
 
     def get_key_from_cache(self) -> Optional[str]:
         # If we are not ignoring the cache (forcing a reload of the key), check it
@@ -46,3 +65,78 @@ class JWTCache:
 
     def set_key_in_cache(self, key: str) -> None:
         cache.set(cache_key, key, timeout=self.get_cache_timeout())
+
+
+class VerifiedTokenCache:
+    """
+    A bounded LRU of tokens which passed verification, by the sha256 digest of the token.
+    Entries hold the validated claims and the id of the user the token resolved to, and are used until the token expires.
+    Entries can also be shared with other processes through the JWT cache with ANSIBLE_BASE_JWT_SHARED_TOKEN_CACHE.
+    """
+
+    shared_key_prefix = 'ansible_base_jwt_verified_token_'
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_max_size(self) -> int:
+        # Setting this to 0 disables the cache
+        return get_setting('ANSIBLE_BASE_JWT_TOKEN_CACHE_SIZE', 1000)
+
+    def use_shared_cache(self) -> bool:
+        return get_setting('ANSIBLE_BASE_JWT_SHARED_TOKEN_CACHE', False)
+
+    @staticmethod
+    def get_digest(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        if self.get_max_size() <= 0:
+            return None
+
+        digest = self.get_digest(token)
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is not None:
+                self.entries.move_to_end(digest)
+
+        if entry is None and self.use_shared_cache():
+            entry = cache.get(f'{self.shared_key_prefix}{digest}', None)
+            if entry is not None:
+                self._set_local(digest, entry)
+
+        if entry is None:
+            return None
+        if entry['claims']['exp'] <= time.time():
+            with self.lock:
+                self.entries.pop(digest, None)
+            return None
+        return entry
+
+    def set(self, token: str, claims: dict, user_id) -> None:
+        max_size = self.get_max_size()
+        timeout = claims['exp'] - time.time()
+        if max_size <= 0 or timeout <= 0:
+            return
+
+        digest = self.get_digest(token)
+        entry = {'claims': claims, 'user_id': user_id}
+        self._set_local(digest, entry)
+        if self.use_shared_cache():
+            cache.set(f'{self.shared_key_prefix}{digest}', entry, timeout=math.ceil(timeout))
+
+    def _set_local(self, digest: str, entry: dict) -> None:
+        max_size = self.get_max_size()
+        with self.lock:
+            self.entries[digest] = entry
+            self.entries.move_to_end(digest)
+            while len(self.entries) > max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+verified_tokens = VerifiedTokenCache()
@@ -1,7 +1,12 @@
+import hashlib
 import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Optional, Union
 from urllib.parse import urljoin, urlparse
 
 import requests
+from cryptography.hazmat.primitives import serialization
 from django.utils.translation import gettext as _
 
 from ansible_base.jwt_consumer.common.cache import JWTCache
@@ -19,12 +24,43 @@ class JWTCertException(Exception):
     pass
 
 
+@dataclass
+class LocalKey:
+    key: str
+    fingerprint: str
+    public_key: Any
+    loaded: float
+
+
+# Decryption keys loaded in this process, by the setting they came from.
+# These save reading the shared cache and parsing the key on every request.
+local_keys: dict[str, LocalKey] = {}
+
+
+def get_key_fingerprint(key: str) -> str:
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def load_public_key(key: str) -> Union[Any, str]:
+    """
+    Load the PEM text of the key into the key object used by jwt.decode, so it is not parsed for every token.
+    If the key can not be loaded the text is returned, and jwt.decode will report the error.
+    """
+    try:
+        return serialization.load_pem_public_key(key.encode('utf-8'))
+    except Exception as e:
+        logger.debug(f"Unable to load the decryption key as a public key: {e}")
+        return key
+
+
 class JWTCert:
     key_name = 'ANSIBLE_BASE_JWT_KEY'
 
     def __init__(self):
         self.cached = None
         self.key = None
+        self._loaded_key = None
+        self._public_key = None
         # Attempt to locate the cert using ANSIBLE_BASE_JWT_KEY.  If we are running on a service that houses the JWT key
         #  we should not have that setting set and instead should have that setting in jwt_public_key so fallback to that
         self.jwt_key_setting = get_setting(self.key_name, get_setting('jwt_public_key', None))
@@ -73,6 +109,39 @@ class JWTCert:
         except Exception as e:
             raise JWTCertException(_("Failed reading {0}: {1}").format(file_path, e))
 
+    @property
+    def public_key(self) -> Optional[Union[Any, str]]:
+        "The key object to pass to jwt.decode for the current key"
+        if self.key is None:
+            return None
+        if self._loaded_key != self.key:
+            self._public_key = load_public_key(self.key)
+            self._loaded_key = self.key
+        return self._public_key
+
+    def get_local_cache_timeout(self) -> float:
+        # The key is never kept in the process longer than in the shared cache
+        return min(get_setting('ANSIBLE_BASE_JWT_LOCAL_CACHE_TIMEOUT_SECONDS', 300), self.cache.get_cache_timeout())
+
+    def _get_local_key(self) -> Optional[LocalKey]:
+        local_key = local_keys.get(self.jwt_key_setting)
+        if local_key is None or time.monotonic() - local_key.loaded >= self.get_local_cache_timeout():
+            return None
+        return local_key
+
+    def _set_local_key(self) -> None:
+        "Keep the current key in the process, the key is only parsed again if its fingerprint changed"
+        timeout = self.get_local_cache_timeout()
+        if timeout <= 0:
+            local_keys.pop(self.jwt_key_setting, None)
+            return
+
+        fingerprint = get_key_fingerprint(self.key)
+        previous = local_keys.get(self.jwt_key_setting)
+        if previous is not None and previous.fingerprint == fingerprint:
+            self._public_key, self._loaded_key = previous.public_key, self.key
+        local_keys[self.jwt_key_setting] = LocalKey(key=self.key, fingerprint=fingerprint, public_key=self.public_key, loaded=time.monotonic())
+
     def get_decryption_key(self, ignore_cache: bool = False) -> None:
         # Set key and cached to None
         self.key = None
@@ -82,11 +151,19 @@ class JWTCert:
             logger.info(f"Failed to get the setting {self.key_name}")
             return
 
+        local_key = None if ignore_cache else self._get_local_key()
+        if local_key is not None:
+            self.cached = True
+            self.key = local_key.key
+            self._public_key, self._loaded_key = local_key.public_key, local_key.key
+            return
+
         cached_key = self.cache.get_key_from_cache()
         if cached_key and not ignore_cache:
             logger.debug(f"Loading decryption key from cache instead of from url {self.jwt_key_setting}")
             self.cached = True
             self.key = cached_key
+            self._set_local_key()
             return
 
         # We don't check the cache right away here because we only want to check the cache if its a file or URL.
@@ -111,4 +188,5 @@ class JWTCert:
         logger.info("Decryption key appears valid")
         logger.debug(f"{self.key}")
         self.cache.set_key_in_cache(self.key)
+        self._set_local_key()
         self.cached = False
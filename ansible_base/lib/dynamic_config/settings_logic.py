@@ -212,6 +212,15 @@ def get_dab_settings(
         # entries mapping that permission to the assignment's organization
         dab_data['ANSIBLE_BASE_CACHE_PARENT_PERMISSIONS'] = False
 
+        # Load object permissions of a user for a whole model type with the first has_obj_perm check
+        # and keep them on the user object, so later checks in the same request do not do queries
+        # this loads every permission the user has to the type, so it is only worth it for many checks per request
+        dab_data['ANSIBLE_BASE_CACHE_OBJECT_PERMISSIONS'] = False
+
+        # Seconds to keep system-wide permissions of a user in the Django cache
+        # entries are also made out of date by changes to roles, so this is only a safeguard
+        dab_data['ANSIBLE_BASE_SINGLETON_PERMISSIONS_CACHE_TIMEOUT'] = 600
+
         # API clients can assign users and teams roles for shared resources
         dab_data['ALLOW_LOCAL_RESOURCE_MANAGEMENT'] = True
         # API clients can assign roles provided by the JWT
@@ -229,8 +238,14 @@ def get_dab_settings(
         # Sync local changes to the resource server
         # This will not do anything if RESOURCE_SERVER is not defined
         dab_data['RESOURCE_SERVER_SYNC_ENABLED'] = True
+        # Write local changes to an outbox table in the same transaction, instead of syncing them during the save
+        # the outbox is sent to the resource server by the reverse_sync_outbox management command
+        dab_data['RESOURCE_SERVER_SYNC_OUTBOX'] = False
         # The API path on the resource server to use to update resources
         dab_data['RESOURCE_SERVICE_PATH'] = "/api/gateway/v1/service-index/"
+        # Seconds to keep records of deleted resources for the manifest of changes since a point in time,
+        # services that last synced before this must do a full sync
+        dab_data['RESOURCE_DELETION_RETENTION_SECONDS'] = 7 * 24 * 60 * 60
 
         # Disable legacy SSO by default
         dab_data['ENABLE_SERVICE_BACKED_SSO'] = False
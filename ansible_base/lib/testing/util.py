@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 
 from requests import Response
@@ -56,10 +57,23 @@ class StaticResourceAPIClient(ResourceAPIClient):
         response = Response()
         response.status_code = 200
         response.encoding = "utf-8"
+        # The content is set directly, so iter_lines and iter_content read it instead of the raw stream
+        response._content_consumed = True
 
         if path in self.router:
             response.status_code = self.router[path]["status_code"]
             response._content = self.router[path]["content"]
+            response.headers.update(self.router[path].get("headers", {}))
+            return response
+
+        if path == "resources/bulk/":
+            # Combine the responses of the individual resources
+            results = []
+            for ansible_id in data["ansible_ids"]:
+                resource_file_path = Path(self.base_url) / "resources" / ansible_id / "response"
+                if resource_file_path.exists():
+                    results.append(json.loads(resource_file_path.read_bytes()))
+            response._content = json.dumps({"results": results}).encode("utf-8")
             return response
 
         content_file_path = Path(self.base_url) / path / "response"
@@ -1,12 +1,12 @@
-from typing import Any, Type, Union
+import threading
+from typing import Any, Iterable, Type, Union
 from uuid import UUID
 
 from django.apps import apps as django_apps
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ImproperlyConfigured
-from django.db.models import CharField, Model, OuterRef
-from django.db.models.functions import Cast
+from django.db.models import Exists, Model
 from django.db.models.query import QuerySet
 
 from ansible_base.lib.abstract_models.organization import AbstractOrganization
@@ -37,16 +37,83 @@ def get_organization_model() -> Type[AbstractOrganization]:
     return get_model_from_settings('ANSIBLE_BASE_ORGANIZATION_MODEL')
 
 
-def get_object_by_ansible_id(qs: QuerySet, ansible_id: Union[str, UUID], annotate_as: str = 'ansible_id_for_filter') -> Model:
+# Primary keys of objects found by ansible_id in this process, by (content type id, ansible_id).
+# A cached key is always checked against the Resource table, so it can never give the wrong object.
+_ansible_id_pks = {}
+_ansible_id_pks_lock = threading.Lock()
+ANSIBLE_ID_PK_CACHE_SIZE = 10000
+
+
+def _get_resources_for_model(cls) -> tuple:
     resource_cls = django_apps.get_model('dab_resource_registry', 'Resource')
     content_type_cls = django_apps.get_model('contenttypes', 'ContentType')
-    cls = qs.model
     ct = content_type_cls.objects.get_for_model(cls)
-    pk_field_name = cls._meta.pk.name
-    pk_reference = Cast(OuterRef(pk_field_name), output_field=CharField())
-    resource_qs = resource_cls.objects.filter(object_id=pk_reference, content_type=ct).values('ansible_id')
-    return qs.annotate(**{annotate_as: resource_qs}).get(**{annotate_as: ansible_id})
+    return resource_cls.objects.filter(content_type=ct), ct
+
+
+def _cache_ansible_id_pk(key: tuple, pk: Any) -> None:
+    with _ansible_id_pks_lock:
+        if key not in _ansible_id_pks and len(_ansible_id_pks) >= ANSIBLE_ID_PK_CACHE_SIZE:
+            # Remove the oldest entry
+            del _ansible_id_pks[next(iter(_ansible_id_pks))]
+        _ansible_id_pks[key] = pk
+
+
+def get_object_by_ansible_id(qs: QuerySet, ansible_id: Union[str, UUID], annotate_as: str = 'ansible_id_for_filter') -> Model:
+    """
+    Return the object from qs which has a Resource with the given ansible_id, the ansible_id is set as annotate_as on it.
+    The lookup starts from the unique index on Resource.ansible_id, and then gets the object by its primary key.
+    When the primary key for the ansible_id is known in this process, this is one query for the object,
+    with a check that the Resource still links the ansible_id to it.
+    """
+    cls = qs.model
+    resource_qs, ct = _get_resources_for_model(cls)
+    key = (ct.pk, str(ansible_id))
+
+    pk = _ansible_id_pks.get(key)
+    if pk is not None:
+        resource_exists = Exists(resource_qs.filter(ansible_id=ansible_id, object_id=str(pk)))
+        obj = qs.filter(resource_exists, pk=pk).first()
+        if obj is not None:
+            setattr(obj, annotate_as, UUID(str(ansible_id)))
+            return obj
+        _ansible_id_pks.pop(key, None)
+
+    object_id = resource_qs.filter(ansible_id=ansible_id).values_list('object_id', flat=True).first()
+    if object_id is None:
+        raise cls.DoesNotExist(f'{cls._meta.object_name} matching query does not exist.')
+    obj = qs.get(pk=cls._meta.pk.to_python(object_id))
+    _cache_ansible_id_pk(key, obj.pk)
+    setattr(obj, annotate_as, UUID(str(ansible_id)))
+    return obj
+
+
+def get_objects_by_ansible_ids(qs: QuerySet, ansible_ids: Iterable[Union[str, UUID]]) -> dict[str, Model]:
+    """
+    Return the objects from qs which have a Resource with one of the given ansible_ids, by the ansible_id as a string.
+    Ansible_ids that are not found are left out. This is two queries for any number of ansible_ids.
+    """
+    cls = qs.model
+    resource_qs, ct = _get_resources_for_model(cls)
+    ansible_ids = set(str(ansible_id) for ansible_id in ansible_ids)
+    if not ansible_ids:
+        return {}
+
+    pk_to_ansible_id = {
+        cls._meta.pk.to_python(object_id): str(ansible_id)
+        for ansible_id, object_id in resource_qs.filter(ansible_id__in=ansible_ids).values_list('ansible_id', 'object_id')
+    }
+    objects = {}
+    for pk, obj in qs.in_bulk(list(pk_to_ansible_id.keys())).items():
+        ansible_id = pk_to_ansible_id[pk]
+        _cache_ansible_id_pk((ct.pk, ansible_id), pk)
+        objects[ansible_id] = obj
+    return objects
 
 
 def get_user_by_ansible_id(ansible_id: Union[str, UUID], annotate_as: str = 'ansible_id_for_filter') -> Model:
     return get_object_by_ansible_id(get_user_model().objects.all(), ansible_id, annotate_as=annotate_as)
+
+
+def get_users_by_ansible_ids(ansible_ids: Iterable[Union[str, UUID]]) -> dict[str, Model]:
+    return get_objects_by_ansible_ids(get_user_model().objects.all(), ansible_ids)
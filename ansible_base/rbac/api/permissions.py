@@ -112,7 +112,7 @@ class AnsibleBaseObjectPermissions(DjangoObjectPermissions):
         return [p for p in perms if not is_add_perm(p)]
 
     def has_object_permission_by_codename(self, request, obj, perms):
-        return all(request.user.has_obj_perm(obj, perm) for perm in perms)
+        return all(request.user.has_obj_perms_bulk([obj], perms)[obj].values())
 
     def model_is_valid(self, model_cls):
         return permission_registry.is_registered(model_cls)
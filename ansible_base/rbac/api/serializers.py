@@ -1,5 +1,6 @@
 from django.apps import apps
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 from django.db.utils import IntegrityError
 from django.utils.functional import cached_property
@@ -333,5 +334,92 @@ class RoleTeamAssignmentSerializer(BaseAssignmentSerializer):
         return permission_registry.team_model.access_qs(requesting_user)
 
 
+class RoleBulkAssignmentSerializer(serializers.Serializer):
+    role_definition = serializers.PrimaryKeyRelatedField(
+        queryset=RoleDefinition.objects.all(), help_text=_('The role definition to give to all of the users and teams')
+    )
+    object_ids = serializers.ListField(
+        child=serializers.CharField(), allow_empty=False, write_only=True, help_text=_('Primary keys of the objects of the type of the role definition')
+    )
+    users = serializers.ListField(
+        child=serializers.IntegerField(), required=False, write_only=True, help_text=_('Primary keys of the users who will receive permissions')
+    )
+    teams = serializers.ListField(
+        child=serializers.IntegerField(), required=False, write_only=True, help_text=_('Primary keys of the teams who will receive permissions')
+    )
+    user_assignments = serializers.ListField(child=serializers.IntegerField(), read_only=True, help_text=_('Ids of the resulting user assignments'))
+    team_assignments = serializers.ListField(child=serializers.IntegerField(), read_only=True, help_text=_('Ids of the resulting team assignments'))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request:
+            self.user_queryset = visible_users(request.user)
+            self.team_queryset = permission_registry.team_model.access_qs(request.user)
+        else:
+            self.user_queryset = permission_registry.user_model.objects.all()
+            self.team_queryset = permission_registry.team_model.objects.all()
+
+    @staticmethod
+    def get_by_pks(queryset, pks) -> list:
+        """
+        Return the objects from queryset with the given primary keys, in the order given, with one query.
+        The primary keys are normalized by the model field, and any that are not found are reported in the error.
+        """
+        model = queryset.model
+        try:
+            requested = [model._meta.pk.to_python(pk) for pk in pks]
+        except DjangoValidationError:
+            raise ValidationError(_('Ids must be valid primary keys of %(model_name)s') % {'model_name': model._meta.model_name})
+        found = {obj.pk: obj for obj in queryset.filter(pk__in=requested)}
+        missing_ids = [pk for pk, value in zip(pks, requested) if value not in found]
+        if missing_ids:
+            msg = serializers.PrimaryKeyRelatedField.default_error_messages['does_not_exist']
+            raise ValidationError([msg.format(pk_value=pk) for pk in missing_ids])
+        return [found[value] for value in dict.fromkeys(requested)]
+
+    def validate_users(self, value):
+        return self.get_by_pks(self.user_queryset, value)
+
+    def validate_teams(self, value):
+        return self.get_by_pks(self.team_queryset, value)
+
+    def get_objects(self, role_definition, object_ids, requesting_user):
+        model = role_definition.content_type.model_class()
+        try:
+            return self.get_by_pks(model.access_qs(requesting_user), object_ids)
+        except ValidationError as exc:
+            raise ValidationError({'object_ids': exc.detail})
+
+    def create(self, validated_data):
+        rd = validated_data['role_definition']
+        requesting_user = self.context['view'].request.user
+        actors = list(validated_data.get('users', [])) + list(validated_data.get('teams', []))
+        if not actors:
+            msg = _('Provide at least one user or team')
+            raise ValidationError({'users': msg, 'teams': msg})
+
+        if not rd.content_type:
+            raise ValidationError({'role_definition': _('Bulk assignment is not available for system roles')})
+
+        # Return a 400 if the role is not managed locally
+        check_locally_managed(rd)
+
+        objs = self.get_objects(rd, validated_data['object_ids'], requesting_user)
+        for obj in objs:
+            # model-level callback to further validate the assignment, same as for single assignments
+            if getattr(obj, 'validate_role_assignment', None):
+                for actor in actors:
+                    obj.validate_role_assignment(actor, rd, requesting_user=requesting_user)
+            check_content_obj_permission(requesting_user, obj)
+
+        assignments = rd.give_permission_bulk(actors, objs)
+        return {
+            'role_definition': rd,
+            'user_assignments': [assignment.id for assignment in assignments if isinstance(assignment, RoleUserAssignment)],
+            'team_assignments': [assignment.id for assignment in assignments if isinstance(assignment, RoleTeamAssignment)],
+        }
+
+
 class RoleMetadataSerializer(serializers.Serializer):
     allowed_permissions = serializers.DictField(help_text=_('List of permissions allowed for a role definition, given its content type.'))
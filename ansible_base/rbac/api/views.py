@@ -4,7 +4,7 @@ from typing import Type
 from django.db import transaction
 from django.db.models import Model
 from django.utils.translation import gettext_lazy as _
-from rest_framework import permissions
+from rest_framework import permissions, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
@@ -13,6 +13,7 @@ from rest_framework.viewsets import ModelViewSet
 from ansible_base.lib.utils.views.django_app_api import AnsibleBaseDjangoAppApiView
 from ansible_base.rbac.api.permissions import RoleDefinitionPermissions
 from ansible_base.rbac.api.serializers import (
+    RoleBulkAssignmentSerializer,
     RoleDefinitionDetailSerializer,
     RoleDefinitionSerializer,
     RoleMetadataSerializer,
@@ -75,6 +76,28 @@ class RoleMetadataView(AnsibleBaseDjangoAppApiView, GenericAPIView):
         return Response(serializer.data)
 
 
+class RoleBulkAssignmentView(AnsibleBaseDjangoAppApiView, GenericAPIView):
+    """
+    Use this endpoint to give many users and teams a role to many objects at once.
+    Every user and team listed is given the role definition to every object listed.
+    The objects must be of the type specified in the role definition.
+
+    This gives the same result as creating the individual assignments,
+    but the permission data is updated once for all of them.
+    The resulting user and team assignments can be deleted individually.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = RoleBulkAssignmentSerializer
+
+    def post(self, request, format=None):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
 class RoleDefinitionViewSet(AnsibleBaseDjangoAppApiView, ModelViewSet):
     """
     Role Definitions (roles) contain a list of permissions and can be used to
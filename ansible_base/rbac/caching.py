@@ -1,11 +1,27 @@
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
+from collections.abc import Iterable
 from typing import Optional
 from uuid import UUID
 
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import F, Q, TextField
+from django.db.models.functions import Cast
 
-from ansible_base.rbac.models import ObjectRole, RoleDefinition, RoleEvaluation, RoleEvaluationUUID
+from ansible_base.lib.utils.db import ensure_transaction
+from ansible_base.lib.utils.models import is_add_perm
+from ansible_base.rbac.models import (
+    DABPermission,
+    ObjectRole,
+    RoleDefinition,
+    RoleEvaluation,
+    RoleEvaluationUUID,
+    RoleTeamAssignment,
+    TeamAncestor,
+    get_evaluation_model,
+)
 from ansible_base.rbac.permission_registry import permission_registry
 from ansible_base.rbac.prefetch import TypesPrefetch
 
@@ -24,49 +40,64 @@ Those methods are what truly dictate the object-role to object-permission transl
 """
 
 
-def all_team_parents(team_id: int, team_team_parents: dict, seen: Optional[set] = None) -> set[int]:
-    """
-    Returns parent teams, and parent teams of parent teams, until we have them all
-        {parent_team_id, parent_team_id, ...}
-
-    team_id: id of the team we want to get the direct and indirect parents of
-    team_team_parents: mapping of team id to ids of its parents, this is not modified by this method
-    seen: mutable set that will be added to by each call so that we can not recurse infinitely
-    """
-    parent_team_ids = set()
-    if seen is None:
-        seen = set()
-    for parent_id in team_team_parents.get(team_id, []):
-        if parent_id in seen:
-            # will be combined in a lower level of the call stack
-            # this condition prevents infinite recursion in the event of loops in the graph
-            continue
-        parent_team_ids.add(parent_id)
-        seen.add(parent_id)
-        parent_team_ids.update(all_team_parents(parent_id, team_team_parents, seen=seen))
-    return parent_team_ids
-
-
-def get_org_team_mapping() -> dict[int, list[int]]:
+def get_org_team_mapping(org_ids: Optional[Iterable[int]] = None, team_ids: Optional[Iterable[int]] = None) -> dict[int, list[int]]:
     """
     Returns the teams in all organization as a dictionary.
         {
             organization_id: [team_id, team_id, ...],
             organization_id: [team_id, ...]
         }
+    org_ids: if given, only return teams in these organizations
+    team_ids: if given, only return these teams
     """
     org_team_mapping = defaultdict(list)
     team_fields = ['id']
     team_parent_fd = permission_registry.get_parent_fd_name(permission_registry.team_model)
     if team_parent_fd:
         team_fields.append(f'{team_parent_fd}_id')
-        for team in permission_registry.team_model.objects.only(*team_fields):
+        team_qs = permission_registry.team_model.objects.only(*team_fields)
+        if org_ids is not None:
+            team_qs = team_qs.filter(**{f'{team_parent_fd}_id__in': org_ids})
+        if team_ids is not None:
+            team_qs = team_qs.filter(id__in=team_ids)
+        for team in team_qs:
             team_parent_id = getattr(team, f'{team_parent_fd}_id')
             org_team_mapping[team_parent_id].append(team.id)
     return org_team_mapping
 
 
-def get_direct_team_member_roles(org_team_mapping: dict) -> dict[int, list[int]]:
+def get_team_ids_for_object_roles(object_roles: Iterable[ObjectRole]) -> set[int]:
+    """
+    Returns the ids of all teams that the given object roles would give membership to
+    if their role definition lists the member_team permission.
+    This does not consider teams-of-teams, so these are the teams "directly" affected.
+    """
+    team_ids = set()
+    org_ids = set()
+    for object_role in object_roles:
+        if object_role.content_type_id == permission_registry.team_ct_id:
+            team_ids.add(int(object_role.object_id))
+        elif object_role.content_type_id == permission_registry.org_ct_id:
+            org_ids.add(int(object_role.object_id))
+    if org_ids:
+        for org_team_ids in get_org_team_mapping(org_ids=org_ids).values():
+            team_ids.update(org_team_ids)
+    return team_ids
+
+
+def team_member_role_filter(org_team_mapping: dict, team_ids: Iterable[int]) -> Q:
+    """
+    Returns a filter for ObjectRole that limits it to roles which could give membership to the given teams.
+    org_team_mapping must be filtered to these teams, as from get_org_team_mapping(team_ids=team_ids)
+    """
+    # ObjectRole.object_id is a text field, so these are compared as strings
+    role_filter = Q(content_type_id=permission_registry.team_ct_id, object_id__in=[str(team_id) for team_id in team_ids])
+    if org_team_mapping:
+        role_filter |= Q(content_type_id=permission_registry.org_ct_id, object_id__in=[str(org_id) for org_id in org_team_mapping.keys()])
+    return role_filter
+
+
+def get_direct_team_member_roles(org_team_mapping: dict, team_ids: Optional[Iterable[int]] = None) -> dict[int, list[int]]:
     """
     If an organization-level role lists "member_team" permission, that confers
     several team's permissions to users who holds an org role of that type.
@@ -78,9 +109,13 @@ def get_direct_team_member_roles(org_team_mapping: dict) -> dict[int, list[int]]
             team_id: [role_id, role_id, ...],
             team_id: [role_id, ...]
         }
+    team_ids: if given, only consider roles for these teams, org_team_mapping must be filtered to these teams too
     """
     direct_member_roles = defaultdict(list)
-    for object_role in ObjectRole.objects.filter(role_definition__permissions__codename=permission_registry.team_permission).iterator():
+    object_role_qs = ObjectRole.objects.filter(role_definition__permissions__codename=permission_registry.team_permission)
+    if team_ids is not None:
+        object_role_qs = object_role_qs.filter(team_member_role_filter(org_team_mapping, team_ids))
+    for object_role in object_role_qs.iterator():
         if object_role.content_type_id == permission_registry.team_ct_id:
             direct_member_roles[int(object_role.object_id)].append(object_role.id)
         elif object_role.content_type_id == permission_registry.org_ct_id:
@@ -94,7 +129,7 @@ def get_direct_team_member_roles(org_team_mapping: dict) -> dict[int, list[int]]
     return direct_member_roles
 
 
-def get_parent_teams_of_teams(org_team_mapping: dict) -> dict[int, list[int]]:
+def get_parent_teams_of_teams(org_team_mapping: dict, team_ids: Optional[Iterable[int]] = None) -> dict[int, list[int]]:
     """
     Returns a dictionary showing the teams-of-teams relationships in the system
     this happens when a member_team role confers membership to another team.
@@ -104,11 +139,13 @@ def get_parent_teams_of_teams(org_team_mapping: dict) -> dict[int, list[int]]:
         }
     The queryset and logic is similar to get_direct_team_member_roles but
     optimizations are different.
+    team_ids: if given, only return parents of these teams, org_team_mapping must be filtered to these teams too
     """
     team_team_parents = defaultdict(list)
-    for object_role in ObjectRole.objects.filter(
-        role_definition__permissions__codename=permission_registry.team_permission, teams__isnull=False
-    ).prefetch_related('teams'):
+    object_role_qs = ObjectRole.objects.filter(role_definition__permissions__codename=permission_registry.team_permission, teams__isnull=False)
+    if team_ids is not None:
+        object_role_qs = object_role_qs.filter(team_member_role_filter(org_team_mapping, team_ids))
+    for object_role in object_role_qs.distinct().prefetch_related('teams'):
         for actor_team in object_role.teams.all():
             if object_role.content_type_id == permission_registry.team_ct_id:
                 team_team_parents[int(object_role.object_id)].append(actor_team.id)
@@ -121,11 +158,146 @@ def get_parent_teams_of_teams(org_team_mapping: dict) -> dict[int, list[int]]:
     return team_team_parents
 
 
-def compute_team_member_roles():
+def get_team_ancestors(team_ids: set[int], team_team_parents: dict) -> dict[int, dict[int, int]]:
+    """
+    Returns the ancestors of the given teams, with the depth at which the ancestor is found
+        {
+            team_id: {ancestor_team_id: depth, ancestor_team_id: depth, ...},
+            team_id: {}
+        }
+
+    team_ids: teams to compute ancestors for, team_team_parents must list the parents of all of these
+    team_team_parents: mapping of team id to ids of its parents, as from get_parent_teams_of_teams
+    Parents that are not in team_ids are assumed to have correct TeamAncestor entries already,
+    so the graph is not walked past them, their stored ancestors are used instead.
+    """
+    boundary_ids = set()
+    for team_id in team_ids:
+        boundary_ids.update(parent_id for parent_id in team_team_parents.get(team_id, []) if parent_id not in team_ids)
+    boundary_ancestors = defaultdict(dict)
+    if boundary_ids:
+        for team_id, ancestor_id, depth in TeamAncestor.objects.filter(team_id__in=boundary_ids).values_list('team_id', 'ancestor_id', 'depth'):
+            boundary_ancestors[team_id][ancestor_id] = depth
+
+    team_ancestors = {}
+    for team_id in team_ids:
+        # breadth-first search gives the shortest depth for teams in the part of the graph we are walking
+        ancestors = {}
+        queue = deque((parent_id, 1) for parent_id in team_team_parents.get(team_id, []))
+        while queue:
+            ancestor_id, depth = queue.popleft()
+            if ancestor_id in ancestors:
+                continue  # this condition also prevents infinite loops in the event of loops in the graph
+            ancestors[ancestor_id] = depth
+            if ancestor_id in team_ids:
+                queue.extend((parent_id, depth + 1) for parent_id in team_team_parents.get(ancestor_id, []))
+
+        # a path can leave the walked part of the graph, but can not come back into it
+        # because any descendent of a walked team also has to be walked
+        for boundary_id, boundary_depth in list(ancestors.items()):
+            for ancestor_id, depth in boundary_ancestors.get(boundary_id, {}).items():
+                if ancestor_id not in ancestors or ancestors[ancestor_id] > boundary_depth + depth:
+                    ancestors[ancestor_id] = boundary_depth + depth
+        team_ancestors[team_id] = ancestors
+    return team_ancestors
+
+
+def get_all_team_ancestors(org_team_mapping: Optional[dict] = None) -> dict[int, dict[int, int]]:
+    """
+    Computes the ancestors of all teams in the system from the teams-of-teams relationships,
+    this does not use any existing TeamAncestor entries, so it can be used to check them.
+    """
+    if org_team_mapping is None:
+        org_team_mapping = get_org_team_mapping()
+    team_team_parents = get_parent_teams_of_teams(org_team_mapping)
+    graph_team_ids = set(team_team_parents.keys())
+    for parent_ids in team_team_parents.values():
+        graph_team_ids.update(parent_ids)
+    team_ancestors = get_team_ancestors(graph_team_ids, team_team_parents)
+    return {team_id: ancestors for team_id, ancestors in team_ancestors.items() if ancestors}
+
+
+def save_team_ancestors(ancestor_qs, team_ancestors: dict[int, dict[int, int]]) -> None:
+    "Save the computed TeamAncestor entries, ancestor_qs should include all existing entries for these teams"
+    existing = {}
+    for entry_id, team_id, ancestor_id, depth in ancestor_qs.values_list('id', 'team_id', 'ancestor_id', 'depth'):
+        existing[(team_id, ancestor_id, depth)] = entry_id
+    expected = set()
+    for team_id, ancestors in team_ancestors.items():
+        for ancestor_id, depth in ancestors.items():
+            expected.add((team_id, ancestor_id, depth))
+
+    to_delete = [existing[identifier] for identifier in set(existing.keys()) - expected]
+    if to_delete:
+        TeamAncestor.objects.filter(id__in=to_delete).delete()
+    to_add = [TeamAncestor(team_id=team_id, ancestor_id=ancestor_id, depth=depth) for team_id, ancestor_id, depth in expected - set(existing.keys())]
+    if to_add:
+        TeamAncestor.objects.bulk_create(to_add)
+
+
+def save_team_member_roles(team_qs, all_member_roles: dict[int, set[int]]) -> None:
+    "Save the computed ObjectRole.provides_teams data for the teams in team_qs"
+    for team in team_qs.prefetch_related('member_roles'):
+        # NOTE: the .set method will not use the prefetched data, thus the messy implementation here
+        existing_ids = set(r.id for r in team.member_roles.all())
+        expected_ids = set(all_member_roles.get(team.id, []))
+        to_add = expected_ids - existing_ids
+        to_remove = existing_ids - expected_ids
+        if to_add:
+            team.member_roles.add(*to_add)
+        if to_remove:
+            team.member_roles.remove(*to_remove)
+
+
+def compute_team_member_roles(team_ids: Optional[Iterable[int]] = None):
     """
     Fills in the ObjectRole.provides_teams relationship for all teams.
-    This relationship is a list of teams that the role grants membership for
-    This method is always ran globally.
+    This relationship is a list of teams that the role grants membership for.
+    The TeamAncestor entries are also maintained here.
+
+    team_ids: if given, only the part of the teams-of-teams graph affected by a change to these teams
+        will be recomputed, which means these teams and the teams they give membership to.
+        If not given, this method is ran globally.
+    """
+    if team_ids is None:
+        return compute_all_team_member_roles()
+
+    team_ids = set(team_ids)
+    if not team_ids:
+        return
+
+    # Any team that a changed team gives membership to is also affected, directly or indirectly
+    # changes can only modify the parents of the given teams, so the existing descendants are still correct
+    affected_team_ids = team_ids | set(TeamAncestor.objects.filter(ancestor_id__in=team_ids).values_list('team_id', flat=True))
+
+    # Build a team-to-team child-to-parents mapping for the affected teams, and then get all their ancestors
+    org_team_mapping = get_org_team_mapping(team_ids=affected_team_ids)
+    team_team_parents = get_parent_teams_of_teams(org_team_mapping, team_ids=affected_team_ids)
+    team_ancestors = get_team_ancestors(affected_team_ids, team_team_parents)
+
+    # Membership to affected teams is determined by their own direct roles and those of their ancestor teams
+    relevant_team_ids = set(affected_team_ids)
+    for ancestors in team_ancestors.values():
+        relevant_team_ids.update(ancestors.keys())
+    org_team_mapping = get_org_team_mapping(team_ids=relevant_team_ids)
+    direct_member_roles = get_direct_team_member_roles(org_team_mapping, team_ids=relevant_team_ids)
+
+    all_member_roles = {}
+    for team_id in affected_team_ids:
+        all_member_roles[team_id] = set(direct_member_roles.get(team_id, []))
+        for parent_team_id in team_ancestors[team_id]:
+            all_member_roles[team_id].update(set(direct_member_roles.get(parent_team_id, [])))
+
+    logger.debug(f'Recomputing team membership for {len(affected_team_ids)} teams affected by changes to {len(team_ids)} teams')
+    save_team_ancestors(TeamAncestor.objects.filter(team_id__in=affected_team_ids), team_ancestors)
+    save_team_member_roles(permission_registry.team_model.objects.filter(id__in=affected_team_ids), all_member_roles)
+
+
+def compute_all_team_member_roles():
+    """
+    Fills in the ObjectRole.provides_teams relationship and TeamAncestor entries for all teams.
+    This is the fallback for compute_team_member_roles, used for post_migrate
+    or in cases where we can not determine what teams were affected by a change.
     """
     # Manually prefetch the team to org memberships
     org_team_mapping = get_org_team_mapping()
@@ -133,37 +305,186 @@ def compute_team_member_roles():
     # Build out the direct member roles for teams
     direct_member_roles = get_direct_team_member_roles(org_team_mapping)
 
-    # Build a team-to-team child-to-parents mapping for teams that have permission to other teams
-    team_team_parents = get_parent_teams_of_teams(org_team_mapping)
+    # Crawl the team-team graph to get the ancestors of every team that has any
+    team_ancestors = get_all_team_ancestors(org_team_mapping)
 
-    # Now we need to crawl the team-team graph to get the full list of roles that grants access to each team
     # for each parent team that grants membership to a team, we need to add the roles that grant
     # membership to that parent team
     all_member_roles = {}
     for team_id, member_roles in direct_member_roles.items():
         all_member_roles[team_id] = set(member_roles)  # will also avoid mutating original data structure later
-        for parent_team_id in all_team_parents(team_id, team_team_parents):
+        for parent_team_id in team_ancestors.get(team_id, {}):
             all_member_roles[team_id].update(set(direct_member_roles.get(parent_team_id, [])))
 
     # Great! we should be done building all_member_roles which tells what roles gives team membership for all teams
     # now at this point we save that data
-    for team in permission_registry.team_model.objects.prefetch_related('member_roles'):
-        # NOTE: the .set method will not use the prefetched data, thus the messy implementation here
-        existing_ids = set(r.id for r in team.member_roles.all())
-        expected_ids = set(all_member_roles.get(team.id, []))
-        to_add = expected_ids - existing_ids
-        to_remove = existing_ids - expected_ids
-        if to_add:
-            team.member_roles.add(*to_add)
-        if to_remove:
-            team.member_roles.remove(*to_remove)
+    save_team_ancestors(TeamAncestor.objects.all(), team_ancestors)
+    save_team_member_roles(permission_registry.team_model.objects.all(), all_member_roles)
+
+
+def bulk_evaluations_supported() -> bool:
+    "Tells if the set-based rebuild of RoleEvaluation tables in bulk_compute_object_role_permissions can be used"
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def get_child_object_sql(child_model, filter_path: str) -> tuple[str, tuple]:
+    """
+    Returns SQL and params which selects child objects with the primary key of its parent object
+    as text, so that it can be compared to ObjectRole.object_id, with columns
+        (_rbac_child_id, _rbac_parent_id)
+    """
+    child_qs = child_model.objects.order_by().annotate(_rbac_child_id=F('pk'), _rbac_parent_id=Cast(filter_path, output_field=TextField()))
+    return child_qs.values_list('_rbac_child_id', '_rbac_parent_id').query.sql_with_params()
+
+
+def get_direct_evaluation_sql(eval_cls) -> list[tuple[str, tuple]]:
+    """
+    Returns a list of SQL statements and params, each selects some of the evaluations
+    that object roles give from their own role definitions, with columns
+        (role_id, codename, content_type_id, object_id)
+    These do not consider teams, and only give evaluations that belong in the table of eval_cls.
+    This follows the same rules as ObjectRole.expected_direct_permissions, in a set-based way,
+    with a statement for every registered model and each of its child model paths.
+    """
+    qn = connection.ops.quote_name
+    object_role_table = qn(ObjectRole._meta.db_table)
+    rd_perm_table = qn(RoleDefinition.permissions.through._meta.db_table)
+    perm_table = qn(DABPermission._meta.db_table)
+    cast_type = eval_cls._meta.get_field('object_id').cast_db_type(connection)
+
+    # permission ids are listed in the SQL, which can be done because the permission table is small
+    perms_by_ct = defaultdict(list)
+    for perm in DABPermission.objects.only('id', 'codename', 'content_type_id'):
+        perms_by_ct[perm.content_type_id].append(perm)
+
+    base_sql = (
+        f'SELECT r.id AS role_id, p.codename AS codename, {{ct_expr}} AS content_type_id, {{obj_expr}} AS object_id '
+        f'FROM {object_role_table} r '
+        f'INNER JOIN {rd_perm_table} rp ON rp.roledefinition_id = r.role_definition_id '
+        f'INNER JOIN {perm_table} p ON p.id = rp.dabpermission_id '
+        '{join_sql}'
+        'WHERE r.content_type_id = %s AND p.id IN ({perm_ids})'
+    )
+
+    def part(role_ct_id, perms, ct_expr='r.content_type_id', obj_expr=f'CAST(r.object_id AS {cast_type})', join_sql='', join_params=()):
+        perm_ids = ', '.join(str(int(perm.id)) for perm in perms)
+        sql = base_sql.format(ct_expr=ct_expr, obj_expr=obj_expr, join_sql=join_sql, perm_ids=perm_ids)
+        return (sql, tuple(join_params) + (role_ct_id,))
+
+    parts = []
+    for role_model in permission_registry.all_registered_models:
+        role_ct_id = ContentType.objects.get_for_model(role_model).id
+        own_perms = perms_by_ct.get(role_ct_id, [])
+        other_perms = [perm for ct_id, perm_list in perms_by_ct.items() if ct_id != role_ct_id for perm in perm_list]
+
+        if get_evaluation_model(role_model) is eval_cls:
+            # direct object permission
+            if own_perms:
+                parts.append(part(role_ct_id, own_perms))
+
+            # child permission on the parent object, usually only for add permission
+            parent_perms = [perm for perm in other_perms if is_add_perm(perm.codename) or settings.ANSIBLE_BASE_CACHE_PARENT_PERMISSIONS]
+            if parent_perms:
+                parts.append(part(role_ct_id, parent_perms))
+
+        # child object permission on child objects
+        child_models = permission_registry.get_child_models(role_model)
+        for path, child_model in child_models:
+            child_ct_id = ContentType.objects.get_for_model(child_model).id
+            child_perms = [perm for perm in perms_by_ct.get(child_ct_id, []) if not is_add_perm(perm.codename)]
+            if child_perms and get_evaluation_model(child_model) is eval_cls:
+                child_sql, child_params = get_child_object_sql(child_model, path)
+                join_sql = f'INNER JOIN ({child_sql}) child ON child._rbac_parent_id = r.object_id '
+                parts.append(
+                    part(role_ct_id, child_perms, ct_expr=str(int(child_ct_id)), obj_expr='child._rbac_child_id', join_sql=join_sql, join_params=child_params)
+                )
+
+            # Only propogate add permission to children which are parents of the permission model
+            if '__' not in path:
+                continue
+            path_to_parent, filter_path = path.split('__', 1)
+            parent_model = child_model._meta.get_field(path_to_parent).related_model
+            add_perms = [perm for perm in perms_by_ct.get(child_ct_id, []) if is_add_perm(perm.codename)]
+            if add_perms and get_evaluation_model(parent_model) is eval_cls:
+                parent_ct_id = ContentType.objects.get_for_model(parent_model).id
+                child_sql, child_params = get_child_object_sql(parent_model, filter_path)
+                join_sql = f'INNER JOIN ({child_sql}) child ON child._rbac_parent_id = r.object_id '
+                parts.append(
+                    part(role_ct_id, add_perms, ct_expr=str(int(parent_ct_id)), obj_expr='child._rbac_child_id', join_sql=join_sql, join_params=child_params)
+                )
+    return parts
+
+
+def bulk_compute_object_role_permissions() -> None:
+    """
+    Makes the RoleEvaluation tables correct for all object roles using set-based SQL.
+    This does the same thing as compute_object_role_permissions() without arguments,
+    but the expected evaluations are computed in the database, using temporary tables,
+    instead of looping over every object role in python.
+    Assumes the ObjectRole.provides_teams relationship is correct.
+    """
+    qn = connection.ops.quote_name
+    team_assignment_table = qn(RoleTeamAssignment._meta.db_table)
+    provides_teams_table = qn(ObjectRole.provides_teams.through._meta.db_table)
+    direct_table = qn('_dab_rbac_direct_evaluations')
+    expected_table = qn('_dab_rbac_expected_evaluations')
+
+    with ensure_transaction(), connection.cursor() as cursor:
+        for eval_cls in (RoleEvaluation, RoleEvaluationUUID):
+            eval_table = qn(eval_cls._meta.db_table)
+            parts = get_direct_evaluation_sql(eval_cls)
+            if not parts:
+                deleted, _ = eval_cls.objects.all().delete()
+                if deleted:
+                    logger.info(f'Deleting {deleted} object-permission records from {eval_cls._meta.model_name}')
+                continue
+
+            cursor.execute(f'DROP TABLE IF EXISTS {direct_table}')
+            cursor.execute(f'DROP TABLE IF EXISTS {expected_table}')
+
+            union_sql = ' UNION ALL '.join(f'SELECT * FROM ({sql}) part_{i}' for i, (sql, params) in enumerate(parts))
+            union_params = tuple(param for sql, params in parts for param in params)
+            cursor.execute(f'CREATE TEMPORARY TABLE {direct_table} AS {union_sql}', union_params)
+
+            # Users who hold a role that gives membership to a team get the direct evaluations of the team's roles
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {expected_table} AS '
+                f'SELECT role_id, codename, content_type_id, object_id FROM {direct_table} '
+                'UNION '
+                f'SELECT pt.objectrole_id AS role_id, d.codename, d.content_type_id, d.object_id FROM {direct_table} d '
+                f'INNER JOIN {team_assignment_table} rta ON rta.object_role_id = d.role_id '
+                f'INNER JOIN {provides_teams_table} pt ON pt.team_id = rta.team_id'
+            )
+            cursor.execute(f'CREATE INDEX {qn("_dab_rbac_expected_evaluations_idx")} ON {expected_table} (role_id, content_type_id, object_id, codename)')
+
+            match_sql = 'x.role_id = e.role_id AND x.content_type_id = e.content_type_id AND x.object_id = e.object_id AND x.codename = e.codename'
+            cursor.execute(
+                f'DELETE FROM {eval_table} WHERE id IN '
+                f'(SELECT e.id FROM {eval_table} e WHERE NOT EXISTS (SELECT 1 FROM {expected_table} x WHERE {match_sql}))'
+            )
+            if cursor.rowcount:
+                logger.info(f'Deleted {cursor.rowcount} object-permission records from {eval_cls._meta.model_name}')
+            cursor.execute(
+                f'INSERT INTO {eval_table} (role_id, codename, content_type_id, object_id) '
+                f'SELECT x.role_id, x.codename, x.content_type_id, x.object_id FROM {expected_table} x '
+                f'WHERE NOT EXISTS (SELECT 1 FROM {eval_table} e WHERE {match_sql})'
+            )
+            if cursor.rowcount:
+                logger.info(f'Added {cursor.rowcount} object-permission records to {eval_cls._meta.model_name}')
+
+            cursor.execute(f'DROP TABLE {direct_table}')
+            cursor.execute(f'DROP TABLE {expected_table}')
 
 
 def compute_object_role_permissions(object_roles=None, types_prefetch=None):
     """
     Assumes the ObjectRole.provides_teams relationship is correct.
     Makes the RoleEvaluation table correct for all specified object_roles
+    If object_roles is not given, this is done for all object roles, using set-based SQL if the database supports it
     """
+    if object_roles is None and bulk_evaluations_supported():
+        return bulk_compute_object_role_permissions()
+
     to_delete = set()
     to_add = []
 
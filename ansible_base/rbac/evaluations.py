@@ -1,13 +1,19 @@
-from typing import Optional
+import time
+from collections import defaultdict
+from typing import Iterable, Optional
 
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Model
 from django.db.models.functions import Cast
 from django.db.models.query import QuerySet
 from rest_framework.serializers import ValidationError
 
 from ansible_base.rbac import permission_registry
-from ansible_base.rbac.models import DABPermission, RoleDefinition, get_evaluation_model
+from ansible_base.rbac.models import DABPermission, RoleDefinition, get_evaluation_model, get_role_ids
 from ansible_base.rbac.validators import validate_codename_for_model
 
 """
@@ -46,12 +52,57 @@ def has_super_permission(user, full_codename=None) -> bool:
     return False
 
 
+# Key in the Django cache for a counter that is incremented by triggers whenever global permissions may have changed
+rbac_version_cache_key = 'ansible_base_rbac_version'
+
+
+def get_rbac_version() -> int:
+    version = cache.get(rbac_version_cache_key)
+    if version is None:
+        # start from the current time, so that a lost counter does not go back to a version used before
+        cache.add(rbac_version_cache_key, int(time.time() * 1000), timeout=None)
+        version = cache.get(rbac_version_cache_key)
+    return version
+
+
+def _increment_rbac_version() -> None:
+    try:
+        cache.incr(rbac_version_cache_key)
+    except ValueError:
+        get_rbac_version()  # key does not exist, any new value is a new version
+
+
+def bump_rbac_version() -> None:
+    """
+    Called from triggers, makes global permissions saved in the Django cache out of date for all processes.
+    The version is changed right away for the current transaction, and again when the transaction commits,
+    because before the commit other processes may cache permissions computed from the old rows under the new version.
+    """
+    _increment_rbac_version()
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and not any(callback[1] is _increment_rbac_version for callback in connection.run_on_commit):
+        transaction.on_commit(_increment_rbac_version)
+
+
+def get_singleton_permissions(user) -> set[str]:
+    "Returns codenames of permissions that user has system-wide from global roles, using the Django cache"
+    if not (settings.ANSIBLE_BASE_ALLOW_SINGLETON_USER_ROLES or settings.ANSIBLE_BASE_ALLOW_SINGLETON_TEAM_ROLES):
+        return set()  # no queries are needed in this case
+
+    cache_key = f'ansible_base_rbac_singleton_permissions_{user.pk}_{get_rbac_version()}'
+    permissions = cache.get(cache_key)
+    if permissions is None:
+        # values_list will make the return type set[str]
+        permission_qs = DABPermission.objects.values_list('codename', flat=True)
+        permissions = RoleDefinition.user_global_permissions(user, permission_qs=permission_qs)
+        cache.set(cache_key, permissions, timeout=settings.ANSIBLE_BASE_SINGLETON_PERMISSIONS_CACHE_TIMEOUT)
+    return permissions
+
+
 def bound_singleton_permissions(self):
     "Method attached to User model as singleton_permissions"
     if not hasattr(self, '_singleton_permissions') or bound_singleton_permissions._team_clear_signal:
-        # values_list will make the return type set[str]
-        permission_qs = DABPermission.objects.values_list('codename', flat=True)
-        self._singleton_permissions = RoleDefinition.user_global_permissions(self, permission_qs=permission_qs)
+        self._singleton_permissions = get_singleton_permissions(self)
         bound_singleton_permissions._team_clear_signal = False
     return self._singleton_permissions
 
@@ -59,6 +110,35 @@ def bound_singleton_permissions(self):
 bound_singleton_permissions._team_clear_signal = False
 
 
+def get_object_permissions(actor, model_cls) -> dict:
+    """
+    Returns the permissions actor has from object roles, for all objects of model_cls type,
+    as a dictionary of object primary keys to a set of permission codenames.
+    The RoleEvaluation entries for the type are loaded with one query and saved on the actor,
+    which generally lives for the duration of a request, so that later checks do not do any queries.
+    """
+    if getattr(actor, '_object_permissions_version', None) != get_object_permissions._version:
+        actor._object_permissions = {}
+        actor._object_permissions_version = get_object_permissions._version
+    ct_id = ContentType.objects.get_for_model(model_cls).id
+    if ct_id not in actor._object_permissions:
+        obj_perms = defaultdict(set)
+        eval_qs = get_evaluation_model(model_cls).objects.filter(role__in=get_role_ids(actor), content_type_id=ct_id)
+        for object_id, codename in eval_qs.values_list('object_id', 'codename').distinct():
+            obj_perms[object_id].add(codename)
+        actor._object_permissions[ct_id] = dict(obj_perms)
+    return actor._object_permissions[ct_id]
+
+
+# Incremented by triggers when evaluations may have changed, so that permissions saved on actors are reloaded
+get_object_permissions._version = 0
+
+
+def clear_object_permissions_cache():
+    "Called from triggers, marks object permissions saved on all actors in memory as out of date"
+    get_object_permissions._version += 1
+
+
 class BaseEvaluationDescriptor:
     """
     Descriptors have to be used to attach what are effectively a @classmethod
@@ -104,9 +184,45 @@ def bound_has_obj_perm(self, obj, codename) -> bool:
     full_codename = validate_codename_for_model(codename, obj)
     if has_super_permission(self, full_codename):
         return True
+    if settings.ANSIBLE_BASE_CACHE_OBJECT_PERMISSIONS:
+        return full_codename in get_object_permissions(self, obj._meta.model).get(obj.pk, ())
     return get_evaluation_model(obj).has_obj_perm(self, obj, full_codename)
 
 
+def bound_has_obj_perms_bulk(self, objects: Iterable[Model], codenames: Iterable[str]) -> dict[Model, dict[str, bool]]:
+    """
+    Evaluates every codename for every object, with at most one query for each type of object
+    returns a dictionary of each object to a dictionary of each codename to the answer, like
+        {inventory: {'change': True, 'delete': False}}
+    """
+    codenames = list(codenames)
+    objects_by_model = defaultdict(list)
+    for obj in objects:
+        if not permission_registry.is_registered(obj):
+            raise ValidationError(f'Object of {obj._meta.model_name} type is not registered with DAB RBAC')
+        objects_by_model[obj._meta.model].append(obj)
+
+    results = {}
+    for model_cls, model_objs in objects_by_model.items():
+        full_codenames = {codename: validate_codename_for_model(codename, model_cls) for codename in codenames}
+        super_codenames = set(full_codename for full_codename in full_codenames.values() if has_super_permission(self, full_codename))
+        needed_codenames = set(full_codenames.values()) - super_codenames
+
+        if not needed_codenames:
+            has_perms = set()
+        elif settings.ANSIBLE_BASE_CACHE_OBJECT_PERMISSIONS:
+            obj_perms = get_object_permissions(self, model_cls)
+            has_perms = set((obj.pk, full_codename) for obj in model_objs for full_codename in obj_perms.get(obj.pk, ()))
+        else:
+            has_perms = get_evaluation_model(model_cls).has_obj_perms_bulk(self, model_cls, [obj.pk for obj in model_objs], needed_codenames)
+
+        for obj in model_objs:
+            results[obj] = {
+                codename: bool(full_codename in super_codenames or (obj.pk, full_codename) in has_perms) for codename, full_codename in full_codenames.items()
+            }
+    return results
+
+
 def connect_rbac_methods(cls):
     cls.add_to_class('access_qs', AccessibleObjectsDescriptor(cls))
     cls.add_to_class('access_ids_qs', AccessibleIdsDescriptor(cls))
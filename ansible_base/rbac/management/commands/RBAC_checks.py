@@ -3,7 +3,8 @@ from collections import defaultdict
 from django.core.management.base import BaseCommand, CommandError
 
 from ansible_base.rbac import permission_registry
-from ansible_base.rbac.models import ObjectRole, RoleDefinition
+from ansible_base.rbac.caching import get_all_team_ancestors
+from ansible_base.rbac.models import ObjectRole, RoleDefinition, TeamAncestor
 
 
 class Command(BaseCommand):
@@ -56,10 +57,25 @@ class Command(BaseCommand):
             if not role.content_object:
                 self.stdout.write(self.style.WARNING(f'Object role {role} has been orphaned, indicating that post_delete signals are broken'))
 
+    def check_team_ancestors(self):
+        self.stdout.write('  checking for up-to-date team ancestors')
+        expected = set()
+        for team_id, ancestors in get_all_team_ancestors().items():
+            for ancestor_id, depth in ancestors.items():
+                expected.add((team_id, ancestor_id, depth))
+        existing = set(TeamAncestor.objects.values_list('team_id', 'ancestor_id', 'depth'))
+        for team_id, ancestor_id, depth in existing - expected:
+            self.stdout.write(self.style.WARNING(f'Team {team_id} has an extra or incorrect ancestor entry for team {ancestor_id} with depth {depth}'))
+            self.has_issues = True
+        for team_id, ancestor_id, depth in expected - existing:
+            self.stdout.write(self.style.WARNING(f'Team {team_id} is missing ancestor entry for team {ancestor_id} with depth {depth}'))
+            self.has_issues = True
+
     def handle(self, *args, **options):
         self.has_issues = False
         self.check_role_definitions()
         self.check_object_roles()
+        self.check_team_ancestors()
         if not self.has_issues:
             self.stdout.write(self.style.SUCCESS('No issues were found'))
         else:
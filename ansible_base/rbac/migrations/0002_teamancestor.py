@@ -0,0 +1,42 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.ANSIBLE_BASE_TEAM_MODEL),
+        ('dab_rbac', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamAncestor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(help_text='Number of team-to-team memberships between the team and the ancestor, 1 for direct parents')),
+                ('ancestor', models.ForeignKey(
+                    help_text='A team whose members obtain membership to the team, directly or indirectly',
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='descendant_entries',
+                    to=settings.ANSIBLE_BASE_TEAM_MODEL
+                )),
+                ('team', models.ForeignKey(
+                    help_text='The team whose members are given membership through the ancestor team',
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='ancestor_entries',
+                    to=settings.ANSIBLE_BASE_TEAM_MODEL
+                )),
+            ],
+            options={
+                'verbose_name_plural': 'team_ancestors',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='teamancestor',
+            constraint=models.UniqueConstraint(fields=('team', 'ancestor'), name='one_entry_per_team_and_ancestor'),
+        ),
+    ]
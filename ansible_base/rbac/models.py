@@ -19,7 +19,7 @@ from rest_framework.exceptions import ValidationError
 from ansible_base.lib.abstract_models.common import CommonModel, ImmutableCommonModel
 
 # ansible_base RBAC logic imports
-from ansible_base.lib.utils.models import is_add_perm
+from ansible_base.lib.utils.models import current_user_or_system_user, is_add_perm
 from ansible_base.rbac.permission_registry import permission_registry
 from ansible_base.rbac.prefetch import TypesPrefetch
 from ansible_base.rbac.validators import validate_assignment, validate_permissions_for_model
@@ -208,14 +208,15 @@ class RoleDefinition(CommonModel):
                 assignment.delete()
 
         # Clear any cached permissions
+        from ansible_base.rbac.evaluations import bound_singleton_permissions, bump_rbac_version
+
+        bump_rbac_version()
         if actor._meta.model_name == 'user':
             if hasattr(actor, '_singleton_permissions'):
                 delattr(actor, '_singleton_permissions')
         else:
             # when team permissions change, users in memory may be affected by this
             # but there is no way to know what users, so we use a global flag
-            from ansible_base.rbac.evaluations import bound_singleton_permissions
-
             bound_singleton_permissions._team_clear_signal = True
 
         return assignment
@@ -261,9 +262,9 @@ class RoleDefinition(CommonModel):
                 return  # nothing to do
             object_role, created = self.get_or_create_object_role(**kwargs)
 
-        from ansible_base.rbac.triggers import needed_updates_on_assignment, update_after_assignment
+        from ansible_base.rbac.triggers import changes_membership, needed_updates_on_assignment, update_after_assignment
 
-        update_teams, to_update = needed_updates_on_assignment(self, actor, object_role, created=created, giving=True)
+        update_team_ids, to_update = needed_updates_on_assignment(self, actor, object_role, created=created, giving=True)
 
         assignment = None
         if actor._meta.model_name == 'user':
@@ -282,7 +283,7 @@ class RoleDefinition(CommonModel):
                 to_update.remove(object_role)
             object_role.delete()
 
-        update_after_assignment(update_teams, to_update)
+        update_after_assignment(update_team_ids, to_update, membership_changed=changes_membership(self))
 
         if not sync_action and self.name in permission_registry._trackers:
             tracker = permission_registry._trackers[self.name]
@@ -291,6 +292,89 @@ class RoleDefinition(CommonModel):
 
         return assignment
 
+    def give_permission_bulk(self, actors: Iterable[models.Model], content_objects: Iterable[models.Model]) -> list:
+        """
+        Gives every user or team in actors the permissions of this role to every object in content_objects
+        This creates object roles and assignments with bulk_create, and then
+        does a single update of the cached RBAC data, instead of an update for every assignment.
+        Returns the assignments for all the given actors and objects, including ones that already existed
+        """
+        from ansible_base.rbac.caching import get_team_ids_for_object_roles
+        from ansible_base.rbac.triggers import changes_membership, update_after_assignment
+
+        actors = list(actors)
+        content_objects = list(content_objects)
+        if not (actors and content_objects):
+            return []
+        for obj in content_objects:
+            for actor in actors:
+                validate_assignment(self, actor, obj)
+        users = [actor for actor in actors if actor._meta.model_name == 'user']
+        teams = [actor for actor in actors if isinstance(actor, permission_registry.team_model)]
+
+        has_team_perm = self.permissions.filter(codename=permission_registry.team_permission).exists()
+        if teams:
+            from ansible_base.rbac.validators import validate_team_assignment_enabled
+
+            has_org_member = self.permissions.filter(codename='member_organization').exists()
+            validate_team_assignment_enabled(self.content_type, has_team_perm=has_team_perm, has_org_member=has_org_member)
+
+        created_by = current_user_or_system_user()
+        # sanitize the object_id to its database version, practically, remove "-" chars from uuids
+        object_ids = set(str(obj._meta.pk.get_db_prep_value(obj.pk, connection)) for obj in content_objects)
+        role_qs = ObjectRole.objects.filter(role_definition=self, content_type=self.content_type, object_id__in=object_ids)
+
+        with transaction.atomic():
+            existing_ids = set(role_qs.values_list('object_id', flat=True))
+            new_roles = [ObjectRole(role_definition=self, content_type=self.content_type, object_id=object_id) for object_id in object_ids - existing_ids]
+            # conflicts are possible from other transactions creating the same object role
+            ObjectRole.objects.bulk_create(new_roles, ignore_conflicts=True)
+            object_roles = list(role_qs)
+            created_roles = set(object_role for object_role in object_roles if object_role.object_id not in existing_ids)
+
+            assignments = []
+            for assignment_cls, actor_field, actor_list in ((RoleUserAssignment, 'user', users), (RoleTeamAssignment, 'team', teams)):
+                if not actor_list:
+                    continue
+                assignment_qs = assignment_cls.objects.filter(object_role__in=object_roles, **{f'{actor_field}__in': actor_list})
+                existing_pairs = set(assignment_qs.values_list(f'{actor_field}_id', 'object_role_id'))
+                new_assignments = [
+                    assignment_cls(
+                        object_role=object_role,
+                        role_definition=self,
+                        content_type_id=object_role.content_type_id,
+                        object_id=object_role.object_id,
+                        created_by=created_by,
+                        **{actor_field: actor},
+                    )
+                    for object_role in object_roles
+                    for actor in actor_list
+                    if (actor.pk, object_role.pk) not in existing_pairs
+                ]
+                assignment_cls.objects.bulk_create(new_assignments, ignore_conflicts=True)
+                assignments.extend(assignment_qs)
+
+            # Same logic as needed_updates_on_assignment, combined for all the assignments
+            to_update = set(created_roles)
+            update_team_ids = set()
+            if teams:
+                # members of the teams given the role get new permissions
+                to_update.update(ObjectRole.objects.filter(provides_teams__in=teams))
+            if has_team_perm and (created_roles or teams):
+                # roles assigned to teams that these roles give membership to, see ObjectRole.descendent_roles
+                to_update.update(ObjectRole.objects.filter(teams__member_roles__in=object_roles))
+                update_team_ids = get_team_ids_for_object_roles(object_roles)
+            update_after_assignment(update_team_ids, to_update, membership_changed=changes_membership(self))
+
+        if self.name in permission_registry._trackers:
+            tracker = permission_registry._trackers[self.name]
+            with tracker.sync_active():
+                for obj in content_objects:
+                    for actor in actors:
+                        tracker.sync_relationship(actor, obj, giving=True)
+
+        return assignments
+
     @classmethod
     def user_global_permissions(cls, user, permission_qs=None):
         """Evaluation method only for global permissions from global roles
@@ -337,7 +421,7 @@ class ObjectRoleFields(models.Model):
     @classmethod
     def _visible_items(cls, eval_cls, user, qs=None):
         permission_qs = eval_cls.objects.filter(
-            role__in=user.has_roles.all(),
+            role__in=get_role_ids(user),
             content_type_id=models.OuterRef('content_type_id'),
         )
         # NOTE: type casting is necessary in postgres but not sqlite3
@@ -506,11 +590,9 @@ class ObjectRole(ObjectRoleFields):
 
     def descendent_roles(self):
         "Returns a set of roles that you implicitly have if you have this role"
-        descendents = set()
-        for target_team in self.provides_teams.all():
-            # the roles that offer these permissions could change as a result of adding teams
-            descendents.update(set(target_team.has_roles.all()))
-        return descendents
+        # provides_teams already includes teams-of-teams, and
+        # the roles that offer these permissions could change as a result of adding teams
+        return set(ObjectRole.objects.filter(teams__in=self.provides_teams.all()))
 
     def expected_direct_permissions(self, types_prefetch=None):
         expected_evaluations = set()
@@ -660,7 +742,7 @@ class RoleEvaluationFields(models.Model):
         """
         # We only have a content_types exception for multiple content types for polymorphic models
         # for normal models you should not need it, but AWX unified_ models need it to get by
-        filter_kwargs = dict(role__in=actor.has_roles.all(), codename=codename)
+        filter_kwargs = dict(role__in=get_role_ids(actor), codename=codename)
         if content_types:
             filter_kwargs['content_type_id__in'] = content_types
         else:
@@ -683,7 +765,7 @@ class RoleEvaluationFields(models.Model):
         Returns permissions that a user has to obj from object-roles,
         does not consider permissions from user flags or system-wide roles
         """
-        return cls.objects.filter(role__in=user.has_roles.all(), content_type_id=ContentType.objects.get_for_model(obj).id, object_id=obj.id).values_list(
+        return cls.objects.filter(role__in=get_role_ids(user), content_type_id=ContentType.objects.get_for_model(obj).id, object_id=obj.id).values_list(
             'codename', flat=True
         )
 
@@ -694,9 +776,23 @@ class RoleEvaluationFields(models.Model):
         method on permission classes, but it is named differently to avoid unintentionally conflicting
         """
         return cls.objects.filter(
-            role__in=user.has_roles.all(), content_type_id=ContentType.objects.get_for_model(obj).id, object_id=obj.pk, codename=codename
+            role__in=get_role_ids(user), content_type_id=ContentType.objects.get_for_model(obj).id, object_id=obj.pk, codename=codename
         ).exists()
 
+    @classmethod
+    def has_obj_perms_bulk(cls, user, model_cls, object_ids: Iterable, codenames: Iterable[str]) -> set[tuple]:
+        """
+        Bulk version of has_obj_perm, for many objects of the same type and many permissions
+        returns the (object_id, codename) pairs that the user has, using a single query
+        """
+        return set(
+            cls.objects.filter(
+                role__in=get_role_ids(user), content_type_id=ContentType.objects.get_for_model(model_cls).id, object_id__in=object_ids, codename__in=codenames
+            )
+            .values_list('object_id', 'codename')
+            .distinct()
+        )
+
 
 class RoleEvaluation(RoleEvaluationFields):
     class Meta(RoleEvaluationMeta):
@@ -726,6 +822,60 @@ class RoleEvaluationUUID(RoleEvaluationFields):
     object_id = models.UUIDField(null=False)
 
 
+# COMPUTED DATA
+class TeamAncestor(models.Model):
+    """
+    Transitive closure of the teams-of-teams graph
+    example:
+        Team 12 has ancestor team 7 with depth 2
+    means members of team 7 are members of some team which gives membership to team 12
+
+    This is maintained by compute_team_member_roles() along with ObjectRole.provides_teams
+      you should not interact with this table yourself
+    A team can be its own ancestor if there is a loop in the graph.
+    """
+
+    class Meta:
+        app_label = 'dab_rbac'
+        verbose_name_plural = _('team_ancestors')
+        constraints = [models.UniqueConstraint(name='one_entry_per_team_and_ancestor', fields=['team', 'ancestor'])]
+
+    team = models.ForeignKey(
+        settings.ANSIBLE_BASE_TEAM_MODEL,
+        on_delete=models.CASCADE,
+        related_name='ancestor_entries',
+        help_text=_("The team whose members are given membership through the ancestor team"),
+    )
+    ancestor = models.ForeignKey(
+        settings.ANSIBLE_BASE_TEAM_MODEL,
+        on_delete=models.CASCADE,
+        related_name='descendant_entries',
+        help_text=_("A team whose members obtain membership to the team, directly or indirectly"),
+    )
+    depth = models.PositiveIntegerField(help_text=_("Number of team-to-team memberships between the team and the ancestor, 1 for direct parents"))
+
+    def __str__(self):
+        return f'TeamAncestor(team_id={self.team_id}, ancestor_id={self.ancestor_id}, depth={self.depth})'
+
+    def save(self, *args, **kwargs):
+        if self.id:
+            raise RuntimeError(f'{self._meta.model_name} model is immutable and only used internally')
+        return super().save(*args, **kwargs)
+
+
+def get_role_ids(actor) -> QuerySet:
+    """
+    Returns ids of object roles assigned to a user or team, for use as a subquery in evaluations
+    This is the same as actor.has_roles.all(), but only uses the assignment table,
+    which has a unique index on (actor, object_role), and does not join the ObjectRole table.
+    Roles from team membership do not need to be included, because RoleEvaluation entries
+    of the roles which give membership already include the permissions of the team.
+    """
+    if isinstance(actor, permission_registry.team_model):
+        return RoleTeamAssignment.objects.filter(team=actor).values('object_role_id')
+    return RoleUserAssignment.objects.filter(user=actor).values('object_role_id')
+
+
 def get_evaluation_model(cls):
     pk_field = cls._meta.pk
     # For proxy models, including django-polymorphic, use the id field from parent table
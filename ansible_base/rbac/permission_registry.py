@@ -144,7 +144,7 @@ class PermissionRegistry:
 
     def call_when_apps_ready(self, apps, app_config):
         from ansible_base.rbac import triggers
-        from ansible_base.rbac.evaluations import bound_has_obj_perm, bound_singleton_permissions, connect_rbac_methods
+        from ansible_base.rbac.evaluations import bound_has_obj_perm, bound_has_obj_perms_bulk, bound_singleton_permissions, connect_rbac_methods
         from ansible_base.rbac.management import create_dab_permissions
 
         self.apps = apps
@@ -166,6 +166,7 @@ class PermissionRegistry:
         )
 
         self.user_model.add_to_class('has_obj_perm', bound_has_obj_perm)
+        self.user_model.add_to_class('has_obj_perms_bulk', bound_has_obj_perms_bulk)
         self.user_model.add_to_class('singleton_permissions', bound_singleton_permissions)
         post_delete.connect(triggers.rbac_post_user_delete, sender=self.user_model, dispatch_uid='permission-registry-user-delete')
 
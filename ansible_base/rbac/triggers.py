@@ -1,15 +1,18 @@
 import logging
+import threading
 from contextlib import contextmanager
 from typing import Optional, Union
 from uuid import UUID
 
+from django.db import transaction
 from django.db.models import Model, Q
 from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
 from django.db.utils import ProgrammingError
 from django.dispatch import Signal
 
-from ansible_base.rbac.caching import compute_object_role_permissions, compute_team_member_roles
-from ansible_base.rbac.models import ObjectRole, RoleDefinition, RoleEvaluation, get_evaluation_model
+from ansible_base.rbac.caching import compute_object_role_permissions, compute_team_member_roles, get_team_ids_for_object_roles
+from ansible_base.rbac.evaluations import bump_rbac_version, clear_object_permissions_cache
+from ansible_base.rbac.models import ObjectRole, RoleDefinition, get_evaluation_model
 from ansible_base.rbac.permission_registry import permission_registry
 from ansible_base.rbac.validators import validate_team_assignment_enabled
 
@@ -28,12 +31,11 @@ dab_post_migrate = Signal()
 
 def team_ancestor_roles(team):
     """
-    Return a queryset of all roles that directly or indirectly grant any form of permission to a team.
+    Return a set of all roles that directly or indirectly grant any form of permission to a team.
     This is generally used when invalidating a team membership for one reason or another.
-    This assumes that teams and all team parent models have integer primary keys.
+    The ObjectRole.provides_teams relationship already accounts for teams-of-teams.
     """
-    permission_kwargs = dict(codename=permission_registry.team_permission, object_id=team.id, content_type_id=permission_registry.team_ct_id)
-    return set(ObjectRole.objects.filter(permission_partials__in=RoleEvaluation.objects.filter(**permission_kwargs)))
+    return set(ObjectRole.objects.filter(provides_teams=team))
 
 
 def needed_updates_on_assignment(role_definition, actor, object_role, created=False, giving=True):
@@ -41,7 +43,7 @@ def needed_updates_on_assignment(role_definition, actor, object_role, created=Fa
     If a user or a team is granted a role or has a role revoked,
     then this returns instructions for what needs to be updated
     returns tuple
-        (bool: should update team owners, set: object roles to update)
+        (set: ids of teams to update team owners for, set: object roles to update)
     """
     # we maintain a list of object roles that we need to update evaluations for
     to_update = set()
@@ -78,22 +80,96 @@ def needed_updates_on_assignment(role_definition, actor, object_role, created=Fa
         to_update.update(object_role.descendent_roles())
 
     # actions which can change the team parentage structure
-    recompute_teams = bool(has_team_perm and (created or deleted or changes_team_owners))
+    recompute_team_ids = set()
+    if has_team_perm and (created or deleted or changes_team_owners):
+        # only the teams this role gives membership to (and their child teams) can be affected
+        recompute_team_ids = get_team_ids_for_object_roles([object_role])
 
-    return (recompute_teams, to_update)
+    return (recompute_team_ids, to_update)
 
 
-def update_after_assignment(update_teams, to_update):
-    "Call this with the output of needed_updates_on_assignment"
-    if update_teams:
-        compute_team_member_roles()
+def changes_membership(role_definition) -> bool:
+    """
+    Returns True if assignments of the role definition change what teams or organizations the actor is a member of.
+    Users get the global roles of their teams, so any such assignment changes global permissions.
+    """
+    return role_definition.permissions.filter(codename__in=(permission_registry.team_permission, 'member_organization')).exists()
+
+
+class DeferredUpdates(threading.local):
+    "Updates queued by update_after_assignment while inside of the deferred_rbac_updates context manager"
+
+    def __init__(self):
+        self.active = False
+        self.team_ids = set()
+        self.object_roles = set()
+        self.changes_membership = False
+
+
+deferred_updates = DeferredUpdates()
+
+
+@contextmanager
+def deferred_rbac_updates():
+    """
+    Use this when giving or removing many permissions at once, like
+        with deferred_rbac_updates():
+            for user in users:
+                rd.give_permission(user, organization)
+    Instead of recomputing after every assignment, updates are combined and done once on exit.
+    This runs in a transaction, so that other requests never see assignments without their evaluations.
+    Permission evaluations made inside of the block may not reflect changes made inside of the block.
+    """
+    if deferred_updates.active:
+        yield  # nested usage, the outer context manager will run the updates
+        return
+
+    deferred_updates.active = True
+    try:
+        with transaction.atomic():
+            yield
+            update_team_ids, to_update = deferred_updates.team_ids, deferred_updates.object_roles
+            membership_changed = deferred_updates.changes_membership
+            deferred_updates.active = False
+            # object roles may have been deleted after they were queued, because they became unused
+            to_update = set(ObjectRole.objects.filter(pk__in=[object_role.pk for object_role in to_update]))
+            logger.debug(f'Running deferred RBAC updates for {len(update_team_ids)} teams and {len(to_update)} object roles')
+            update_after_assignment(update_team_ids, to_update, membership_changed=membership_changed)
+    finally:
+        deferred_updates.active = False
+        deferred_updates.team_ids = set()
+        deferred_updates.object_roles = set()
+        deferred_updates.changes_membership = False
+
+
+def update_after_assignment(update_team_ids, to_update, membership_changed=False):
+    """
+    Call this with the output of needed_updates_on_assignment
+    membership_changed should be True if a team or organization member role was given or removed,
+    as found by changes_membership, even if no team ids need to be recomputed
+    """
+    if deferred_updates.active:
+        deferred_updates.team_ids.update(update_team_ids)
+        deferred_updates.object_roles.update(to_update)
+        deferred_updates.changes_membership |= membership_changed
+        return
+
+    if update_team_ids:
+        compute_team_member_roles(team_ids=update_team_ids)
+    if update_team_ids or membership_changed:
+        # team membership changed, so users may have new global roles through the teams
+        bump_rbac_version()
 
     compute_object_role_permissions(object_roles=to_update)
+    # the assignment itself changes permissions of the actor, even if no evaluations changed
+    clear_object_permissions_cache()
 
 
 def permissions_changed(instance, action, model, pk_set, reverse, **kwargs):
     if action.startswith('pre_'):
         return
+    # global roles are not cached in RoleEvaluation, the version makes users reload global permissions
+    bump_rbac_version()
     to_recompute = set(ObjectRole.objects.filter(role_definition=instance).prefetch_related('teams__member_roles'))
     if not to_recompute:
         return
@@ -102,9 +178,10 @@ def permissions_changed(instance, action, model, pk_set, reverse, **kwargs):
 
     if action in ('post_add', 'post_remove'):
         if permission_registry.permission_qs.filter(codename=permission_registry.team_permission, pk__in=pk_set).exists():
+            affected_team_ids = get_team_ids_for_object_roles(to_recompute)
             for object_role in to_recompute.copy():
                 to_recompute.update(object_role.descendent_roles())
-            compute_team_member_roles()
+            compute_team_member_roles(team_ids=affected_team_ids)
         # All team member roles that give this permission through this role need to be updated
         for role in to_recompute.copy():
             for team in role.teams.all():
@@ -116,6 +193,7 @@ def permissions_changed(instance, action, model, pk_set, reverse, **kwargs):
         compute_team_member_roles()
         to_recompute = None  # all
     compute_object_role_permissions(object_roles=to_recompute)
+    clear_object_permissions_cache()
 
 
 m2m_changed.connect(permissions_changed, sender=RoleDefinition.permissions.through)
@@ -186,10 +264,11 @@ def post_save_update_obj_permissions(instance):
     # If the actual object changed (created or modified) was a team, any org role
     # that has member_team needs to be updated, and any parent teams that have that role
     if instance._meta.model_name == permission_registry.team_model._meta.model_name:
-        compute_team_member_roles()
+        compute_team_member_roles(team_ids=[instance.pk])
 
     if to_update:
         compute_object_role_permissions(object_roles=to_update)
+    clear_object_permissions_cache()
 
 
 def rbac_pre_save_identify_changes(instance, *args, **kwargs):
@@ -246,12 +325,17 @@ def rbac_post_delete_remove_object_roles(instance, *args, **kwargs):
     Deleting a team can have consequences for the rest of the graph
     """
     if instance._meta.model_name == permission_registry.team_model._meta.model_name:
-        indirectly_affected_roles = set()
-        indirectly_affected_roles.update(team_ancestor_roles(instance))
+        # the provides_teams entries for the team are already deleted, so use the stashed roles
+        indirectly_affected_roles = set(instance.__rbac_stashed_member_roles)
         for team_role in instance.__rbac_stashed_member_roles:
             indirectly_affected_roles.update(team_role.descendent_roles())
-        compute_team_member_roles()
+        # Teams that the deleted team gave membership to will share some of its member roles
+        affected_team_ids = set(
+            permission_registry.team_model.objects.filter(member_roles__in=instance.__rbac_stashed_member_roles).values_list('id', flat=True)
+        )
+        compute_team_member_roles(team_ids=affected_team_ids)
         compute_object_role_permissions(object_roles=indirectly_affected_roles)
+        bump_rbac_version()
 
         # Similar to user deletion, clean up any orphaned object roles
         ObjectRole.objects.filter(users__isnull=True, teams__isnull=True).delete()
@@ -264,6 +348,8 @@ def rbac_post_delete_remove_object_roles(instance, *args, **kwargs):
         # Delete all evaluations from inherited permissions
         get_evaluation_model(instance).objects.filter(content_type_id=ct.id, object_id=instance.pk).delete()
 
+    clear_object_permissions_cache()
+
 
 def rbac_post_user_delete(instance, *args, **kwargs):
     """
@@ -272,6 +358,19 @@ def rbac_post_user_delete(instance, *args, **kwargs):
     # Any RoleUserAssignment entries will already be cascade deleted
     # Just clean up any object roles that may be orphaned by this deletion
     ObjectRole.objects.filter(users__isnull=True, teams__isnull=True).delete()
+    bump_rbac_version()
+
+
+def rbac_post_role_definition_delete(instance, *args, **kwargs):
+    """
+    Assignments of a role definition are cascade deleted along with it,
+    this includes global assignments which are not tracked in the RoleEvaluation table
+    """
+    bump_rbac_version()
+    clear_object_permissions_cache()
+
+
+post_delete.connect(rbac_post_role_definition_delete, sender=RoleDefinition, dispatch_uid='role-definition-post-delete')
 
 
 def post_migration_rbac_setup(sender, *args, **kwargs):
@@ -285,6 +384,7 @@ def post_migration_rbac_setup(sender, *args, **kwargs):
 
     compute_team_member_roles()
     compute_object_role_permissions()
+    clear_object_permissions_cache()
 
 
 class TrackedRelationship:
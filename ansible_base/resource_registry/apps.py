@@ -122,6 +122,7 @@ def connect_resource_signals(sender, **kwargs):
             signals.post_delete.connect(handlers.remove_resource, sender=cls)
 
             if _should_reverse_sync():
+                signals.post_init.connect(handlers.reverse_sync_post_init, sender=cls)
                 signals.pre_save.connect(handlers.decide_to_sync_update, sender=cls)
                 signals.post_save.connect(handlers.sync_to_resource_server_post_save, sender=cls)
                 signals.pre_delete.connect(handlers.sync_to_resource_server_pre_delete, sender=cls)
@@ -155,6 +156,7 @@ def disconnect_resource_signals(sender, **kwargs):
             signals.post_save.disconnect(handlers.update_resource, sender=cls)
             signals.post_delete.disconnect(handlers.remove_resource, sender=cls)
 
+            signals.post_init.disconnect(handlers.reverse_sync_post_init, sender=cls)
             signals.pre_save.disconnect(handlers.decide_to_sync_update, sender=cls)
             signals.post_save.disconnect(handlers.sync_to_resource_server_post_save, sender=cls)
             signals.pre_delete.disconnect(handlers.sync_to_resource_server_pre_delete, sender=cls)
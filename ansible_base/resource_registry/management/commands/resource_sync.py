@@ -21,6 +21,9 @@ Optional parameters::
     `--retrysleep seconds` to set interval between retries
     `--retain_seconds` to set how much seconds to retain deleted resources
     `--asyncio` Flag to enable asyncio executor
+    `--bulk_size number` to set how many resources to fetch in each request, 0 to fetch one by one
+    `--workers number` to fetch resources with a pool of worker threads
+    `--delta` to only sync the changes since the last sync
 """
 
 from django.core.management.base import BaseCommand, CommandError
@@ -70,10 +73,30 @@ class Command(BaseCommand):  # pragma: no cover
             required=False,
         )
         parser.add_argument("--asyncio", action="store_true", default=False, help="Enable asyncio executor")
+        parser.add_argument(
+            "--bulk_size",
+            type=int,
+            default=200,
+            help="Number of resources to fetch from RESOURCE_SERVER in each request, 0 to fetch them one by one",
+            required=False,
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of threads fetching resources from RESOURCE_SERVER, database writes are still done by the main thread",
+            required=False,
+        )
+        parser.add_argument(
+            "--delta",
+            action="store_true",
+            default=False,
+            help="Only sync resources changed or deleted since the last sync, the first sync of each resource type is a full sync",
+        )
 
     def handle(self, *args, **options):
         """Handle RESOURCE_PROVIDER sync"""
-        arguments = ["resource_type_names", "retries", "retrysleep", "retain_seconds", "asyncio"]
+        arguments = ["resource_type_names", "retries", "retrysleep", "retain_seconds", "asyncio", "bulk_size", "workers", "delta"]
         options = {k: v for k, v in options.items() if k in arguments}
         try:
             executor = SyncExecutor(**options, stdout=self.stdout)
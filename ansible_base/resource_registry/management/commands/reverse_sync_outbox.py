@@ -0,0 +1,50 @@
+"""
+Command to send the local changes of shared resources in the outbox to the resource server.
+
+The outbox is used when the RESOURCE_SERVER_SYNC_OUTBOX setting is enabled.
+
+Usage::
+
+    django-admin reverse_sync_outbox  # send the entries that are ready and exit
+    django-admin reverse_sync_outbox --interval 5  # keep running, checking for entries every 5 seconds
+    django-admin reverse_sync_outbox --show-failed  # list the entries that were set aside as failed
+    django-admin reverse_sync_outbox --retry-failed  # send the failed entries again, after fixing the cause
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ansible_base.resource_registry.models import ReverseSyncEntry
+from ansible_base.resource_registry.tasks.reverse_sync import process_reverse_sync_outbox
+
+
+class Command(BaseCommand):
+    help = "Send the local changes of shared resources in the outbox to the resource server."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Number of entries to send in each transaction")
+        parser.add_argument("--interval", type=float, default=None, help="Keep running, and check for entries every INTERVAL seconds")
+        parser.add_argument("--show-failed", action="store_true", help="List the entries that were set aside as failed, and exit")
+        parser.add_argument("--retry-failed", action="store_true", help="Send the entries that were set aside as failed again")
+
+    def handle(self, *args, **options):
+        batch_size = options.get("batch_size") or 100
+        interval = options.get("interval")
+        if options.get("show_failed"):
+            for entry in ReverseSyncEntry.objects.filter(failed=True):
+                self.stdout.write(f"{entry.pk} | {entry} | {entry.created} | Attempts {entry.attempts} | {entry.last_error}")
+            return
+        if options.get("retry_failed"):
+            retried = ReverseSyncEntry.objects.filter(failed=True).update(failed=False, attempts=0, next_attempt=timezone.now())
+            self.stdout.write(f"Retrying {retried} failed entries")
+        while True:
+            counts = process_reverse_sync_outbox(batch_size=batch_size)
+            if counts['sent'] or counts['failed'] or not interval:
+                pending = ReverseSyncEntry.objects.filter(failed=False).count()
+                failed = ReverseSyncEntry.objects.filter(failed=True).count()
+                self.stdout.write(f"Sent {counts['sent']} | Failed {counts['failed']} | Pending {pending} | Set aside {failed}")
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,55 @@
+"""
+Command to compute the stored hashes of shared resources, which are used for the manifest.
+
+Hashes are kept up to date when resources are saved, and missing hashes are computed
+when the manifest is requested, so this is only needed to fill in hashes after upgrading,
+or after data was changed without sending Django signals, like with queryset.update()
+
+Usage::
+
+    django-admin update_resource_hashes  # fill in missing hashes of all shared resources
+    django-admin update_resource_hashes user team  # only shared.user and shared.team
+    django-admin update_resource_hashes --all  # recompute existing hashes as well
+"""
+
+from django.core.management.base import BaseCommand
+
+from ansible_base.resource_registry.management.commands.resource_sync import valid_resource_type
+from ansible_base.resource_registry.models import Resource
+from ansible_base.resource_registry.tasks.sync import get_resource_type_names
+
+
+class Command(BaseCommand):
+    help = "Compute and store the hashes of shared resources used by the resource manifest."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "resource_type_names",
+            nargs="*",
+            type=valid_resource_type,
+            help="Optional, one or more names e.g: `shared.user` or `shared.user shared.organization`",
+        )
+        parser.add_argument("--all", action="store_true", default=False, help="Recompute hashes that are already stored")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Number of resources to update in each query")
+
+    def handle(self, *args, **options):
+        batch_size = options.get("batch_size") or 1000
+        for resource_type_name in options.get("resource_type_names") or get_resource_type_names():
+            resources = Resource.objects.filter(content_type__resource_type__name=resource_type_name).order_by("pk")
+            if not options.get("all"):
+                resources = resources.filter(resource_hash__isnull=True)
+
+            updated = 0
+            batch = []
+            for resource in resources.prefetch_related("content_object").iterator(chunk_size=batch_size):
+                resource_hash = resource.get_content_hash()
+                if resource.resource_hash != resource_hash:
+                    resource.resource_hash = resource_hash
+                    batch.append(resource)
+                if len(batch) >= batch_size:
+                    updated += Resource.objects.bulk_update(batch, ["resource_hash"])
+                    batch = []
+            if batch:
+                updated += Resource.objects.bulk_update(batch, ["resource_hash"])
+
+            self.stdout.write(f"Updated {updated} hashes for {resource_type_name}")
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dab_resource_registry', '0005_resource_is_partially_migrated_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='resource_hash',
+            field=models.CharField(default=None, help_text='SHA256 hash of the shared data of the resource, null if it needs to be computed.', max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.16 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('dab_resource_registry', '0006_resource_resource_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, help_text='Last time the resource or its shared data changed, used for the changes since a point in time in the manifest.'),
+        ),
+        migrations.CreateModel(
+            name='ResourceDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ansible_id', models.UUIDField(db_index=True)),
+                ('service_id', models.UUIDField(help_text='ID of the service that was responsible for managing the resource.')),
+                ('deleted', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resource_deletions', to='contenttypes.contenttype')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResourceSyncCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('service_id', models.UUIDField(help_text='ID of the service the resources were synced from.')),
+                ('cursor', models.CharField(max_length=64)),
+                ('modified', models.DateTimeField(auto_now=True)),
+                ('resource_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_cursors', to='dab_resource_registry.resourcetype')),
+            ],
+            options={
+                'unique_together': {('resource_type', 'service_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-18 05:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('dab_resource_registry', '0007_resource_modified_resourcedeletion_resourcesynccursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReverseSyncEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.TextField()),
+                ('ansible_id', models.UUIDField(help_text='The ansible_id of the resource, updated if the resource server gives the resource another ansible_id.')),
+                ('action', models.CharField(choices=[('create', 'create'), ('update', 'update'), ('delete', 'delete')], max_length=16)),
+                ('resource_type', models.CharField(max_length=256)),
+                ('resource_data', models.JSONField(default=dict, help_text='The shared data of the resource at the time of the change.')),
+                ('jwt_user_id', models.CharField(default=None, help_text='The ansible_id of the user that made the change.', max_length=64, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+            ],
+            options={
+                'ordering': ['pk'],
+                'indexes': [models.Index(fields=['content_type', 'object_id'], name='dab_resourc_content_74d7be_idx')],
+            },
+        ),
+    ]
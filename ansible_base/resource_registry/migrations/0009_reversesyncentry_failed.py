@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dab_resource_registry', '0008_reversesyncentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reversesyncentry',
+            name='failed',
+            field=models.BooleanField(db_index=True, default=False, help_text='Set when the resource server rejected the change, or it failed too many times. Failed entries are not sent again.'),
+        ),
+    ]
@@ -1,2 +1,3 @@
-from .resource import Resource, ResourceType, init_resource_from_object  # noqa: 401
+from .resource import Resource, ResourceDeletion, ResourceSyncCursor, ResourceType, init_resource_from_object  # noqa: 401
+from .reverse_sync import ReverseSyncEntry  # noqa: 401
 from .service_identifier import service_id  # noqa: 401
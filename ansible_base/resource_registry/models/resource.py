@@ -1,15 +1,23 @@
+import logging
 import uuid
+from datetime import timedelta
 from functools import lru_cache
 from typing import Union
 
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
 from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from rest_framework.serializers import ValidationError
 
+from ansible_base.lib.utils.settings import get_setting
+
 from .service_identifier import service_id
 
+logger = logging.getLogger('ansible_base.resource_registry.models.resource')
+
 
 @lru_cache(maxsize=None)
 def resource_type_cache(content_type_id):
@@ -64,6 +72,20 @@ class Resource(models.Model):
         help_text="This gets set to True when a resource has been copied into the resource server, but the service_id hasn't been updated yet.",
     )
 
+    # hash of the content object serialized by its shared resource type serializer, used for the manifest
+    resource_hash = models.CharField(
+        max_length=64,
+        null=True,
+        default=None,
+        help_text="SHA256 hash of the shared data of the resource, null if it needs to be computed.",
+    )
+
+    modified = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        help_text="Last time the resource or its shared data changed, used for the changes since a point in time in the manifest.",
+    )
+
     def summary_fields(self):
         return {"ansible_id": self.ansible_id, "resource_type": self.resource_type}
 
@@ -83,11 +105,59 @@ class Resource(models.Model):
         """
         name_field = self.content_type.resource_type.get_resource_config().name_field
 
+        update_fields = []
         if hasattr(self.content_object, name_field):
             name = getattr(self.content_object, name_field)[:512]
             if self.name != name:
                 self.name = name
-                self.save()
+                update_fields.append('name')
+
+        resource_hash = self.get_content_hash()
+        if self.resource_hash != resource_hash:
+            self.resource_hash = resource_hash
+            update_fields.append('resource_hash')
+
+        if update_fields:
+            self.save(update_fields=update_fields + ['modified'])
+
+    def get_content_hash(self):
+        """
+        Compute the hash of the content_object as it is serialized for sharing with other services,
+        returns None for resource types that are not shared
+        """
+        serializer_class = resource_type_cache(self.content_type_id).serializer_class
+        if serializer_class is None or self.content_object is None:
+            return None
+        try:
+            return serializer_class(self.content_object).get_hash()
+        except Resource.DoesNotExist:
+            # a related resource is missing, the hash will be computed again when it is needed
+            logger.warning(f'Could not compute hash of {self.content_type.model} {self.object_id} because a related resource does not exist')
+            return None
+
+    def clear_dependent_hashes(self):
+        """
+        The shared data of some resource types references other resources by ansible_id,
+        like the organization of a team, so the hashes of the resources referencing this one are cleared when its ansible_id changes.
+        """
+        from ansible_base.resource_registry.registry import get_registry
+
+        resource_type_name = self.content_type.resource_type.name
+        for resource_config in get_registry().get_resources().values():
+            if (serializer_class := resource_config.managed_serializer) is None:
+                continue
+            for field in serializer_class().fields.values():
+                if getattr(field, 'resource_type', None) != resource_type_name:
+                    continue
+                dependent_qs = Resource.objects.filter(content_type=ContentType.objects.get_for_model(resource_config.model))
+                try:
+                    resource_config.model._meta.get_field(field.field_name)
+                except FieldDoesNotExist:
+                    pass  # the value is set by a resource processor, so any resource of the type may reference this one
+                else:
+                    object_ids = resource_config.model.objects.filter(**{field.field_name: self.object_id}).values_list('pk', flat=True)
+                    dependent_qs = dependent_qs.filter(object_id__in=[str(pk) for pk in object_ids])
+                dependent_qs.update(resource_hash=None, modified=timezone.now())
 
     @classmethod
     def get_resource_for_object(cls, obj):
@@ -146,8 +216,9 @@ class Resource(models.Model):
         processor = serializer.get_processor()
 
         with transaction.atomic():
-            if ansible_id:
+            if ansible_id and str(ansible_id) != str(self.ansible_id):
                 self.ansible_id = ansible_id
+                self.clear_dependent_hashes()
             if service_id:
                 self.service_id = service_id
             if is_partially_migrated is not None:
@@ -159,6 +230,51 @@ class Resource(models.Model):
                 content_object.save(resource_data)
 
 
+class ResourceDeletion(models.Model):
+    """
+    Record of a deleted resource, so the manifest of changes since a point in time can list deletions.
+    Records are kept for RESOURCE_DELETION_RETENTION_SECONDS.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name="resource_deletions")
+    ansible_id = models.UUIDField(db_index=True)
+    service_id = models.UUIDField(help_text="ID of the service that was responsible for managing the resource.")
+    deleted = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    @classmethod
+    def retention_cutoff(cls):
+        return timezone.now() - timedelta(seconds=get_setting('RESOURCE_DELETION_RETENTION_SECONDS', 7 * 24 * 60 * 60))
+
+    @classmethod
+    def record(cls, resource):
+        """
+        Record the deletion of a resource
+        """
+        return cls.objects.create(content_type_id=resource.content_type_id, ansible_id=resource.ansible_id, service_id=resource.service_id)
+
+    @classmethod
+    def delete_expired(cls):
+        """
+        Remove records that are past the retention period, this is done when a manifest of changes is requested
+        """
+        cls.objects.filter(deleted__lt=cls.retention_cutoff()).delete()
+
+
+class ResourceSyncCursor(models.Model):
+    """
+    The cursor given by RESOURCE_SERVER in the last complete sync of a resource type,
+    changes made after it are requested in the next sync.
+    """
+
+    resource_type = models.ForeignKey(ResourceType, on_delete=models.CASCADE, related_name="sync_cursors")
+    service_id = models.UUIDField(help_text="ID of the service the resources were synced from.")
+    cursor = models.CharField(max_length=64)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('resource_type', 'service_id')
+
+
 # This is a separate function so that it can work with models from apps in the
 # post migration signal.
 def init_resource_from_object(obj, resource_model=None, resource_type=None, resource_config=None):
@@ -0,0 +1,40 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils import timezone
+
+
+class ReverseSyncEntry(models.Model):
+    """
+    A change of a shared resource in the outbox, waiting to be sent to the resource server.
+    These are written in the same transaction as the change when RESOURCE_SERVER_SYNC_OUTBOX is enabled,
+    and are sent by process_reverse_sync_outbox, oldest first for each object.
+    Entries that can not be sent are kept with failed set, so the later changes of their object can be sent.
+    """
+
+    ACTION_CHOICES = [('create', 'create'), ('update', 'update'), ('delete', 'delete')]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name="+")
+    object_id = models.TextField()
+    ansible_id = models.UUIDField(help_text="The ansible_id of the resource, updated if the resource server gives the resource another ansible_id.")
+    action = models.CharField(max_length=16, choices=ACTION_CHOICES)
+    resource_type = models.CharField(max_length=256)
+    resource_data = models.JSONField(default=dict, help_text="The shared data of the resource at the time of the change.")
+    jwt_user_id = models.CharField(max_length=64, null=True, default=None, help_text="The ansible_id of the user that made the change.")
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now, db_index=True)
+    last_error = models.TextField(blank=True, default='')
+    failed = models.BooleanField(
+        default=False,
+        db_index=True,
+        help_text="Set when the resource server rejected the change, or it failed too many times. Failed entries are not sent again.",
+    )
+
+    class Meta:
+        ordering = ['pk']
+        indexes = [
+            models.Index(fields=["content_type", "object_id"]),
+        ]
+
+    def __str__(self):
+        return f'{self.action} {self.resource_type} {self.ansible_id}'
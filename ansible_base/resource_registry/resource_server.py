@@ -12,10 +12,13 @@ class ResourceServerConfig(TypedDict):
     SECRET_KEY: str
     VALIDATE_HTTPS: bool
     JWT_ALGORITHM: str
+    POOL_SIZE: int
+    RETRIES: int
+    RETRY_BACKOFF: float
 
 
 def get_resource_server_config() -> ResourceServerConfig:
-    defaults = {"JWT_ALGORITHM": "HS256", "VALIDATE_HTTPS": True}
+    defaults = {"JWT_ALGORITHM": "HS256", "VALIDATE_HTTPS": True, "POOL_SIZE": 10, "RETRIES": 0, "RETRY_BACKOFF": 0.5}
     defaults.update(settings.RESOURCE_SERVER)
     return defaults
 
@@ -1,10 +1,15 @@
+import http.cookiejar
 import logging
+import os
+import threading
 import time
 from collections import namedtuple
 from typing import Optional
 
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
 from ansible_base.resource_registry.resource_server import get_resource_server_config, get_service_token
 
@@ -27,10 +32,61 @@ def get_resource_server_client(service_path, **kwargs):
         service_url=config["URL"],
         service_path=service_path,
         verify_https=config["VALIDATE_HTTPS"],
+        session=get_session(pool_size=config["POOL_SIZE"], retries=config["RETRIES"], backoff_factor=config["RETRY_BACKOFF"]),
         **kwargs,
     )
 
 
+_sessions = {}
+_sessions_pid = None
+_sessions_lock = threading.Lock()
+
+
+def get_session(pool_size: int = 10, retries: int = 0, backoff_factor: float = 0.5) -> requests.Session:
+    """
+    Return a requests.Session shared by every client in this process that uses the same options,
+    so that connections to the resource server are kept alive and reused between requests.
+    Clients make requests as different users, so the session does not keep any cookies.
+
+    pool_size (int): number of connections kept open to each host.
+    retries (int): number of times to retry requests that fail to connect or get a 502, 503 or 504 response,
+        only idempotent requests are retried.
+    backoff_factor (float): seconds to wait before retrying, doubled after each retry.
+    """
+    global _sessions_pid
+
+    key = (pool_size, retries, backoff_factor)
+    with _sessions_lock:
+        if _sessions_pid != os.getpid():
+            # Connections can not be shared with the parent of a forked process
+            _sessions.clear()
+            _sessions_pid = os.getpid()
+        if key not in _sessions:
+            session = requests.Session()
+            session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            max_retries = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=(502, 503, 504), raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=max_retries)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+        return _sessions[key]
+
+
+def get_connection_metrics(session: requests.Session) -> dict:
+    """
+    Number of requests made and connections opened by a session, for the hosts it currently has connections to.
+    """
+    metrics = {"requests": 0, "connections": 0}
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for pool_key in pools.keys():
+            pool = pools[pool_key]
+            metrics["requests"] += pool.num_requests
+            metrics["connections"] += pool.num_connections
+    metrics["reused"] = max(metrics["requests"] - metrics["connections"], 0)
+    return metrics
+
+
 class ResourceAPIClient:
     """
     Client for Ansible services to interact with the service-index/ api
@@ -48,6 +104,7 @@ class ResourceAPIClient:
         raise_if_bad_request: bool = False,
         jwt_user_id=None,
         jwt_expiration=60,
+        session: Optional[requests.Session] = None,
     ):
         """
         service_url (str): fully qualified hostname for the service that the client
@@ -59,6 +116,8 @@ class ResourceAPIClient:
             successful status code.
         jwt_user_id (UUID): ansible ID of the user to make the request as.
         jwt_expiration (int): number of seconds that the JWT token is valid.
+        session (requests.Session): session to make requests with, by default
+            the session shared by all clients in the process is used.
         """
         if jwt_user_id is not None:
             jwt_user_id = str(jwt_user_id)
@@ -70,6 +129,11 @@ class ResourceAPIClient:
         self.jwt_expiration = jwt_expiration
         self._jwt = None
         self._jwt_timeout = None
+        self.session = session or get_session()
+
+    @property
+    def connection_metrics(self) -> dict:
+        return get_connection_metrics(self.session)
 
     def refresh_jwt(self):
         # Add a buffer to the token timeout to account for slower requests.
@@ -107,7 +171,7 @@ class ResourceAPIClient:
         if stream:
             kwargs["stream"] = stream
 
-        resp = requests.request(**kwargs)
+        resp = self.session.request(**kwargs)
         logger.debug(f"Response status code from {url}: {resp.status_code}")
 
         if self.raise_if_bad_request:
@@ -138,6 +202,12 @@ class ResourceAPIClient:
     def get_resource(self, ansible_id):
         return self._make_request("get", f"resources/{ansible_id}/")
 
+    def get_resources_bulk(self, ansible_ids: list):
+        """
+        Retrieve many resources in one request, resources that do not exist are not included in the results.
+        """
+        return self._make_request("post", "resources/bulk/", {"ansible_ids": [str(ansible_id) for ansible_id in ansible_ids]})
+
     def get_additional_resource_data(self, ansible_id):
         return self._make_request("get", f"resources/{ansible_id}/additional_data/")
 
@@ -157,5 +227,9 @@ class ResourceAPIClient:
     def list_resource_types(self, filters: Optional[dict] = None):
         return self._make_request("get", "resource-types/", params=filters)
 
-    def get_resource_type_manifest(self, name):
-        return self._make_request("get", f"resource-types/{name}/manifest/", stream=True)
+    def get_resource_type_manifest(self, name, since: Optional[str] = None):
+        """
+        With since, a cursor from the X-Manifest-Cursor header of a previous manifest, only changes after it are listed.
+        """
+        params = {"since": since} if since else None
+        return self._make_request("get", f"resource-types/{name}/manifest/", params=params, stream=True)
@@ -110,6 +110,10 @@ class ResourceSerializer(ResourceListSerializer):
         return None
 
 
+class ResourceBulkRetrieveSerializer(serializers.Serializer):
+    ansible_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=1000)
+
+
 class ResourceTypeSerializer(serializers.ModelSerializer):
     shared_resource_type = serializers.SerializerMethodField()
     url = serializers.SerializerMethodField()
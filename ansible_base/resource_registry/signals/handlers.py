@@ -1,8 +1,12 @@
 import threading
 from contextlib import contextmanager
 from functools import lru_cache
+from typing import Optional
 
-from ansible_base.resource_registry.models import Resource, init_resource_from_object
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import DEFERRED
+
+from ansible_base.resource_registry.models import Resource, ResourceDeletion, init_resource_from_object
 from ansible_base.resource_registry.registry import get_registry
 from ansible_base.resource_registry.utils.sync_to_resource_server import sync_to_resource_server
 
@@ -24,6 +28,7 @@ def remove_resource(sender, instance, **kwargs):
         resource.delete()
     except Resource.DoesNotExist:
         return
+    ResourceDeletion.record(resource)
 
 
 def update_resource(sender, instance, created, **kwargs):
@@ -32,42 +37,84 @@ def update_resource(sender, instance, created, **kwargs):
         resource.update_from_content_object()
     except Resource.DoesNotExist:
         resource = init_resource_from_object(instance)
+        resource.content_object = instance
+        resource.resource_hash = resource.get_content_hash()
         resource.save()
 
 
+@lru_cache(maxsize=None)
+def get_synced_fields(model) -> dict[str, Optional[str]]:
+    """
+    Return the names of the fields of model that are reverse-synced, mapped to the attribute
+    that holds their value on a model instance, like organization_id for organization.
+    The attribute is None for fields that are not concrete fields of the model.
+    """
+    config = get_registry().get_config_for_model(model=model._meta.concrete_model)
+    if config.managed_serializer is None:
+        return {}
+
+    fields = {}
+    for name in config.managed_serializer().get_fields().keys():
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            model_field = None
+        fields[name] = model_field.attname if getattr(model_field, 'concrete', False) else None
+    return fields
+
+
+def snapshot_synced_fields(instance):
+    """
+    Save the values of the reverse-synced fields on the instance, so changed fields can be found without a query.
+    Deferred fields are not loaded for this, they are compared as DEFERRED.
+    """
+    synced_fields = get_synced_fields(type(instance))
+    if None in synced_fields.values():
+        # Values that are not fields can not be read without a possible query, these are loaded from the database on save
+        return
+    instance._reverse_sync_original_values = {attname: instance.__dict__.get(attname, DEFERRED) for attname in synced_fields.values()}
+
+
+# post_init
+def reverse_sync_post_init(sender, instance, **kwargs):
+    snapshot_synced_fields(instance)
+
+
+def get_changed_synced_fields(sender, instance) -> set[str]:
+    synced_fields = get_synced_fields(sender)
+    original_values = getattr(instance, '_reverse_sync_original_values', None)
+    if original_values is None:
+        # The values were not saved when the instance was loaded, get them at the cost of an extra query
+        existing_instance = sender.objects.get(pk=instance.pk)
+        return {field for field in synced_fields if getattr(existing_instance, field) != getattr(instance, field)}
+
+    return {field for field, attname in synced_fields.items() if original_values.get(attname, DEFERRED) != instance.__dict__.get(attname, DEFERRED)}
+
+
 # pre_save
 def decide_to_sync_update(sender, instance, raw, using, update_fields, **kwargs):
     """
     A pre_save hook that decides whether or not to reverse-sync the instance
     based on which fields have changed.
 
-    This has to be in pre-save because we have to be able to get the original
-    instance to calculate which fields changed, if update_fields wasn't passed
+    This has to be in pre-save because we have to compare with the original
+    values to calculate which fields changed, if update_fields wasn't passed.
+    Those are saved by reverse_sync_post_init when the instance is loaded.
     """
 
     if instance._state.adding:
         # We only concern ourselves with updates
         return
 
-    try:
-        resource = Resource.get_resource_for_object(instance)
-    except Resource.DoesNotExist:
-        # We can't sync here, but we want to log that, so let sync_to_resource_server() discard it.
-        return
-
-    fields_that_sync = resource.content_type.resource_type.serializer_class().get_fields().keys()
+    fields_that_sync = get_synced_fields(sender)
 
     if update_fields is None:
-        # If we're not given a useful update_fields, manually calculate the changed fields
-        # at the cost of an extra query
-        existing_instance = sender.objects.get(pk=instance.pk)
-        changed_fields = set()
-        for field in fields_that_sync:
-            if getattr(existing_instance, field) != getattr(instance, field):
-                changed_fields.add(field)
+        # If we're not given a useful update_fields, compare with the values from when the instance was loaded
+        changed_fields = get_changed_synced_fields(sender, instance)
     else:
         # If we're given update_fields, we can just check those
         changed_fields = set(update_fields)
+        changed_fields.update(field for field, attname in fields_that_sync.items() if attname in changed_fields)
 
     if not changed_fields.intersection(fields_that_sync):
         instance._skip_reverse_resource_sync = True
@@ -96,6 +143,9 @@ def no_reverse_sync():
 
 # post_save
 def sync_to_resource_server_post_save(sender, instance, created, update_fields, **kwargs):
+    # The saved values are the original values for the next save of this instance
+    snapshot_synced_fields(instance)
+
     if not reverse_sync_enabled:
         return
 
@@ -0,0 +1,128 @@
+from __future__ import annotations  # support python<3.10
+
+import logging
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from requests import HTTPError
+
+from ansible_base.resource_registry.models import Resource, ReverseSyncEntry
+from ansible_base.resource_registry.utils.sync_to_resource_server import save_resource_server_ids, send_to_resource_server
+
+logger = logging.getLogger('ansible_base.resource_registry.tasks.reverse_sync')
+
+# Seconds to wait before the first retry of a failed entry, doubled on every further failure up to the maximum
+RETRY_DELAY = 10
+MAX_RETRY_DELAY = 60 * 60
+# Entries that failed this many times are set aside as failed, so the later changes of their objects can be sent
+MAX_ATTEMPTS = 20
+# Client errors that can succeed when retried, other client errors mean the resource server will never accept the change
+RETRYABLE_STATUS_CODES = (401, 403, 408, 409, 429)
+# Seconds that claimed entries are reserved for the worker sending them, entries not sent by then can be claimed again
+CLAIM_SECONDS = 5 * 60
+
+
+def get_ready_entries(batch_size: int = 100) -> list[ReverseSyncEntry]:
+    """
+    Lock and return the entries of the outbox that can be sent now, this has to be called in a transaction.
+    Only the oldest entry of each object is ready, so changes to an object are sent in order,
+    and a failing entry holds back the later changes to its object until it is sent or set aside as failed.
+    Entries locked by another worker that is claiming them are skipped.
+    """
+    earlier = ReverseSyncEntry.objects.filter(
+        content_type_id=OuterRef('content_type_id'), object_id=OuterRef('object_id'), pk__lt=OuterRef('pk'), failed=False
+    )
+    entries = (
+        ReverseSyncEntry.objects.filter(next_attempt__lte=timezone.now(), failed=False)
+        .exclude(Exists(earlier))
+        .order_by('pk')
+        .select_for_update(skip_locked=True)[:batch_size]
+    )
+    return list(entries)
+
+
+def claim_entries(batch_size: int = 100) -> tuple[list[ReverseSyncEntry], datetime]:
+    """
+    Claim the entries that are ready with a short transaction, by moving their next_attempt to the end of the claim.
+    Claimed entries are not ready for other workers until then, and still hold back the later changes to their objects.
+    Returns the entries and the time the claim ends.
+    """
+    claimed_until = timezone.now() + timedelta(seconds=CLAIM_SECONDS)
+    with transaction.atomic():
+        entries = get_ready_entries(batch_size)
+        ReverseSyncEntry.objects.filter(pk__in=[entry.pk for entry in entries]).update(next_attempt=claimed_until)
+    return entries, claimed_until
+
+
+def send_entry(entry: ReverseSyncEntry) -> None:
+    """
+    Send one entry to the resource server and delete it, for a create the ids given by the resource server are saved.
+    The request is made outside of any transaction, so a slow resource server does not keep rows locked.
+    """
+    response = send_to_resource_server(entry.action, entry.resource_type, entry.ansible_id, entry.resource_data, jwt_user_id=entry.jwt_user_id)
+    with transaction.atomic():
+        if entry.action == "create":
+            save_created_ids(entry, response)
+        entry.delete()
+
+
+def save_created_ids(entry: ReverseSyncEntry, response) -> None:
+    resource = Resource.objects.filter(content_type_id=entry.content_type_id, object_id=entry.object_id).first()
+    if resource is not None:
+        save_resource_server_ids(resource, response)
+
+    response_data = response.json()
+    if isinstance(response_data, dict) and str(response_data['ansible_id']) != str(entry.ansible_id):
+        # Later changes were queued with the local ansible_id, send them with the one from the resource server
+        ReverseSyncEntry.objects.filter(content_type_id=entry.content_type_id, object_id=entry.object_id, ansible_id=entry.ansible_id).update(
+            ansible_id=response_data['ansible_id']
+        )
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    "True if the error is a response of the resource server refusing the change, so sending it again would fail the same way"
+    response = getattr(error, 'response', None) if isinstance(error, HTTPError) else None
+    return response is not None and 400 <= response.status_code < 500 and response.status_code not in RETRYABLE_STATUS_CODES
+
+
+def record_failure(entry: ReverseSyncEntry, error: Exception) -> None:
+    entry.attempts += 1
+    delay = min(RETRY_DELAY * 2 ** (entry.attempts - 1), MAX_RETRY_DELAY)
+    entry.next_attempt = timezone.now() + timedelta(seconds=delay)
+    entry.last_error = str(error)
+    if is_permanent_failure(error) or entry.attempts >= MAX_ATTEMPTS:
+        logger.error(f"Setting aside {entry.action} of {entry.resource_type} {entry.ansible_id} as failed after {entry.attempts} attempts: {error}")
+        entry.failed = True
+    entry.save(update_fields=['attempts', 'next_attempt', 'last_error', 'failed'])
+
+
+def process_reverse_sync_outbox(batch_size: int = 100) -> dict[str, int]:
+    """
+    Send the changes in the outbox to the resource server until no entry is ready.
+    Entries are deleted once they are sent, failed entries are retried later with an increasing delay,
+    unless the resource server refused them or they failed MAX_ATTEMPTS times, then they are set aside as failed.
+    Returns the number of entries sent and failed.
+    """
+    counts = {'sent': 0, 'failed': 0}
+    while True:
+        sent = set_aside = 0
+        entries, claimed_until = claim_entries(batch_size)
+        for entry in entries:
+            if timezone.now() >= claimed_until:
+                # The rest of the entries can be claimed by another worker now, and are sent by the next claim
+                break
+            try:
+                send_entry(entry)
+            except Exception as e:
+                logger.warning(f"Failed to sync {entry.action} of {entry.resource_type} {entry.ansible_id} to resource server: {e}")
+                record_failure(entry, e)
+                counts['failed'] += 1
+                set_aside += entry.failed
+            else:
+                sent += 1
+        counts['sent'] += sent
+        # Sending an entry, or setting it aside, can make the next entry of the same object ready
+        if not (sent or set_aside):
+            return counts
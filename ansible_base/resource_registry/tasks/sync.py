@@ -3,21 +3,24 @@ from __future__ import annotations  # support python<3.10
 import asyncio
 import csv
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import timedelta
 from enum import Enum
-from io import StringIO, TextIOBase
+from io import TextIOBase
+from itertools import chain, islice
+from typing import Iterable, Iterator
 
 from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.db import transaction
-from django.db.models import QuerySet
+from django.db.models import QuerySet, prefetch_related_objects
 from django.db.utils import DatabaseError, IntegrityError
 from django.utils import timezone
 from requests import HTTPError
 
-from ansible_base.resource_registry.models import Resource, ResourceType
+from ansible_base.resource_registry.models import Resource, ResourceSyncCursor, ResourceType
 from ansible_base.resource_registry.registry import get_registry
 from ansible_base.resource_registry.rest_client import ResourceAPIClient, get_resource_server_client
 
@@ -48,6 +51,7 @@ class ManifestItem:
     resource_hash: str
     service_id: str | None = None
     resource_data: dict | None = None
+    resource_type: str | None = None
 
     def __hash__(self):
         return hash(self.ansible_id)
@@ -57,12 +61,24 @@ class ManifestItem:
 class SyncResult:
     status: SyncStatus
     item: ManifestItem
+    elapsed: float = 0.0
 
     def __iter__(self):
         """Allows unpacking  status, item = SyncResult(...)"""
         return iter((self.status, self.item))
 
 
+@dataclass
+class ManifestChanges:
+    """Manifest of the resources changed after a cursor, or the full manifest if complete is True."""
+
+    service_id: str
+    items: Iterable[ManifestItem] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    cursor: str | None = None
+    complete: bool = True
+
+
 def create_api_client() -> ResourceAPIClient:
     """Factory for pre-configured ResourceAPIClient."""
     params = {"raise_if_bad_request": False}
@@ -74,30 +90,121 @@ def create_api_client() -> ResourceAPIClient:
     return client
 
 
-def fetch_manifest(
-    resource_type_name: str,
-    api_client: ResourceAPIClient | None = None,
-) -> list[ManifestItem]:
-    """Fetch RESOURCE_SERVER manifest, parses the CSV and returns a list."""
-    api_client = api_client or create_api_client()
-    api_client.raise_if_bad_request = False  # Status check is needed
-
+def get_remote_service_id(api_client: ResourceAPIClient) -> str:
+    """The service_id of RESOURCE_SERVER."""
     resp_metadata = api_client.get_service_metadata()
     resp_metadata.raise_for_status()
-    service_id = resp_metadata.json()["service_id"]
+    return resp_metadata.json()["service_id"]
 
-    manifest_stream = api_client.get_resource_type_manifest(resource_type_name)
+
+def _request_manifest(resource_type_name: str, api_client: ResourceAPIClient, since: str | None = None):
+    """Request the manifest of a resource type, a 410 response is returned if the since cursor expired."""
+    manifest_stream = api_client.get_resource_type_manifest(resource_type_name, since=since)
     if manifest_stream.status_code == 404:
         msg = f"manifest for {resource_type_name} NOT FOUND."
         raise ManifestNotFound(msg)
+    if since and manifest_stream.status_code == 410:
+        return manifest_stream
 
     try:
         manifest_stream.raise_for_status()
     except HTTPError as exc:
         raise ResourceSyncHTTPError() from exc
+    return manifest_stream
+
+
+def _read_csv_stream(manifest_stream) -> csv.DictReader:
+    """Parse the CSV of the response line by line as it is downloaded."""
+    manifest_stream.encoding = "utf-8"
+    return csv.DictReader(manifest_stream.iter_lines(decode_unicode=True))
+
+
+def iter_chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    """Split an iterable in lists of up to size items, without consuming more than one list at a time."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def iter_manifest(
+    resource_type_name: str,
+    api_client: ResourceAPIClient | None = None,
+    service_id: str | None = None,
+) -> Iterator[ManifestItem]:
+    """Fetch RESOURCE_SERVER manifest, returns an iterator that parses the CSV as it is streamed.
+
+    The request is made before returning, so ManifestNotFound is raised by this call.
+    """
+    api_client = api_client or create_api_client()
+    api_client.raise_if_bad_request = False  # Status check is needed
+
+    service_id = service_id or get_remote_service_id(api_client)
+    manifest_stream = _request_manifest(resource_type_name, api_client)
+
+    return (ManifestItem(service_id=service_id, **row) for row in _read_csv_stream(manifest_stream))
+
+
+def fetch_manifest(
+    resource_type_name: str,
+    api_client: ResourceAPIClient | None = None,
+) -> list[ManifestItem]:
+    """Fetch RESOURCE_SERVER manifest, parses the CSV and returns a list."""
+    return list(iter_manifest(resource_type_name, api_client=api_client))
+
+
+def fetch_manifest_changes(
+    resource_type_name: str,
+    since: str | None = None,
+    api_client: ResourceAPIClient | None = None,
+    service_id: str | None = None,
+) -> ManifestChanges:
+    """Fetch RESOURCE_SERVER manifest of the changes after the since cursor.
+
+    The full manifest is fetched if there is no cursor, the cursor expired, or RESOURCE_SERVER does not support cursors.
+    """
+    api_client = api_client or create_api_client()
+    api_client.raise_if_bad_request = False  # Status check is needed
+
+    service_id = service_id or get_remote_service_id(api_client)
+    manifest_stream = _request_manifest(resource_type_name, api_client, since=since)
+    if manifest_stream.status_code == 410:
+        return fetch_manifest_changes(resource_type_name, api_client=api_client, service_id=service_id)
+
+    csv_reader = _read_csv_stream(manifest_stream)
+    changes = ManifestChanges(
+        service_id=service_id,
+        cursor=manifest_stream.headers.get("X-Manifest-Cursor"),
+        # servers without support for cursors ignore since and send the full manifest
+        complete=not since or "deleted" not in (csv_reader.fieldnames or []),
+    )
+    if changes.complete:
+        # a full manifest is processed as it is streamed, like in iter_manifest
+        changes.items = (ManifestItem(service_id=service_id, **row) for row in csv_reader)
+        return changes
+
+    for row in csv_reader:
+        if row.pop("deleted", "false") == "true":
+            changes.deleted.append(row["ansible_id"])
+        else:
+            changes.items.append(ManifestItem(service_id=service_id, **row))
+    return changes
+
+
+def get_orphan_resource_ids(
+    resource_type_name: str,
+    service_id: str,
+    manifest_ansible_ids: set[str],
+) -> list[int]:
+    """Primary keys of managed resources that are not in the manifest.
 
-    csv_reader = csv.DictReader(StringIO(manifest_stream.text))
-    return [ManifestItem(service_id=service_id, **row) for row in csv_reader]
+    The local ansible_ids are read in chunks and compared with the set,
+    instead of passing every ansible_id of the manifest to the database.
+    """
+    managed_resources = Resource.objects.filter(
+        service_id=service_id,
+        content_type__resource_type__name=resource_type_name,
+    ).values_list("pk", "ansible_id")
+    return [pk for pk, ansible_id in managed_resources.iterator(chunk_size=2000) if str(ansible_id) not in manifest_ansible_ids]
 
 
 def get_orphan_resources(
@@ -105,10 +212,20 @@ def get_orphan_resources(
     manifest_list: list[ManifestItem],
 ) -> QuerySet:
     """QuerySet with orphaned managed resources to be deleted."""
+    manifest_ansible_ids = {str(item.ansible_id) for item in manifest_list}
+    return Resource.objects.filter(pk__in=get_orphan_resource_ids(resource_type_name, manifest_list[0].service_id, manifest_ansible_ids))
+
+
+def get_deleted_resources(
+    resource_type_name: str,
+    changes: ManifestChanges,
+) -> QuerySet:
+    """QuerySet with managed resources that were deleted remotely after the cursor."""
     return Resource.objects.filter(
-        service_id=manifest_list[0].service_id,
+        service_id=changes.service_id,
         content_type__resource_type__name=resource_type_name,
-    ).exclude(ansible_id__in=[item.ansible_id for item in manifest_list])
+        ansible_id__in=changes.deleted,
+    )
 
 
 def delete_resource(resource: Resource):
@@ -130,6 +247,45 @@ def get_managed_resource(manifest_item: ManifestItem) -> Resource | None:
     ).first()
 
 
+def get_managed_resources(manifest_list: list[ManifestItem]) -> dict[str, Resource]:
+    """Local managed resources of the items of the manifest by ansible_id, loaded with one query.
+
+    Content objects are prefetched only for the resources with a different or missing hash,
+    which are the ones that are going to be updated, or need their hash computed.
+    """
+    if not manifest_list:
+        return {}
+    managed_resources = {
+        str(resource.ansible_id): resource
+        for resource in Resource.objects.filter(
+            ansible_id__in=[item.ansible_id for item in manifest_list],
+            service_id=manifest_list[0].service_id,
+        ).select_related("content_type__resource_type")
+    }
+    changed = []
+    for item in manifest_list:
+        resource = managed_resources.get(str(item.ansible_id))
+        if resource is not None and resource.resource_hash != item.resource_hash:
+            changed.append(resource)
+    prefetch_related_objects(changed, "content_object")
+    return managed_resources
+
+
+def get_changed_manifest_items(manifest_list: list[ManifestItem], managed_resources: dict[str, Resource] | None = None) -> list[ManifestItem]:
+    """Items of the manifest that do not exist locally, or have a different hash than the stored local hash."""
+    if managed_resources is not None:
+        local_hashes = {ansible_id: resource.resource_hash for ansible_id, resource in managed_resources.items()}
+    else:
+        local_hashes = dict(
+            Resource.objects.filter(
+                ansible_id__in=[item.ansible_id for item in manifest_list],
+                service_id=manifest_list[0].service_id,
+            ).values_list("ansible_id", "resource_hash")
+        )
+        local_hashes = {str(ansible_id): resource_hash for ansible_id, resource_hash in local_hashes.items()}
+    return [item for item in manifest_list if local_hashes.get(str(item.ansible_id)) != item.resource_hash]
+
+
 def get_resource_type_names() -> list[str]:
     """Ordered list of registered resource types."""
     registry = get_registry()
@@ -155,10 +311,18 @@ def _attempt_update_resource(
 def resource_sync(
     manifest_item: ManifestItem,
     api_client: ResourceAPIClient | None = None,
+    managed_resources: dict[str, Resource] | None = None,
 ) -> SyncResult:
-    """Uni-directional sync local resources from RESOURCE_SERVER resources."""
+    """Uni-directional sync local resources from RESOURCE_SERVER resources.
+
+    managed_resources is the result of get_managed_resources for a list of items including this one,
+    without it the local resource is queried.
+    """
     api_client = api_client or create_api_client()
-    local_managed_resource = get_managed_resource(manifest_item)
+    if managed_resources is not None:
+        local_managed_resource = managed_resources.get(str(manifest_item.ansible_id))
+    else:
+        local_managed_resource = get_managed_resource(manifest_item)
     resource_data = None
     resource_type_name = None
     unavailable = False  # for retry mechanism
@@ -168,6 +332,10 @@ def resource_sync(
         nonlocal resource_data
         nonlocal resource_type_name
         nonlocal unavailable
+        if manifest_item.resource_data is not None and manifest_item.resource_type is not None:
+            # Already fetched in a bulk request
+            resource_data = manifest_item.resource_data
+            resource_type_name = manifest_item.resource_type
         if resource_data is None or resource_type_name is None:
             resp = api_client.get_resource(manifest_item.ansible_id)
             if 400 <= resp.status_code < 500:  # pragma: no cover
@@ -179,8 +347,7 @@ def resource_sync(
 
     if local_managed_resource:
         # Exists locally: Compare and Update
-        sc = local_managed_resource.content_type.resource_type.serializer_class
-        local_hash = sc(local_managed_resource.content_object).get_hash()
+        local_hash = local_managed_resource.resource_hash or local_managed_resource.get_content_hash()
         if manifest_item.resource_hash == local_hash:
             return SyncResult(SyncStatus.NOOP, manifest_item)
         set_resource_local_variables()
@@ -231,6 +398,11 @@ class SyncExecutor:
     attempts: int = 0
     deleted_count: int = 0
     asyncio: bool = False
+    bulk_size: int = 200
+    workers: int = 1
+    delete_batch_size: int = 500
+    delta: bool = False
+    remote_service_id: str | None = None
     results: dict = field(default_factory=lambda: defaultdict(list))
 
     def write(self, text: str = ""):
@@ -278,53 +450,237 @@ class SyncExecutor:
             f"Skipped {skipped_count} | "
             f"Deleted {self.deleted_count}"
         )
-
-    async def _a_process_manifest_item(self, manifest_item):  # pragma: no cover
+        if results:
+            elapsed = [result.elapsed for result in results]
+            self.write(f"Timing | Total {sum(elapsed):.3f}s | Average {sum(elapsed) / len(elapsed):.3f}s | Slowest {max(elapsed):.3f}s")
+
+    def _get_items_to_fetch(self, manifest_list, managed_resources=None):
+        """Items of the manifest that are new or changed and have no resource data yet."""
+        return [item for item in get_changed_manifest_items(manifest_list, managed_resources) if item.resource_data is None]
+
+    def _fetch_items_bulk(self, manifest_items) -> bool:
+        """Fetch data for the given items with a bulk request, returns False if RESOURCE_SERVER does not support them."""
+        resp = self.api_client.get_resources_bulk([item.ansible_id for item in manifest_items])
+        if resp.status_code in (404, 405):
+            return False
+        if resp.ok:
+            resources = {str(data["ansible_id"]): data for data in resp.json()["results"]}
+            for item in manifest_items:
+                if data := resources.get(str(item.ansible_id)):
+                    item.resource_data = data["resource_data"]
+                    item.resource_type = data["resource_type"]
+        return True
+
+    def _fetch_items(self, manifest_items):
+        """Fetch data for the given items, with a bulk request if the server supports it, or one by one.
+
+        This makes no database queries and does not change the executor, so it can run in the worker threads.
+        Items that could not be fetched here are fetched again by resource_sync.
+        """
+        if not manifest_items:
+            return
+        if self.bulk_size and self._fetch_items_bulk(manifest_items):
+            return
+        for item in manifest_items:
+            resp = self.api_client.get_resource(item.ansible_id)
+            if resp.ok:
+                item.resource_data = resp.json()["resource_data"]
+                item.resource_type = resp.json()["resource_type"]
+
+    def _check_bulk_support(self, manifest_items):
+        """Fetch the items with a bulk request in the calling thread, and stop using bulk requests if RESOURCE_SERVER does not support them."""
+        if self.bulk_size and manifest_items and not self._fetch_items_bulk(manifest_items):
+            self.write("RESOURCE_SERVER does not support bulk requests, resources will be fetched one by one.")
+            self.bulk_size = 0
+
+    def _fetch_resources(self, manifest_list, managed_resources=None):
+        """Fetch data for new and changed items of the manifest with bulk requests of bulk_size resources.
+
+        Items that could not be fetched here are fetched one by one by resource_sync.
+        """
+        manifest_list = list(manifest_list)
+        start = 0
+        while self.bulk_size and start < len(manifest_list):
+            chunk = manifest_list[start : start + self.bulk_size]
+            start += self.bulk_size
+            self._check_bulk_support(self._get_items_to_fetch(chunk, managed_resources))
+
+    async def _a_process_manifest_item(self, manifest_item, managed_resources=None):  # pragma: no cover
         """Awaitable to process a manifest item using asyncio"""
-        result = await async_resource_sync(manifest_item, self.api_client)
+        result = await async_resource_sync(manifest_item, self.api_client, managed_resources)
         self._report_manifest_item(result)
         return result
 
     async def _a_process_manifest_list(self, manifest_list):  # pragma: no cover
         """Awaitable to process a sequence of items using Asyncio."""
-        queue = [self._a_process_manifest_item(item) for item in manifest_list]
-        results = await asyncio.gather(*queue)
-        self._report_results(results)
-
-    def _process_manifest_item(self, manifest_item):
+        managed_resources = await sync_to_async(get_managed_resources)(manifest_list)
+        queue = [self._a_process_manifest_item(item, managed_resources) for item in manifest_list]
+        return await asyncio.gather(*queue)
+
+    def _process_manifest_list_asyncio(self, manifest_list):  # pragma: no cover
+        """Process items with asyncio, one chunk of items at a time."""
+        results = []
+        for chunk in iter_chunks(manifest_list, self.bulk_size or 100):
+            self._fetch_resources(chunk)
+            results.extend(asyncio.run(self._a_process_manifest_list(chunk)))
+        return results
+
+    def _process_manifest_item(self, manifest_item, managed_resources=None):
         """Process a manifest item"""
-        result = resource_sync(manifest_item, self.api_client)
+        start = time.perf_counter()
+        result = resource_sync(manifest_item, self.api_client, managed_resources)
+        result.elapsed = time.perf_counter() - start
         self._report_manifest_item(result)
         return result
 
     def _process_manifest_list(self, manifest_list):
-        """Process items sequentially."""
-        results = [self._process_manifest_item(item) for item in manifest_list]
-        self._report_results(results)
+        """Process items sequentially, fetching the resources for each chunk of items in bulk.
 
-    def _cleanup_orphans(self, resource_type, manifest_list):
-        """Delete local managed resources that are not part of the manifest."""
-        resources_to_cleanup = get_orphan_resources(
-            resource_type,
-            manifest_list,
+        The local resources of each chunk are loaded with one query, so unchanged items do not need more queries.
+        """
+        results = []
+        for chunk in iter_chunks(manifest_list, self.bulk_size or 100):
+            managed_resources = get_managed_resources(chunk)
+            self._fetch_resources(chunk, managed_resources)
+            results.extend(self._process_manifest_item(item, managed_resources) for item in chunk)
+        return results
+
+    def _apply_fetched_chunk(self, chunk, future):
+        """Wait for the resources of the chunk to be fetched, then sync the items in one transaction."""
+        fetch_elapsed = future.result()
+        with transaction.atomic():
+            # loaded after the previous chunks were written, so the resources are up to date
+            managed_resources = get_managed_resources(chunk)
+            results = [self._process_manifest_item(item, managed_resources) for item in chunk]
+        for result in results:
+            result.elapsed += fetch_elapsed / len(chunk)
+        return results
+
+    def _timed_fetch_items(self, manifest_items):
+        """Fetch the items and return the seconds it took."""
+        start = time.perf_counter()
+        self._fetch_items(manifest_items)
+        return time.perf_counter() - start
+
+    def _process_manifest_list_parallel(self, manifest_list):
+        """Process items with a pool of workers threads doing the requests to RESOURCE_SERVER.
+
+        Database queries and writes are done in the calling thread, in the order of the manifest.
+        No more than two chunks per worker are fetched ahead of the database writes.
+        """
+        results = []
+        pending = deque()
+        manifest_list = iter(manifest_list)
+        # Support for bulk requests is checked with the first chunk in this thread, before starting the workers,
+        # so the size of the chunks and the requests of the workers do not change while they run
+        if first_chunk := list(islice(manifest_list, self.bulk_size)):
+            self._check_bulk_support(self._get_items_to_fetch(first_chunk))
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="resource_sync") as pool:
+            for chunk in iter_chunks(chain(first_chunk, manifest_list), self.bulk_size or 10):
+                pending.append((chunk, pool.submit(self._timed_fetch_items, self._get_items_to_fetch(chunk))))
+                while len(pending) > 2 * self.workers:
+                    results.extend(self._apply_fetched_chunk(*pending.popleft()))
+            while pending:
+                results.extend(self._apply_fetched_chunk(*pending.popleft()))
+        return results
+
+    def _cleanup_orphans(self, resource_type, manifest_ansible_ids):
+        """Delete local managed resources that are not part of the manifest.
+
+        An empty manifest is more likely a problem with RESOURCE_SERVER than every resource of the type
+        being deleted there, so no resources are deleted in that case.
+        """
+        if not manifest_ansible_ids:
+            self.write(f"WARNING: the manifest of {resource_type} is empty, not deleting local resources as orphans")
+            return
+        orphan_ids = get_orphan_resource_ids(resource_type, self.remote_service_id, manifest_ansible_ids)
+        self._delete_resources(orphan_ids, "orphaned")
+
+    def _retry_conflicts(self, results):
+        """Process the items that conflicted again, the conflict may have been with an orphan that was deleted."""
+        conflicts = [result.item for result in results if result.status == SyncStatus.CONFLICT]
+        if not conflicts:
+            return results
+        self.write(f"Retrying {len(conflicts)} conflicted resources after deleting orphaned resources")
+        retried = {result.item.ansible_id: result for result in self._dispatch_sync_process(conflicts)}
+        return [retried.get(result.item.ansible_id, result) for result in results]
+
+    def _cleanup_deleted(self, resource_type, changes):
+        """Delete local managed resources that were deleted remotely after the cursor."""
+        resource_ids = list(get_deleted_resources(resource_type, changes).values_list("pk", flat=True))
+        self._delete_resources(resource_ids, "remotely deleted")
+
+    def _serialize_deleted_resources(self, resources):
+        """Data of the resources for the report, except for the ones created in the last retain_seconds."""
+        retain_after = timezone.now() - timedelta(seconds=self.retain_seconds)
+        for resource in resources:
+            if resource.content_object is None or resource.content_object.created >= retain_after:
+                continue
+            data = resource.content_type.resource_type.serializer_class(resource.content_object).data
+            data.update(resource.summary_fields())
+            yield resource, data
+
+    def _delete_resources(self, resource_ids, description):
+        """Delete local managed resources in batches of delete_batch_size, one transaction per batch.
+
+        The content objects of each batch are loaded with one query, and serialized for the report before the deletions.
+        """
+        self.deleted_count = len(resource_ids)
+        if not self.deleted_count:
+            return
+        self.write(f"Deleting {self.deleted_count} {description} resources")
+        for batch_ids in iter_chunks(resource_ids, self.delete_batch_size):
+            resources = Resource.objects.filter(pk__in=batch_ids).select_related("content_type__resource_type").prefetch_related("content_object")
+            to_delete = list(self._serialize_deleted_resources(resources))
+            with transaction.atomic():
+                for resource, data in to_delete:
+                    try:
+                        # a savepoint, so an error does not roll back the rest of the batch
+                        with transaction.atomic():
+                            delete_resource(resource)
+                    except ResourceDeletionError as exc:
+                        self.write(f"Error deleting {description} resources {str(exc)}")
+                    else:  # persist in the report
+                        self.results["deleted"].append(data)
+
+    def _get_remote_service_id(self):
+        """The service_id of RESOURCE_SERVER, requested once for the whole run."""
+        if self.remote_service_id is None:
+            self.remote_service_id = get_remote_service_id(self.api_client)
+        return self.remote_service_id
+
+    def _fetch_manifest_changes(self, resource_type_name):
+        """Fetch the changes after the cursor saved by the last complete sync of the resource type."""
+        self._get_remote_service_id()
+        since = (
+            ResourceSyncCursor.objects.filter(resource_type__name=resource_type_name, service_id=self.remote_service_id)
+            .values_list("cursor", flat=True)
+            .first()
+        )
+        changes = fetch_manifest_changes(resource_type_name, since=since, api_client=self.api_client, service_id=self.remote_service_id)
+        if changes.complete:
+            self.write("Syncing the full manifest")
+        else:
+            self.write(f"Changes since {since}: {len(changes.items)} changed and {len(changes.deleted)} deleted resources")
+        return changes
+
+    def _save_cursor(self, resource_type_name, changes, results):
+        """Save the cursor for the next sync, unless some resources of the type could not be synced.
+
+        Conflicts that were not resolved by a retry, and resources still unavailable after the retries,
+        are in the changes again on the next sync from the same cursor.
+        """
+        if changes.cursor is None:
+            return
+        unsynced = [item for status, item in results if status == SyncStatus.CONFLICT or item in self.unavailable]
+        if unsynced:
+            self.write(f"Not saving the cursor, {len(unsynced)} resources were not synced")
+            return
+        ResourceSyncCursor.objects.update_or_create(
+            resource_type=ResourceType.objects.get(name=resource_type_name),
+            service_id=changes.service_id,
+            defaults={"cursor": changes.cursor},
         )
-        self.deleted_count = resources_to_cleanup.count()
-        if self.deleted_count:
-            self.write(f"Deleting {self.deleted_count} orphaned resources")
-            for orphan in resources_to_cleanup:
-                # If it was created in the latest X seconds, ignore it.
-                if orphan.content_object.created >= timezone.now() - timedelta(seconds=self.retain_seconds):
-                    continue
-                try:
-                    _sc = orphan.content_type.resource_type.serializer_class
-                    data = _sc(orphan.content_object).data
-                    data.update(orphan.summary_fields())
-                    with transaction.atomic():
-                        delete_resource(orphan)
-                except ResourceDeletionError as exc:
-                    self.write(f"Error deleting orphaned resources {str(exc)}")
-                else:  # persist in the report
-                    self.results["deleted"].append(data)
 
     def _handle_retries(self):  # pragma: no cover
         """Check if there are unavailable resources to re-try."""
@@ -334,31 +690,55 @@ class SyncExecutor:
             if self.retrysleep:
                 self.write(f"waiting {self.retrysleep} seconds")
                 time.sleep(self.retrysleep)
-            if self.asyncio is True:
-                asyncio.run(self._a_process_manifest_list(self.unavailable))
-            else:
-                self._process_manifest_list(self.unavailable)
+            self._report_results(self._dispatch_sync_process(list(self.unavailable)))
             self.attempts += 1
 
-    def _dispatch_sync_process(self, manifest_list: list[ManifestItem]):
-        """Sync all the items from the manifest using either asyncio or sequentialy."""
+    def _dispatch_sync_process(self, manifest_list: Iterable[ManifestItem]) -> list[SyncResult]:
+        """Sync all the items from the manifest using either asyncio, a pool of workers, or sequentialy."""
         if self.asyncio is True:  # pragma: no cover
-            self.write(f"Processing {len(manifest_list)} resources with asyncio executor.")
-            self.write()
-            asyncio.run(self._a_process_manifest_list(manifest_list))
+            return self._process_manifest_list_asyncio(manifest_list)
+        elif self.workers > 1:
+            return self._process_manifest_list_parallel(manifest_list)
         else:
-            self.write(f"Processing {len(manifest_list)} resources sequentially.")
-            self.write()
-            self._process_manifest_list(manifest_list)
+            return self._process_manifest_list(manifest_list)
+
+    def _sync_manifest(self, resource_type_name: str, manifest: Iterable[ManifestItem], cleanup_orphans: bool = True):
+        """Sync the items of the manifest as they are streamed, then delete orphans and report the results.
+
+        Only the ansible_ids of the manifest are kept for finding the orphans.
+        """
+        manifest_ansible_ids = set()
+
+        def track_ansible_ids(manifest):
+            for item in manifest:
+                manifest_ansible_ids.add(str(item.ansible_id))
+                yield item
+
+        if self.asyncio is True:  # pragma: no cover
+            self.write("Processing resources with asyncio executor.")
+        elif self.workers > 1:
+            self.write(f"Processing resources with {self.workers} workers.")
+        else:
+            self.write("Processing resources sequentially.")
+        self.write()
+
+        results = self._dispatch_sync_process(track_ansible_ids(manifest))
+        if cleanup_orphans:
+            self._cleanup_orphans(resource_type_name, manifest_ansible_ids)
+            if self.deleted_count:
+                results = self._retry_conflicts(results)
+        self._report_results(results)
+        return results
 
     def run(self):
         """Run the sync workflow.
 
         1. Iterate enabled resource types.
-        2. Fetch RESOURCE_SERVER manifest.
-        3. Cleanup orphaned resources (deleted remotely).
-        4. Process the sync for each item in the manifest.
+        2. Fetch RESOURCE_SERVER manifest, or only the changes since the last sync in delta mode.
+        3. Process the sync for each item in the manifest as it is streamed.
+        4. Cleanup orphaned resources (deleted remotely), and retry conflicts if there were orphans.
         5. Handle retries.
+        6. In delta mode, save the cursor for the next sync if all the resources of the type were synced.
         """
         self.write("----- RESOURCE SYNC STARTED -----")
         self.write()
@@ -369,15 +749,25 @@ class SyncExecutor:
                 continue
 
             self.write(f">>> {resource_type_name}")
+            self.deleted_count = 0
             try:
-                manifest_list = fetch_manifest(resource_type_name, api_client=self.api_client)
+                if self.delta:
+                    changes = self._fetch_manifest_changes(resource_type_name)
+                    manifest = changes.items
+                else:
+                    manifest = iter_manifest(resource_type_name, api_client=self.api_client, service_id=self._get_remote_service_id())
             except ManifestNotFound as ex:
                 self.write(str(ex))
                 continue
 
-            self._cleanup_orphans(resource_type_name, manifest_list)
-            self._dispatch_sync_process(manifest_list)
+            if self.delta and not changes.complete:
+                self._cleanup_deleted(resource_type_name, changes)
+                results = self._sync_manifest(resource_type_name, manifest, cleanup_orphans=False)
+            else:
+                results = self._sync_manifest(resource_type_name, manifest)
             self._handle_retries()
+            if self.delta:
+                self._save_cursor(resource_type_name, changes, results)
 
             self.write()
 
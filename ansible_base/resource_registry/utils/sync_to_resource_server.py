@@ -1,3 +1,4 @@
+import json
 import logging
 import os
 
@@ -5,8 +6,10 @@ from crum import get_current_user
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
 
-from ansible_base.resource_registry.models import Resource, service_id
+from ansible_base.lib.utils.settings import get_setting
+from ansible_base.resource_registry.models import Resource, ReverseSyncEntry, service_id
 from ansible_base.resource_registry.rest_client import ResourceRequestBody, get_resource_server_client
 
 logger = logging.getLogger('ansible_base.resource_registry.utils.sync_to_resource_server')
@@ -70,44 +73,78 @@ def sync_to_resource_server(instance, action, ansible_id=None):
     else:
         logger.error("No user found, syncing to resource server with jwt_user_id=None")
 
-    client = get_resource_server_client(
-        settings.RESOURCE_SERVICE_PATH,
-        jwt_user_id=user_ansible_id,
-        raise_if_bad_request=True,
-    )
-
     if action != "delete":
         ansible_id = resource.ansible_id
 
     resource_type = resource.content_type.resource_type
     data = resource_type.serializer_class(instance).data
-    body = ResourceRequestBody(
-        resource_type=resource_type.name,
-        ansible_id=ansible_id,
-        resource_data=data,
-    )
+
+    if get_setting('RESOURCE_SERVER_SYNC_OUTBOX', False):
+        # The entry is saved in the same transaction as the change, and sent later by process_reverse_sync_outbox
+        ReverseSyncEntry.objects.create(
+            content_type_id=resource.content_type_id,
+            object_id=resource.object_id,
+            ansible_id=ansible_id,
+            action=action,
+            resource_type=resource_type.name,
+            resource_data=json_round_trip(data),
+            jwt_user_id=str(user_ansible_id) if user_ansible_id else None,
+        )
+        return
 
     try:
+        response = send_to_resource_server(action, resource_type.name, ansible_id, data, jwt_user_id=user_ansible_id)
         if action == "create":
-            response = client.create_resource(body)
-            json = response.json()
-            if isinstance(json, dict):  # This 'isinstance' check is mainly for tests... to avoid getting here with mock
-                # The service_id is saved here because we don't have a local reference to it anywhere.
-                # The ansible_id is saved here because of the following scenario:
-                #    Service A and Service B both try to create resource C at the same time.
-                #    Service A's request arrives first and receives the lock on the DB to create the resource and creates resource C with ID=1
-                #    Once the lock on the DB is released, Service B's request comes through.
-                #        Because this endpoint does a create or update operation, Service B modifies resource C, and sets its ID=2.
-                #    Now resource C is out of sync. On the resource server and service B, the ID=2, but on service A the ID is now 1.
-                #    Fixing this problem is fairly easy. We just let the resource server set the ansible ID of the resource,
-                #        rather than let each service pick their own random UUID.
-                resource.service_id = json['service_id']
-                resource.ansible_id = json['ansible_id']
-                resource.save()
-        elif action == "update":
-            client.update_resource(ansible_id, body)
-        elif action == "delete":
-            client.delete_resource(ansible_id)
+            save_resource_server_ids(resource, response)
     except Exception as e:
         logger.exception(f"Failed to sync {action} of resource {instance} ({ansible_id}) to resource server: {e}")
         raise ValidationError(_("Failed to sync resource to resource server")) from e
+
+
+def json_round_trip(data):
+    "Return serializer data as plain JSON types, so it can be saved in a JSONField"
+    return json.loads(JSONEncoder().encode(data))
+
+
+def send_to_resource_server(action, resource_type_name, ansible_id, resource_data, jwt_user_id=None):
+    """
+    Send one create, update or delete of a resource to the resource server and return the response.
+    Errors from the resource server are raised.
+    """
+    client = get_resource_server_client(
+        settings.RESOURCE_SERVICE_PATH,
+        jwt_user_id=jwt_user_id,
+        raise_if_bad_request=True,
+    )
+
+    body = ResourceRequestBody(
+        resource_type=resource_type_name,
+        ansible_id=ansible_id,
+        resource_data=resource_data,
+    )
+
+    if action == "create":
+        return client.create_resource(body)
+    elif action == "update":
+        return client.update_resource(ansible_id, body)
+    elif action == "delete":
+        return client.delete_resource(ansible_id)
+    raise ValueError(f"Unknown action {action}")
+
+
+def save_resource_server_ids(resource, response):
+    "Save the ids given by the resource server in the response to the create of a resource"
+    response_data = response.json()
+    if isinstance(response_data, dict):  # This 'isinstance' check is mainly for tests... to avoid getting here with mock
+        # The service_id is saved here because we don't have a local reference to it anywhere.
+        # The ansible_id is saved here because of the following scenario:
+        #    Service A and Service B both try to create resource C at the same time.
+        #    Service A's request arrives first and receives the lock on the DB to create the resource and creates resource C with ID=1
+        #    Once the lock on the DB is released, Service B's request comes through.
+        #        Because this endpoint does a create or update operation, Service B modifies resource C, and sets its ID=2.
+        #    Now resource C is out of sync. On the resource server and service B, the ID=2, but on service A the ID is now 1.
+        #    Fixing this problem is fairly easy. We just let the resource server set the ansible ID of the resource,
+        #        rather than let each service pick their own random UUID.
+        resource.service_id = response_data['service_id']
+        resource.ansible_id = response_data['ansible_id']
+        resource.save()
@@ -1,9 +1,12 @@
 import logging
 from collections import OrderedDict
+from datetime import timedelta
 
 from django.conf import settings
 from django.http import HttpResponseNotFound
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import permissions
 from rest_framework.decorators import action
 from rest_framework.pagination import PageNumberPagination
@@ -13,9 +16,15 @@ from rest_framework.viewsets import GenericViewSet, mixins
 
 from ansible_base.lib.utils.response import CSVStreamResponse, get_relative_url
 from ansible_base.lib.utils.views.django_app_api import AnsibleBaseDjangoAppApiView
-from ansible_base.resource_registry.models import Resource, ResourceType, service_id
+from ansible_base.resource_registry.models import Resource, ResourceDeletion, ResourceType, service_id
 from ansible_base.resource_registry.registry import get_registry
-from ansible_base.resource_registry.serializers import ResourceListSerializer, ResourceSerializer, ResourceTypeSerializer, UserAuthenticationSerializer
+from ansible_base.resource_registry.serializers import (
+    ResourceBulkRetrieveSerializer,
+    ResourceListSerializer,
+    ResourceSerializer,
+    ResourceTypeSerializer,
+    UserAuthenticationSerializer,
+)
 from ansible_base.resource_registry.utils.auth_code import get_user_auth_code
 from ansible_base.rest_filters.rest_framework.field_lookup_backend import FieldLookupBackend
 from ansible_base.rest_filters.rest_framework.order_backend import OrderByBackend
@@ -23,6 +32,10 @@ from ansible_base.rest_filters.rest_framework.type_filter_backend import TypeFil
 
 logger = logging.getLogger('ansible_base.resource_registry.views')
 
+# Changes are listed from a bit before the given cursor, to include changes that were
+# committed by transactions that were still open when the previous manifest was generated
+MANIFEST_CURSOR_OVERLAP = timedelta(seconds=60)
+
 
 class HasResourceRegistryPermissions(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -36,7 +49,9 @@ class HasResourceRegistryPermissions(permissions.BasePermission):
                 return True
             else:
                 if hasattr(view, 'action'):
-                    return view.action in allowed_actions
+                    # some actions are variants of the standard actions, and are allowed by the same permission
+                    action = getattr(view, 'permission_actions', {}).get(view.action, view.action)
+                    return action in allowed_actions
                 elif hasattr(view, 'custom_action_label'):
                     return view.custom_action_label in allowed_actions
                 else:
@@ -89,13 +104,27 @@ class ResourceViewSet(
     queryset = Resource.objects.select_related("content_type__resource_type").all()
     serializer_class = ResourceSerializer
     lookup_field = "ansible_id"
+    permission_actions = {"bulk_retrieve": "retrieve"}
 
     def get_serializer_class(self):
         if self.action == "list":
             return ResourceListSerializer
+        elif self.action == "bulk_retrieve":
+            return ResourceBulkRetrieveSerializer
 
         return super().get_serializer_class()
 
+    @action(detail=False, methods=["post"], url_path="bulk", url_name="bulk")
+    def bulk_retrieve(self, request, *args, **kwargs):
+        """
+        Returns the detail of every resource from a list of ansible_ids, ansible_ids that are not found are left out.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        resources = self.get_queryset().filter(ansible_id__in=serializer.validated_data["ansible_ids"]).prefetch_related("content_object")
+        return Response({"results": ResourceSerializer(resources, many=True, context=self.get_serializer_context()).data})
+
     def perform_destroy(self, instance):
         instance.delete_resource()
 
@@ -116,21 +145,51 @@ class ResourceTypeViewSet(
     lookup_field = "name"
     lookup_value_regex = "[^/]+"
 
-    def serialize_resources_hashes(self, resources_qs, serializer_class):
+    def iter_resources_hashes(self, resources_qs):
+        """A generator of the ansible_id and resource_hash of resources, computing hashes that are missing"""
+        for pk, ansible_id, resource_hash in resources_qs.values_list("pk", "ansible_id", "resource_hash").iterator(chunk_size=2000):
+            if resource_hash is None:
+                # Hash was never computed or was invalidated, compute and store it
+                resource = Resource.objects.get(pk=pk)
+                resource_hash = resource.get_content_hash()
+                Resource.objects.filter(pk=pk).update(resource_hash=resource_hash)
+            yield (ansible_id, resource_hash)
+
+    def serialize_resources_hashes(self, resources_qs):
         """A generator that yields str sequences for csv stream response"""
         yield ("ansible_id", "resource_hash")
-        for resource in resources_qs:
-            yield (resource.ansible_id, serializer_class(resource.content_object).get_hash())
+        yield from self.iter_resources_hashes(resources_qs)
+
+    def serialize_resources_changes(self, resources_qs, deletions_qs):
+        """A generator that yields str sequences for csv stream response of the changes since a point in time"""
+        yield ("ansible_id", "resource_hash", "deleted")
+        for ansible_id, resource_hash in self.iter_resources_hashes(resources_qs):
+            yield (ansible_id, resource_hash, "false")
+        for ansible_id in deletions_qs.values_list("ansible_id", flat=True).distinct().iterator(chunk_size=2000):
+            yield (ansible_id, "", "true")
 
     @action(detail=True, methods=["get"])
     def manifest(self, request, name, *args, **kwargs):
         """
         Returns the as a stream the csv of resource_id,hash for a given resource type.
+
+        With the `since` parameter, only resources changed since that cursor are listed,
+        along with the ansible_id of resources deleted since then.
+        The cursor for the next request is given in the X-Manifest-Cursor header.
         """
+        cursor = timezone.now()
         resource_type = get_object_or_404(ResourceType, name=name)
         if not resource_type.serializer_class:  # pragma: no cover
             return HttpResponseNotFound()
 
+        since = None
+        if since_param := request.query_params.get('since'):
+            since = parse_datetime(since_param)
+            if since is None or timezone.is_naive(since):
+                return Response({"since": "Must be a cursor from the X-Manifest-Cursor header of a previous manifest."}, status=400)
+            if since < ResourceDeletion.retention_cutoff():
+                return Response({"since": "Cursor is older than the records of deleted resources, request the full manifest."}, status=410)
+
         if 'service_id' in request.query_params:
             if request.query_params['service_id'] == 'all':
                 service_filter = {}
@@ -139,15 +198,25 @@ class ResourceTypeViewSet(
         else:
             service_filter = {'service_id': service_id()}
 
-        resources = Resource.objects.filter(content_type__resource_type=resource_type, **service_filter).prefetch_related("content_object")
+        resources = Resource.objects.filter(content_type__resource_type=resource_type, **service_filter).order_by("pk")
 
         if name == "shared.user" and (system_user := getattr(settings, "SYSTEM_USERNAME", None)):
             resources = resources.exclude(name=system_user)
 
-        if not resources:
+        headers = {"Cache-Control": "no-cache", "X-Manifest-Cursor": cursor.isoformat()}
+
+        if since is not None:
+            since = since - MANIFEST_CURSOR_OVERLAP
+            ResourceDeletion.delete_expired()
+            deletions = ResourceDeletion.objects.filter(content_type_id=resource_type.content_type_id, deleted__gte=since, **service_filter)
+            # a resource can be created again with the same ansible_id after it was deleted
+            deletions = deletions.exclude(ansible_id__in=Resource.objects.values("ansible_id"))
+            return CSVStreamResponse(self.serialize_resources_changes(resources.filter(modified__gte=since), deletions), headers=headers).stream()
+
+        if not resources.exists():
             return HttpResponseNotFound()
 
-        return CSVStreamResponse(self.serialize_resources_hashes(resources, resource_type.serializer_class)).stream()
+        return CSVStreamResponse(self.serialize_resources_hashes(resources), headers=headers).stream()
 
 
 class ServiceMetadataView(
@@ -0,0 +1,173 @@
+import json
+import time
+from contextlib import contextmanager
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from ansible_base.rbac.caching import compute_object_role_permissions
+from ansible_base.rbac.models import ObjectRole, RoleDefinition, RoleEvaluation
+from test_app.models import Inventory, Organization, Team, User
+
+
+class Rollback(Exception):
+    "Raised to undo the data created by a benchmark run"
+
+
+class RBACScaleData:
+    """
+    Synthetic graph of organizations, nested teams, users, and inventories for timing the RBAC system.
+    In each organization, teams form a chain where each team is a member of the next one.
+    """
+
+    def __init__(self, organizations=10, teams=5, users=10, inventories=10, prefix='benchmark'):
+        self.counts = {'organizations': organizations, 'teams': teams, 'users': users, 'inventories': inventories}
+        self.prefix = prefix
+        self.results = {}
+        self.orgs = []
+        self.teams = {}
+        self.users = {}
+
+    def get_role_definitions(self):
+        RoleDefinition.objects.managed.clear()
+        self.member_rd = RoleDefinition.objects.managed.team_member
+        self.org_inv_rd, _ = RoleDefinition.objects.get_or_create(
+            name=f'{self.prefix} organization inventory admin',
+            permissions=['view_organization', 'add_inventory', 'change_inventory', 'view_inventory'],
+            defaults={'content_type': ContentType.objects.get_for_model(Organization)},
+        )
+        self.inv_rd, _ = RoleDefinition.objects.get_or_create(
+            name=f'{self.prefix} inventory admin',
+            permissions=['change_inventory', 'view_inventory'],
+            defaults={'content_type': ContentType.objects.get_for_model(Inventory)},
+        )
+
+    @contextmanager
+    def measure(self, name, operations=1):
+        "Record the time and number of queries taken by the block as a result"
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            yield
+            seconds = time.perf_counter() - start
+        self.results[name] = {'seconds': round(seconds, 6), 'queries': len(queries), 'operations': operations}
+
+    def create_actors(self):
+        for org_idx in range(self.counts['organizations']):
+            org = Organization.objects.create(name=f'{self.prefix}_org_{org_idx}')
+            self.orgs.append(org)
+            self.teams[org.pk] = [Team.objects.create(name=f'{self.prefix}_team_{org_idx}_{i}', organization=org) for i in range(self.counts['teams'])]
+            self.users[org.pk] = [User.objects.create(username=f'{self.prefix}_user_{org_idx}_{i}') for i in range(self.counts['users'])]
+
+    def grant_roles(self):
+        "Users become members of the first team in each chain, and that team is given the organization role"
+        operations = len(self.orgs) * (self.counts['users'] + min(self.counts['teams'], 1))
+        with self.measure('role_grants', operations=operations):
+            for org in self.orgs:
+                teams = self.teams[org.pk]
+                for user in self.users[org.pk]:
+                    if teams:
+                        self.member_rd.give_permission(user, teams[0])
+                    else:
+                        self.org_inv_rd.give_permission(user, org)
+                if teams:
+                    self.org_inv_rd.give_permission(teams[0], org)
+
+    def change_team_parents(self):
+        "Nest each team inside of the next team in its chain, then remove and restore the link at the top of the chain"
+        pairs = [(parent, child) for org in self.orgs for parent, child in zip(self.teams[org.pk], self.teams[org.pk][1:])]
+        with self.measure('team_parent_changes', operations=len(pairs)):
+            for parent, child in pairs:
+                self.member_rd.give_permission(parent, child)
+        tops = [self.teams[org.pk][:2] for org in self.orgs if len(self.teams[org.pk]) > 1]
+        with self.measure('team_parent_removals', operations=len(tops)):
+            for parent, child in tops:
+                self.member_rd.remove_permission(parent, child)
+        for parent, child in tops:
+            self.member_rd.give_permission(parent, child)
+
+    def create_objects(self):
+        operations = len(self.orgs) * self.counts['inventories']
+        with self.measure('object_creation', operations=operations):
+            for org_idx, org in enumerate(self.orgs):
+                for i in range(self.counts['inventories']):
+                    Inventory.objects.create(name=f'{self.prefix}_inv_{org_idx}_{i}', organization=org)
+        with self.measure('object_role_grants', operations=len(self.orgs)):
+            for org in self.orgs:
+                inventory = org.inventories.first()
+                if inventory and self.users[org.pk]:
+                    self.inv_rd.give_permission(self.users[org.pk][-1], inventory)
+
+    def full_rebuild(self):
+        with self.measure('full_rebuild', operations=ObjectRole.objects.count()):
+            compute_object_role_permissions()
+
+    def access_queries(self):
+        "Use the first user of each organization, who has permission to inventories through the team chain"
+        samples = [(self.users[org.pk][0], org.inventories.first()) for org in self.orgs if self.users[org.pk]]
+        with self.measure('access_qs', operations=len(samples)):
+            for user, _ in samples:
+                list(Inventory.access_qs(user, 'change').values_list('id', flat=True))
+        with self.measure('has_obj_perm', operations=len(samples)):
+            for user, inventory in samples:
+                if inventory:
+                    user.has_obj_perm(inventory, 'change_inventory')
+
+    def run(self):
+        self.get_role_definitions()
+        with self.measure('create_actors', operations=self.counts['organizations'] * (1 + self.counts['teams'] + self.counts['users'])):
+            self.create_actors()
+        self.grant_roles()
+        self.change_team_parents()
+        self.create_objects()
+        self.full_rebuild()
+        self.access_queries()
+        return self.report()
+
+    def report(self):
+        return {
+            'database': connection.vendor,
+            'counts': self.counts,
+            'totals': {
+                'object_roles': ObjectRole.objects.count(),
+                'role_evaluations': RoleEvaluation.objects.count(),
+            },
+            'results': self.results,
+        }
+
+
+class Command(BaseCommand):
+    help = 'Generates synthetic RBAC data at a configurable scale and reports timings of RBAC operations as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organizations', type=int, default=10, help='Number of organizations to create')
+        parser.add_argument('--teams', type=int, default=5, help='Number of nested teams to create in each organization')
+        parser.add_argument('--users', type=int, default=10, help='Number of users to create for each organization')
+        parser.add_argument('--inventories', type=int, default=10, help='Number of inventories to create in each organization')
+        parser.add_argument('--output', help='File to write the JSON report to, default is stdout')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated data, by default it is rolled back')
+
+    def handle(self, *args, **options):
+        data = RBACScaleData(
+            organizations=options.get('organizations', 10),
+            teams=options.get('teams', 5),
+            users=options.get('users', 10),
+            inventories=options.get('inventories', 10),
+        )
+        try:
+            with transaction.atomic():
+                report = data.run()
+                if not options.get('keep'):
+                    raise Rollback()
+        except Rollback:
+            pass
+        RoleDefinition.objects.managed.clear()
+
+        content = json.dumps(report, indent=2, sort_keys=True)
+        if options.get('output'):
+            with open(options['output'], 'w') as f:
+                f.write(content)
+            self.stderr.write(f'Wrote RBAC benchmark report to {options["output"]}')
+        else:
+            self.stdout.write(content)
@@ -25,6 +25,7 @@ from ansible_base.lib.testing.fixtures import *  # noqa: F403, F401
 from ansible_base.lib.testing.util import copy_fixture, delete_authenticator
 from ansible_base.oauth2_provider.fixtures import *  # noqa: F403, F401
 from ansible_base.rbac import permission_registry
+from ansible_base.rbac.evaluations import bump_rbac_version
 from ansible_base.rbac.models import RoleDefinition
 from test_app import models
 
@@ -77,6 +78,12 @@ def clear_content_type_cache():
     ContentType.objects.clear_cache()
 
 
+@pytest.fixture(autouse=True)
+def clear_rbac_cache():
+    """Database ids are re-used between tests, so global permissions cached for an old user should not be used"""
+    bump_rbac_version()
+
+
 @pytest.fixture
 def azuread_configuration():
     return {
@@ -1,5 +1,6 @@
 import logging
 import re
+import time
 from datetime import datetime, timedelta
 from functools import partial
 from unittest import mock
@@ -11,6 +12,8 @@ from jwt.exceptions import DecodeError
 from rest_framework.exceptions import AuthenticationFailed
 
 from ansible_base.jwt_consumer.common.auth import JWTAuthentication, JWTCommonAuth, default_mapped_user_fields
+from ansible_base.jwt_consumer.common.cache import cache as jwt_cache
+from ansible_base.jwt_consumer.common.cache import user_state_key_prefix, verified_tokens
 from ansible_base.jwt_consumer.common.cert import JWTCert, JWTCertException
 from ansible_base.lib.utils.translations import translatableConditionally as _
 from ansible_base.rbac.models import RoleDefinition, RoleUserAssignment
@@ -579,3 +582,189 @@ class TestJWTAuthentication:
             authentication.use_rbac_permissions = True
             authentication.process_permissions()
             mp.assert_called_once()
+
+
+class TestVerifiedTokenCache:
+    @pytest.mark.django_db
+    def test_repeated_token_is_not_verified_again(self, mocked_http, test_encryption_public_key, jwt_token):
+        with override_settings(ANSIBLE_BASE_JWT_KEY=test_encryption_public_key):
+            request = mocked_http.mocked_parse_jwt_token_get_request('with_headers')
+            common_auth = JWTCommonAuth()
+            common_auth.parse_jwt_token(request)
+            user = common_auth.user
+
+            with mock.patch('ansible_base.jwt_consumer.common.auth.JWTCommonAuth.validate_token') as validate_token:
+                with mock.patch('ansible_base.jwt_consumer.common.auth.JWTCert.get_decryption_key') as get_decryption_key:
+                    common_auth = JWTCommonAuth()
+                    common_auth.parse_jwt_token(request)
+            validate_token.assert_not_called()
+            get_decryption_key.assert_not_called()
+            assert common_auth.user == user
+            assert common_auth.token['sub'] == jwt_token.unencrypted_token['sub']
+
+    @pytest.mark.django_db
+    def test_expired_token_is_verified_again(self, mocked_http, test_encryption_public_key):
+        with override_settings(ANSIBLE_BASE_JWT_KEY=test_encryption_public_key):
+            request = mocked_http.mocked_parse_jwt_token_get_request('with_headers')
+            JWTCommonAuth().parse_jwt_token(request)
+            for entry in verified_tokens.entries.values():
+                entry['claims'] = dict(entry['claims'], exp=int(time.time()) - 1)
+
+            with mock.patch('ansible_base.jwt_consumer.common.auth.JWTCommonAuth.validate_token', side_effect=AuthenticationFailed('JWT has expired')):
+                with pytest.raises(AuthenticationFailed):
+                    JWTCommonAuth().parse_jwt_token(request)
+            assert not verified_tokens.entries
+
+    @pytest.mark.django_db
+    def test_deleted_user_is_not_used(self, mocked_http, test_encryption_public_key):
+        with override_settings(ANSIBLE_BASE_JWT_KEY=test_encryption_public_key):
+            request = mocked_http.mocked_parse_jwt_token_get_request('with_headers')
+            common_auth = JWTCommonAuth()
+            common_auth.parse_jwt_token(request)
+            common_auth.user.delete()
+
+            with mock.patch('ansible_base.jwt_consumer.common.auth.JWTCommonAuth.validate_token', wraps=common_auth.validate_token) as validate_token:
+                common_auth = JWTCommonAuth()
+                common_auth.parse_jwt_token(request)
+            validate_token.assert_called_once()
+            assert common_auth.user.pk is not None
+
+    @pytest.mark.django_db
+    def test_disabled_token_cache(self, mocked_http, test_encryption_public_key):
+        with override_settings(ANSIBLE_BASE_JWT_KEY=test_encryption_public_key, ANSIBLE_BASE_JWT_TOKEN_CACHE_SIZE=0):
+            request = mocked_http.mocked_parse_jwt_token_get_request('with_headers')
+            JWTCommonAuth().parse_jwt_token(request)
+            assert not verified_tokens.entries
+            assert verified_tokens.get(request.headers['X-DAB-JW-TOKEN']) is None
+
+    def test_least_recently_used_tokens_are_removed(self):
+        claims = {'exp': int(time.time()) + 60}
+        with override_settings(ANSIBLE_BASE_JWT_TOKEN_CACHE_SIZE=2):
+            verified_tokens.set('token1', claims, 1)
+            verified_tokens.set('token2', claims, 2)
+            assert verified_tokens.get('token1')['user_id'] == 1
+            verified_tokens.set('token3', claims, 3)
+            assert verified_tokens.get('token2') is None
+            assert verified_tokens.get('token1')['user_id'] == 1
+            assert verified_tokens.get('token3')['user_id'] == 3
+
+    def test_shared_token_cache(self):
+        claims = {'exp': int(time.time()) + 60}
+        with override_settings(ANSIBLE_BASE_JWT_SHARED_TOKEN_CACHE=True):
+            verified_tokens.set(f'token-{uuid4()}', claims, 1)
+            token = f'token-{uuid4()}'
+            verified_tokens.set(token, claims, 2)
+            # Another process only has the entry in the shared cache
+            verified_tokens.clear()
+            assert verified_tokens.get(token) == {'claims': claims, 'user_id': 2}
+            assert len(verified_tokens.entries) == 1
+
+
+@pytest.mark.django_db
+class TestUserState:
+    @pytest.fixture
+    def authenticated(self, mocked_http, test_encryption_public_key):
+        "Authenticate once so the user is provisioned, later tokens are not in the verified token cache"
+        with override_settings(ANSIBLE_BASE_JWT_KEY=test_encryption_public_key):
+            common_auth = JWTCommonAuth()
+            common_auth.parse_jwt_token(mocked_http.mocked_parse_jwt_token_get_request('with_headers'))
+            verified_tokens.clear()
+            yield common_auth
+
+    def test_unchanged_user_is_not_provisioned_again(self, authenticated, mocked_http, django_assert_num_queries):
+        request = mocked_http.mocked_parse_jwt_token_get_request('with_headers')
+        common_auth = JWTCommonAuth()
+        with mock.patch.object(jwt_cache, 'get', wraps=jwt_cache.get) as cache_get:
+            with mock.patch.object(jwt_cache, 'set') as cache_set, mock.patch.object(jwt_cache, 'add') as cache_add:
+                with mock.patch.object(JWTCommonAuth, 'provision_user') as provision_user:
+                    with django_assert_num_queries(1):
+                        common_auth.parse_jwt_token(request)
+        provision_user.assert_not_called()
+        cache_get.assert_called_once()
+        cache_set.assert_not_called()
+        cache_add.assert_not_called()
+        assert common_auth.user == authenticated.user
+
+    def test_changed_user_data_is_provisioned_again(self, authenticated, mocked_http, jwt_token):
+        jwt_token.unencrypted_token['user_data']['first_name'] = 'jack'
+        request = mocked_http.mocked_parse_jwt_token_get_request('with_headers')
+        common_auth = JWTCommonAuth()
+        with mock.patch.object(JWTCommonAuth, 'provision_user', autospec=True, side_effect=JWTCommonAuth.provision_user) as provision_user:
+            common_auth.parse_jwt_token(request)
+        provision_user.assert_called_once()
+        assert common_auth.user == authenticated.user
+
+    def test_wait_for_user_provisioned_by_another_request(self, authenticated, mocked_http, jwt_token):
+        sub = jwt_token.unencrypted_token['sub']
+        state = authenticated.cache.get_user_state(sub)
+        jwt_cache.delete(f'{user_state_key_prefix}{sub}')
+        assert authenticated.cache.acquire_user_lock(sub)
+
+        def other_request_finished(seconds):
+            authenticated.cache.set_user_state(sub, state)
+
+        request = mocked_http.mocked_parse_jwt_token_get_request('with_headers')
+        common_auth = JWTCommonAuth()
+        with mock.patch('ansible_base.jwt_consumer.common.auth.time.sleep', side_effect=other_request_finished):
+            with mock.patch.object(JWTCommonAuth, 'provision_user') as provision_user:
+                common_auth.parse_jwt_token(request)
+        provision_user.assert_not_called()
+        assert common_auth.user == authenticated.user
+
+    def test_provision_user_when_lock_is_not_released(self, mocked_http, test_encryption_public_key, jwt_token, caplog):
+        JWTCommonAuth().cache.acquire_user_lock(jwt_token.unencrypted_token['sub'])
+        with override_settings(ANSIBLE_BASE_JWT_KEY=test_encryption_public_key, ANSIBLE_BASE_JWT_USER_LOCK_TIMEOUT_SECONDS=0):
+            common_auth = JWTCommonAuth()
+            with caplog.at_level(logging.WARNING):
+                common_auth.parse_jwt_token(mocked_http.mocked_parse_jwt_token_get_request('with_headers'))
+        assert 'Timed out waiting for another request to provision user' in caplog.text
+        assert str(common_auth.user.resource.ansible_id) == jwt_token.unencrypted_token['sub']
+
+
+@pytest.mark.django_db
+class TestRBACClaimsDigest:
+    @pytest.fixture
+    def authentication(self, admin_user, organization, organization_admin_role):
+        RoleDefinition.objects.get_or_create(name='Platform Auditor', defaults={'managed': True})
+        authentication = JWTCommonAuth()
+        authentication.user = admin_user
+        authentication.token = {
+            'objects': {'organization': [{'ansible_id': str(organization.resource.ansible_id), 'name': organization.name}]},
+            'object_roles': {organization_admin_role.name: {'content_type': 'organization', 'objects': [0]}},
+            'global_roles': ['Platform Auditor'],
+        }
+        return authentication
+
+    def test_unchanged_claims_are_not_reconciled(self, authentication, admin_user, django_assert_max_num_queries):
+        authentication.process_rbac_permissions()
+        assert RoleUserAssignment.objects.filter(user=admin_user).count() == 2
+
+        with mock.patch.object(JWTCommonAuth, 'reconcile_rbac_permissions') as reconcile:
+            with django_assert_max_num_queries(1):
+                authentication.process_rbac_permissions()
+        reconcile.assert_not_called()
+
+    def test_changed_claims_are_reconciled(self, authentication, admin_user):
+        authentication.process_rbac_permissions()
+        authentication.token = dict(authentication.token, global_roles=[])
+        authentication.process_rbac_permissions()
+        assert RoleUserAssignment.objects.filter(user=admin_user).count() == 1
+
+    def test_local_removal_is_reconciled(self, authentication, admin_user, organization, organization_admin_role):
+        authentication.process_rbac_permissions()
+        organization_admin_role.remove_permission(admin_user, organization)
+
+        authentication.process_rbac_permissions()
+        assert RoleUserAssignment.objects.filter(user=admin_user, role_definition=organization_admin_role).count() == 1
+
+    def test_object_roles_given_in_bulk(self, authentication, admin_user, organization_admin_role):
+        organizations = [Organization.objects.create(name=f'bulk-org-{i}') for i in range(3)]
+        authentication.token['objects']['organization'] = [{'ansible_id': str(org.resource.ansible_id), 'name': org.name} for org in organizations]
+        authentication.token['object_roles'][organization_admin_role.name]['objects'] = [0, 1, 2]
+
+        with mock.patch.object(RoleDefinition, 'give_permission_bulk', autospec=True, side_effect=RoleDefinition.give_permission_bulk) as give_bulk:
+            authentication.process_rbac_permissions()
+        give_bulk.assert_called_once()
+        assert set(RoleUserAssignment.objects.filter(user=admin_user, role_definition=organization_admin_role).values_list('object_id', flat=True)) == set(
+            str(org.pk) for org in organizations
+        )
@@ -1,11 +1,14 @@
+import time
 from unittest import mock
 from urllib.parse import urlparse
 
 import pytest
 import requests
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
 from django.conf import settings
 from django.test import override_settings
 
+from ansible_base.jwt_consumer.common import cert
 from ansible_base.jwt_consumer.common.cert import JWTCert, JWTCertException
 
 
@@ -175,3 +178,72 @@ class TestJWTCert:
                 cert.get_decryption_key()
                 assert cert.key == test_encryption_public_key
                 assert cert.cached is False
+
+
+class TestLocalKeyCache:
+    @pytest.fixture(autouse=True)
+    def clear_local_keys(self):
+        cert.local_keys.clear()
+        yield
+        cert.local_keys.clear()
+
+    def test_local_key_skips_shared_cache(self, test_encryption_public_key):
+        with override_settings(ANSIBLE_BASE_JWT_KEY=test_encryption_public_key):
+            first_cert = JWTCert()
+            first_cert.get_decryption_key(ignore_cache=True)
+            assert isinstance(first_cert.public_key, RSAPublicKey)
+
+            with mock.patch('ansible_base.jwt_consumer.common.cert.JWTCache.get_key_from_cache') as get_key_from_cache:
+                with mock.patch('ansible_base.jwt_consumer.common.cert.load_public_key') as load:
+                    second_cert = JWTCert()
+                    second_cert.get_decryption_key()
+            get_key_from_cache.assert_not_called()
+            load.assert_not_called()
+            assert second_cert.cached is True
+            assert second_cert.key == test_encryption_public_key
+            assert second_cert.public_key is first_cert.public_key
+
+    def test_expired_local_key_with_same_fingerprint_is_not_parsed(self, test_encryption_public_key):
+        with override_settings(ANSIBLE_BASE_JWT_KEY=test_encryption_public_key):
+            first_cert = JWTCert()
+            first_cert.get_decryption_key(ignore_cache=True)
+            cert.local_keys[test_encryption_public_key].loaded -= 3600
+
+            with mock.patch('ansible_base.jwt_consumer.common.cert.JWTCache.get_key_from_cache', return_value=test_encryption_public_key) as get_key_from_cache:
+                with mock.patch('ansible_base.jwt_consumer.common.cert.load_public_key') as load:
+                    second_cert = JWTCert()
+                    second_cert.get_decryption_key()
+            get_key_from_cache.assert_called_once()
+            load.assert_not_called()
+            assert second_cert.public_key is first_cert.public_key
+            assert cert.local_keys[test_encryption_public_key].loaded > time.monotonic() - 60
+
+    def test_changed_key_is_parsed(self, test_encryption_public_key, random_public_key):
+        with override_settings(ANSIBLE_BASE_JWT_KEY=test_encryption_public_key):
+            first_cert = JWTCert()
+            first_cert.get_decryption_key(ignore_cache=True)
+            cert.local_keys[test_encryption_public_key].loaded -= 3600
+
+            with mock.patch('ansible_base.jwt_consumer.common.cert.JWTCache.get_key_from_cache', return_value=random_public_key):
+                second_cert = JWTCert()
+                second_cert.get_decryption_key()
+            assert second_cert.key == random_public_key
+            assert second_cert.public_key is not first_cert.public_key
+            assert cert.local_keys[test_encryption_public_key].fingerprint == cert.get_key_fingerprint(random_public_key)
+
+    def test_ignore_cache_skips_local_key(self, test_encryption_public_key):
+        with override_settings(ANSIBLE_BASE_JWT_KEY=test_encryption_public_key):
+            JWTCert().get_decryption_key(ignore_cache=True)
+            second_cert = JWTCert()
+            second_cert.get_decryption_key(ignore_cache=True)
+            assert second_cert.cached is False
+
+    def test_public_key_follows_key(self, test_encryption_public_key, random_public_key):
+        jwt_cert = JWTCert()
+        assert jwt_cert.public_key is None
+        jwt_cert.key = test_encryption_public_key
+        first_public_key = jwt_cert.public_key
+        jwt_cert.key = random_public_key
+        assert jwt_cert.public_key is not first_public_key
+        jwt_cert.key = 'not a key'
+        assert jwt_cert.public_key == 'not a key'
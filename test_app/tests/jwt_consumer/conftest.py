@@ -0,0 +1,23 @@
+import pytest
+
+from ansible_base.jwt_consumer.common.cache import JWTCache, cache, user_state_key_prefix, verified_tokens
+
+# The subject of the tokens made by the jwt_token fixture
+jwt_token_sub = '1e3de989-5286-48a6-83d4-5de9a6618ffd'
+
+
+@pytest.fixture(autouse=True)
+def clear_verified_tokens():
+    "Tokens made by the jwt_token fixture in the same second are equal, so tests should not share verified tokens"
+    verified_tokens.clear()
+    yield
+    verified_tokens.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_user_state():
+    "The user provisioned for the jwt_token fixture is rolled back after each test, so its state must not be used by the next one"
+    cache.delete(f'{user_state_key_prefix}{jwt_token_sub}')
+    JWTCache().release_user_lock(jwt_token_sub)
+    yield
+    cache.delete(f'{user_state_key_prefix}{jwt_token_sub}')
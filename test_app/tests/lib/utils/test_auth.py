@@ -1,10 +1,11 @@
 from unittest.mock import patch
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import pytest
 from django.core.exceptions import ImproperlyConfigured
 
-from ansible_base.lib.utils.auth import get_model_from_settings, get_object_by_ansible_id, get_user_by_ansible_id
+from ansible_base.lib.utils.auth import get_model_from_settings, get_object_by_ansible_id, get_user_by_ansible_id, get_users_by_ansible_ids
+from ansible_base.resource_registry.models import Resource
 from test_app.models import Organization, User
 
 
@@ -66,3 +67,31 @@ def test_get_by_ansible_id(organization, arg_type):
         uuid_obj = arg_type(resource.ansible_id)
     assert isinstance(uuid_obj, arg_type)
     assert get_object_by_ansible_id(Organization.objects.all(), organization.resource.ansible_id) == organization
+
+
+@pytest.mark.django_db
+def test_get_by_ansible_id_cached_pk(organization, django_assert_num_queries):
+    get_object_by_ansible_id(Organization.objects.all(), organization.resource.ansible_id)
+    with django_assert_num_queries(1):
+        assert get_object_by_ansible_id(Organization.objects.all(), organization.resource.ansible_id) == organization
+
+
+@pytest.mark.django_db
+def test_get_by_ansible_id_cached_pk_changed_ansible_id(organization):
+    old_ansible_id = organization.resource.ansible_id
+    get_object_by_ansible_id(Organization.objects.all(), old_ansible_id)
+    Resource.objects.filter(pk=organization.resource.pk).update(ansible_id=uuid4())
+
+    with pytest.raises(Organization.DoesNotExist):
+        get_object_by_ansible_id(Organization.objects.all(), old_ansible_id)
+
+
+@pytest.mark.django_db
+def test_get_users_by_ansible_ids(django_assert_num_queries):
+    users = [User.objects.create(username=f'bob-{i}') for i in range(3)]
+    ansible_ids = [user.resource.ansible_id for user in users]
+    missing_ansible_id = uuid4()
+    with django_assert_num_queries(2):
+        found = get_users_by_ansible_ids(ansible_ids + [missing_ansible_id])
+    assert found == {str(user.resource.ansible_id): user for user in users}
+    assert get_users_by_ansible_ids([]) == {}
@@ -2,7 +2,9 @@ import pytest
 from django.test.utils import override_settings
 
 from ansible_base.lib.utils.response import get_relative_url
-from ansible_base.rbac.models import RoleDefinition
+from ansible_base.rbac.api.serializers import RoleBulkAssignmentSerializer
+from ansible_base.rbac.models import RoleDefinition, RoleUserAssignment
+from test_app.models import Inventory, User
 
 
 @pytest.mark.django_db
@@ -190,3 +192,55 @@ def test_role_definitions_post_disabled_by_settings(admin_api_client):
     assert response.status_code == 200, response.data
     print(response.data)
     assert 'POST' not in response.data.get('actions', {})
+
+
+@pytest.mark.django_db
+class TestBulkAssignmentView:
+    def test_bulk_assign(self, admin_api_client, inv_rd, organization, team):
+        users = [User.objects.create(username=f'user-{i}') for i in range(3)]
+        inventories = [Inventory.objects.create(name=f'inv-{i}', organization=organization) for i in range(2)]
+        url = get_relative_url('role-bulk-assignments')
+        data = dict(role_definition=inv_rd.id, users=[u.id for u in users], teams=[team.id], object_ids=[str(inv.id) for inv in inventories])
+        response = admin_api_client.post(url, data=data, format="json")
+        assert response.status_code == 201, response.data
+        assert len(response.data['user_assignments']) == 6
+        assert len(response.data['team_assignments']) == 2
+        assert all(user.has_obj_perm(inventories[1], 'change') for user in users)
+
+    def test_bulk_assign_missing_object(self, admin_api_client, inv_rd, rando, inventory):
+        url = get_relative_url('role-bulk-assignments')
+        data = dict(role_definition=inv_rd.id, users=[rando.id], object_ids=[str(inventory.id), '9999'])
+        response = admin_api_client.post(url, data=data, format="json")
+        assert response.status_code == 400, response.data
+        assert '9999' in str(response.data['object_ids'])
+        assert not RoleUserAssignment.objects.exists()
+
+    def test_bulk_assign_normalized_ids(self, admin_api_client, inv_rd, rando, inventory):
+        url = get_relative_url('role-bulk-assignments')
+        data = dict(role_definition=inv_rd.id, users=[rando.id], object_ids=[f'0{inventory.id}'])
+        response = admin_api_client.post(url, data=data, format="json")
+        assert response.status_code == 201, response.data
+        assert rando.has_obj_perm(inventory, 'change')
+
+    def test_bulk_assign_actors_validated_with_one_query(self, inv_rd, organization, team, inventory, django_assert_num_queries):
+        users = [User.objects.create(username=f'user-{i}') for i in range(5)]
+        data = dict(role_definition=inv_rd.id, users=[u.id for u in users] + [9999], teams=[team.id], object_ids=[str(inventory.id)])
+        serializer = RoleBulkAssignmentSerializer(data=data)
+        # the role definition, the users, and the teams
+        with django_assert_num_queries(3):
+            assert not serializer.is_valid()
+        assert list(serializer.errors) == ['users']
+        assert '9999' in str(serializer.errors['users'])
+
+    def test_bulk_assign_no_actors(self, admin_api_client, inv_rd, inventory):
+        url = get_relative_url('role-bulk-assignments')
+        response = admin_api_client.post(url, data=dict(role_definition=inv_rd.id, object_ids=[str(inventory.id)]), format="json")
+        assert response.status_code == 400, response.data
+
+    def test_bulk_assign_no_permission(self, user_api_client, user, inv_rd, view_inv_rd, rando, inventory):
+        view_inv_rd.give_permission(user, inventory)
+        url = get_relative_url('role-bulk-assignments')
+        data = dict(role_definition=inv_rd.id, users=[user.id], object_ids=[str(inventory.id)])
+        response = user_api_client.post(url, data=data, format="json")
+        assert response.status_code == 403, response.data
+        assert not user.has_obj_perm(inventory, 'change')
@@ -0,0 +1,77 @@
+import itertools
+
+import pytest
+
+from ansible_base.rbac.caching import compute_object_role_permissions
+from ansible_base.rbac.models import RoleEvaluation
+from test_app.management.commands.rbac_benchmark import RBACScaleData
+from test_app.models import Inventory, Team, User
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.fixture
+def scale_data():
+    "A small version of the graph made by the rbac_benchmark command, run with --benchmark-json to get a report"
+    data = RBACScaleData(organizations=3, teams=3, users=5, inventories=5)
+    data.get_role_definitions()
+    data.create_actors()
+    data.grant_roles()
+    data.change_team_parents()
+    data.create_objects()
+    return data
+
+
+@pytest.mark.django_db
+def test_role_grant(benchmark, scale_data):
+    org = scale_data.orgs[0]
+    counter = itertools.count()
+
+    def new_user():
+        return (User.objects.create(username=f'grant-{next(counter)}'), org), {}
+
+    benchmark.pedantic(scale_data.org_inv_rd.give_permission, setup=new_user, rounds=10)
+    # benchmarks only run once when running tests in parallel
+    assert scale_data.org_inv_rd.object_roles.get(object_id=org.pk).users.count() == next(counter)
+
+
+@pytest.mark.django_db
+def test_team_parent_change(benchmark, scale_data):
+    org = scale_data.orgs[0]
+    parent = Team.objects.create(name='new-parent', organization=org)
+    top_team = scale_data.teams[org.pk][-1]
+
+    def give_and_remove():
+        scale_data.member_rd.give_permission(parent, top_team)
+        scale_data.member_rd.remove_permission(parent, top_team)
+
+    benchmark(give_and_remove)
+    assert not scale_data.member_rd.object_roles.filter(teams=parent).exists()
+
+
+@pytest.mark.django_db
+def test_object_creation(benchmark, scale_data):
+    org = scale_data.orgs[0]
+    counter = itertools.count()
+
+    def create_inventory():
+        return Inventory.objects.create(name=f'new-inv-{next(counter)}', organization=org)
+
+    inventory = benchmark(create_inventory)
+    assert scale_data.users[org.pk][0].has_obj_perm(inventory, 'change_inventory')
+
+
+@pytest.mark.django_db
+def test_full_rebuild(benchmark, scale_data):
+    expected = set(RoleEvaluation.objects.values_list('role_id', 'codename', 'object_id'))
+    benchmark(compute_object_role_permissions)
+    assert set(RoleEvaluation.objects.values_list('role_id', 'codename', 'object_id')) == expected
+
+
+@pytest.mark.django_db
+def test_access_qs(benchmark, scale_data):
+    org = scale_data.orgs[0]
+    user = scale_data.users[org.pk][0]
+
+    inventory_ids = benchmark(lambda: list(Inventory.access_qs(user, 'change').values_list('id', flat=True)))
+    assert set(inventory_ids) == set(org.inventories.values_list('id', flat=True))
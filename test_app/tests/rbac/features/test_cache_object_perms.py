@@ -0,0 +1,53 @@
+import pytest
+from django.test import override_settings
+
+from ansible_base.rbac.models import RoleEvaluation
+from test_app.models import Inventory
+
+
+@pytest.mark.django_db
+@override_settings(ANSIBLE_BASE_CACHE_OBJECT_PERMISSIONS=True)
+def test_object_permissions_loaded_once(rando, organization, org_inv_change_rd, django_assert_num_queries):
+    inventories = [Inventory.objects.create(name=f'inv-{i}', organization=organization) for i in range(5)]
+    org_inv_change_rd.give_permission(rando, organization)
+    rando.has_obj_perm(organization, 'view_organization')  # load any global permissions
+
+    with django_assert_num_queries(1):
+        for inv in inventories:
+            assert rando.has_obj_perm(inv, 'change_inventory')
+            assert not rando.has_obj_perm(inv, 'delete_inventory')
+
+
+@pytest.mark.django_db
+@override_settings(ANSIBLE_BASE_CACHE_OBJECT_PERMISSIONS=True)
+def test_object_permissions_cleared_by_triggers(rando, organization, inventory, org_inv_rd, inv_rd):
+    assert not rando.has_obj_perm(inventory, 'change_inventory')
+
+    inv_rd.give_permission(rando, inventory)
+    assert rando.has_obj_perm(inventory, 'change_inventory')
+
+    inv_rd.remove_permission(rando, inventory)
+    assert not rando.has_obj_perm(inventory, 'change_inventory')
+
+    # new child object of an organization the user has a role to
+    org_inv_rd.give_permission(rando, organization)
+    new_inv = Inventory.objects.create(name='new-inv', organization=organization)
+    assert rando.has_obj_perm(new_inv, 'change_inventory')
+
+
+@pytest.mark.django_db
+@override_settings(ANSIBLE_BASE_CACHE_OBJECT_PERMISSIONS=False)
+def test_object_permissions_not_cached(rando, inventory, inv_rd):
+    inv_rd.give_permission(rando, inventory)
+    assert rando.has_obj_perm(inventory, 'change_inventory')
+
+    # without the cache, changes outside of the triggers are seen right away
+    RoleEvaluation.objects.filter(codename='change_inventory').delete()
+    assert not rando.has_obj_perm(inventory, 'change_inventory')
+
+
+@pytest.mark.django_db
+def test_object_permissions_not_loaded_by_default(rando, organization, inventory, org_inv_change_rd):
+    org_inv_change_rd.give_permission(rando, organization)
+    assert rando.has_obj_perm(inventory, 'change_inventory')
+    assert not getattr(rando, '_object_permissions', None)
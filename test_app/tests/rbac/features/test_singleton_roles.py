@@ -1,8 +1,11 @@
 import pytest
+from django.core.cache import cache
+from django.db import transaction
 from rest_framework.exceptions import ValidationError
 
 from ansible_base.lib.utils.response import get_relative_url
 from ansible_base.rbac import permission_registry
+from ansible_base.rbac.evaluations import get_rbac_version
 from ansible_base.rbac.models import RoleDefinition
 from test_app.models import Inventory, Organization, User
 
@@ -36,6 +39,72 @@ def test_singleton_role_via_team(rando, organization, team, inventory, global_in
     assert list(Inventory.access_qs(rando, 'change')) == []
 
 
+@pytest.mark.django_db
+def test_singleton_permissions_cached_between_requests(rando, organization, team, global_inv_rd, org_team_member_rd, django_assert_num_queries):
+    global_inv_rd.give_global_permission(rando)
+    assert rando.singleton_permissions() == {'change_inventory', 'view_inventory'}
+
+    # a new request loads a new user object, global permissions come from the Django cache
+    request_user = User.objects.get(pk=rando.pk)
+    with django_assert_num_queries(0):
+        assert request_user.singleton_permissions() == {'change_inventory', 'view_inventory'}
+
+    # changes to roles by other requests make the cached permissions out of date
+    global_inv_rd.remove_global_permission(User.objects.get(pk=rando.pk))
+    assert User.objects.get(pk=rando.pk).singleton_permissions() == set()
+
+    global_inv_rd.give_global_permission(team)
+    org_team_member_rd.give_permission(User.objects.get(pk=rando.pk), organization)
+    assert User.objects.get(pk=rando.pk).singleton_permissions() == {'change_inventory', 'view_inventory'}
+
+    global_inv_rd.permissions.remove(permission_registry.permission_qs.get(codename='change_inventory'))
+    assert User.objects.get(pk=rando.pk).singleton_permissions() == {'view_inventory'}
+
+    global_inv_rd.delete()
+    assert User.objects.get(pk=rando.pk).singleton_permissions() == set()
+
+
+@pytest.mark.django_db
+def test_singleton_permissions_cached_with_existing_member_role(rando, inventory, team, global_inv_rd, member_rd):
+    global_inv_rd.give_global_permission(team)
+    member_rd.give_permission(rando, team)
+    # the member role of the team already exists, so no team memberships are recomputed for the second user
+    user = User.objects.create(username='second-member')
+    assert User.objects.get(pk=user.pk).singleton_permissions() == set()
+
+    member_rd.give_permission(user, team)
+    request_user = User.objects.get(pk=user.pk)
+    assert request_user.singleton_permissions() == {'change_inventory', 'view_inventory'}
+    assert request_user.has_obj_perm(inventory, 'change_inventory')
+
+    member_rd.remove_permission(user, team)
+    request_user = User.objects.get(pk=user.pk)
+    assert request_user.singleton_permissions() == set()
+    assert not request_user.has_obj_perm(inventory, 'change_inventory')
+
+    # the first member keeps the global role of the team
+    assert User.objects.get(pk=rando.pk).singleton_permissions() == {'change_inventory', 'view_inventory'}
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('giving', [True, False])
+def test_singleton_permissions_cached_before_commit_not_used(rando, global_inv_rd, giving):
+    if not giving:
+        global_inv_rd.give_global_permission(rando)
+    with transaction.atomic():
+        if giving:
+            global_inv_rd.give_global_permission(rando)
+        else:
+            global_inv_rd.remove_global_permission(rando)
+        # another process, which does not see the uncommitted change, caches permissions under the new version
+        cache.set(
+            f'ansible_base_rbac_singleton_permissions_{rando.pk}_{get_rbac_version()}', {'view_inventory'} if giving else {'change_inventory', 'view_inventory'}
+        )
+
+    expected = {'change_inventory', 'view_inventory'} if giving else set()
+    assert User.objects.get(pk=rando.pk).singleton_permissions() == expected
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize("model", ["organization", "instancegroup"])
 def test_add_root_resource_admin(organization, admin_api_client, model):
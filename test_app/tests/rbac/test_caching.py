@@ -0,0 +1,203 @@
+import pytest
+
+from ansible_base.rbac.caching import (
+    bulk_compute_object_role_permissions,
+    compute_all_team_member_roles,
+    compute_object_role_permissions,
+    compute_team_member_roles,
+)
+from ansible_base.rbac.models import ObjectRole, RoleDefinition, RoleEvaluation, RoleEvaluationUUID, TeamAncestor
+from ansible_base.rbac.permission_registry import permission_registry
+from test_app.models import CollectionImport, Inventory, ManualExtraUUIDModel, Namespace, Organization, UUIDModel
+
+
+def team_membership_state():
+    "Returns the ObjectRole.provides_teams data in a form that can be compared"
+    return set(ObjectRole.provides_teams.through.objects.values_list('objectrole_id', 'team_id'))
+
+
+@pytest.fixture
+def team_chain(organization):
+    "Teams that each give membership to the next team in the list"
+    return [permission_registry.team_model.objects.create(name=f'chain-{i}', organization=organization) for i in range(4)]
+
+
+@pytest.mark.django_db
+class TestIncrementalTeamMembership:
+    def test_team_chain_matches_global(self, rando, team_chain, member_rd):
+        member_rd.give_permission(rando, team_chain[0])
+        for parent_team, child_team in zip(team_chain, team_chain[1:]):
+            member_rd.give_permission(parent_team, child_team)
+
+        incremental_state = team_membership_state()
+        compute_all_team_member_roles()
+        assert team_membership_state() == incremental_state
+
+        # the membership role of the first team propogates to all teams in the chain
+        first_role = ObjectRole.objects.get(object_id=team_chain[0].pk, content_type_id=permission_registry.team_ct_id)
+        assert set(first_role.provides_teams.all()) == set(team_chain)
+
+    def test_break_team_chain(self, rando, team_chain, member_rd):
+        member_rd.give_permission(rando, team_chain[0])
+        for parent_team, child_team in zip(team_chain, team_chain[1:]):
+            member_rd.give_permission(parent_team, child_team)
+
+        member_rd.remove_permission(team_chain[1], team_chain[2])
+        first_role = ObjectRole.objects.get(object_id=team_chain[0].pk, content_type_id=permission_registry.team_ct_id)
+        assert set(first_role.provides_teams.all()) == set(team_chain[:2])
+
+        incremental_state = team_membership_state()
+        compute_all_team_member_roles()
+        assert team_membership_state() == incremental_state
+
+    def test_delete_team_in_chain(self, rando, team_chain, member_rd):
+        member_rd.give_permission(rando, team_chain[0])
+        for parent_team, child_team in zip(team_chain, team_chain[1:]):
+            member_rd.give_permission(parent_team, child_team)
+
+        team_chain[1].delete()
+
+        incremental_state = team_membership_state()
+        compute_all_team_member_roles()
+        assert team_membership_state() == incremental_state
+
+    def test_move_team_to_new_org(self, rando, organization, team_chain, member_rd, org_team_member_rd):
+        org_team_member_rd.give_permission(rando, organization)
+        member_rd.give_permission(team_chain[0], team_chain[1])
+
+        team_chain[0].organization = Organization.objects.create(name='another-org')
+        team_chain[0].save()
+
+        org_role = ObjectRole.objects.get(object_id=organization.pk, content_type_id=permission_registry.org_ct_id)
+        # the org role no longer gives direct membership to the moved team, but still gives membership to its child
+        assert team_chain[0] not in set(org_role.provides_teams.all())
+        assert team_chain[1] in set(org_role.provides_teams.all())
+
+        incremental_state = team_membership_state()
+        compute_all_team_member_roles()
+        assert team_membership_state() == incremental_state
+
+    def test_unrelated_teams_not_loaded(self, rando, team_chain, member_rd, django_assert_max_num_queries):
+        member_rd.give_permission(rando, team_chain[0])
+        for i in range(20):
+            permission_registry.team_model.objects.create(name=f'unrelated-{i}', organization=team_chain[0].organization)
+
+        # number of queries should not depend on the total number of teams
+        with django_assert_max_num_queries(10):
+            compute_team_member_roles(team_ids=[team_chain[0].pk])
+
+    def test_empty_team_ids(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            compute_team_member_roles(team_ids=[])
+
+
+@pytest.mark.django_db
+class TestTeamAncestors:
+    def test_team_chain_ancestors(self, team_chain, member_rd):
+        for parent_team, child_team in zip(team_chain, team_chain[1:]):
+            member_rd.give_permission(parent_team, child_team)
+
+        assert set(TeamAncestor.objects.filter(team=team_chain[3]).values_list('ancestor_id', 'depth')) == {
+            (team_chain[2].id, 1),
+            (team_chain[1].id, 2),
+            (team_chain[0].id, 3),
+        }
+        assert set(TeamAncestor.objects.filter(ancestor=team_chain[0]).values_list('team_id', flat=True)) == set(t.id for t in team_chain[1:])
+
+        # a shortcut in the graph reduces the depth
+        member_rd.give_permission(team_chain[0], team_chain[3])
+        assert TeamAncestor.objects.get(team=team_chain[3], ancestor=team_chain[0]).depth == 1
+
+        member_rd.remove_permission(team_chain[1], team_chain[2])
+        assert set(TeamAncestor.objects.filter(team=team_chain[3]).values_list('ancestor_id', 'depth')) == {(team_chain[2].id, 1), (team_chain[0].id, 1)}
+
+    def test_team_loop(self, team_chain, member_rd):
+        member_rd.give_permission(team_chain[0], team_chain[1])
+        member_rd.give_permission(team_chain[1], team_chain[0])
+        assert TeamAncestor.objects.get(team=team_chain[0], ancestor=team_chain[0]).depth == 2
+
+        expected = set(TeamAncestor.objects.values_list('team_id', 'ancestor_id', 'depth'))
+        compute_all_team_member_roles()
+        assert set(TeamAncestor.objects.values_list('team_id', 'ancestor_id', 'depth')) == expected
+
+    def test_delete_ancestor_team(self, rando, team_chain, member_rd):
+        member_rd.give_permission(rando, team_chain[0])
+        for parent_team, child_team in zip(team_chain, team_chain[1:]):
+            member_rd.give_permission(parent_team, child_team)
+
+        team_chain[1].delete()
+        assert not TeamAncestor.objects.filter(team=team_chain[3], ancestor=team_chain[0]).exists()
+        assert set(TeamAncestor.objects.filter(team=team_chain[3]).values_list('ancestor_id', flat=True)) == {team_chain[2].id}
+
+
+def evaluation_state():
+    "Returns the data in both RoleEvaluation tables in a form that can be compared"
+    state = set()
+    for eval_cls in (RoleEvaluation, RoleEvaluationUUID):
+        state.update(eval_cls.objects.values_list('role_id', 'codename', 'content_type_id', 'object_id'))
+    return state
+
+
+@pytest.mark.django_db
+class TestBulkObjectRolePermissions:
+    @pytest.fixture
+    def populated_roles(self, rando, organization, team, org_admin_rd, member_rd, inv_rd):
+        "Object roles of many types, for all of the rules used to compute evaluations"
+        Inventory.objects.create(name='inv', organization=organization)
+        namespace = Namespace.objects.create(name='ns', organization=organization)
+        CollectionImport.objects.create(name='import', namespace=namespace)
+        uuid_obj = UUIDModel.objects.create(organization=organization)
+        ManualExtraUUIDModel.objects.create(uuidmodel_ptr=uuid_obj)
+        uuid_rd = RoleDefinition.objects.create_from_permissions(
+            permissions=['change_uuidmodel', 'view_uuidmodel', 'view_manualextrauuidmodel'],
+            name='manage UUID model',
+            content_type=permission_registry.content_type_model.objects.get_for_model(UUIDModel),
+        )
+        ns_rd = RoleDefinition.objects.create_from_permissions(
+            permissions=['view_namespace', 'view_collectionimport', 'add_collectionimport'],
+            name='namespace importer',
+            content_type=permission_registry.content_type_model.objects.get_for_model(Namespace),
+        )
+
+        org_admin_rd.give_permission(rando, organization)
+        member_rd.give_permission(rando, team)
+        uuid_rd.give_permission(rando, uuid_obj)
+        ns_rd.give_permission(team, namespace)
+        inv_rd.give_permission(team, Inventory.objects.create(name='other-inv', organization=Organization.objects.create(name='other-org')))
+
+    def test_rebuild_from_empty(self, populated_roles):
+        expected = evaluation_state()
+        assert expected
+
+        RoleEvaluation.objects.all().delete()
+        RoleEvaluationUUID.objects.all().delete()
+        bulk_compute_object_role_permissions()
+        assert evaluation_state() == expected
+
+    def test_matches_python_rebuild(self, populated_roles):
+        RoleEvaluation.objects.all().delete()
+        RoleEvaluationUUID.objects.all().delete()
+        compute_object_role_permissions(object_roles=ObjectRole.objects.all())
+        expected = evaluation_state()
+
+        # corrupt the tables, then do the rebuild with SQL
+        RoleEvaluation.objects.filter(codename='view_inventory').delete()
+        RoleEvaluationUUID.objects.filter(codename='change_uuidmodel').delete()
+        RoleEvaluation.objects.create(
+            role=ObjectRole.objects.first(), codename='delete_inventory', content_type_id=permission_registry.org_ct_id, object_id=999
+        )
+        compute_object_role_permissions()
+        assert evaluation_state() == expected
+
+    def test_no_object_roles(self):
+        RoleEvaluation.objects.create(
+            role=ObjectRole.objects.create(
+                role_definition=RoleDefinition.objects.create(name='empty'), content_type_id=permission_registry.org_ct_id, object_id='1'
+            ),
+            codename='view_organization',
+            content_type_id=permission_registry.org_ct_id,
+            object_id=1,
+        )
+        ObjectRole.objects.all().delete()
+        bulk_compute_object_role_permissions()
+        assert evaluation_state() == set()
@@ -0,0 +1,30 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from test_app.models import Organization
+
+
+@pytest.mark.django_db
+def test_benchmark_report(tmp_path):
+    output = tmp_path / 'report.json'
+    call_command('rbac_benchmark', '--organizations=2', '--teams=2', '--users=2', '--inventories=2', f'--output={output}', stderr=StringIO())
+    report = json.loads(output.read_text())
+    assert report['counts'] == {'organizations': 2, 'teams': 2, 'users': 2, 'inventories': 2}
+    for name in ('role_grants', 'team_parent_changes', 'object_creation', 'full_rebuild', 'access_qs'):
+        assert report['results'][name]['seconds'] >= 0
+        assert report['results'][name]['queries'] > 0
+    assert report['totals']['role_evaluations'] > 0
+
+    # data is rolled back by default
+    assert not Organization.objects.filter(name__startswith='benchmark').exists()
+
+
+@pytest.mark.django_db
+def test_benchmark_keep_data():
+    out = StringIO()
+    call_command('rbac_benchmark', '--organizations=1', '--teams=1', '--users=1', '--inventories=1', '--keep', stdout=out)
+    assert json.loads(out.getvalue())['counts']['organizations'] == 1
+    assert Organization.objects.filter(name__startswith='benchmark').count() == 1
@@ -2,10 +2,11 @@ from io import StringIO
 
 import pytest
 from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import CommandError
 
 from ansible_base.rbac.management.commands.RBAC_checks import Command
-from ansible_base.rbac.models import ObjectRole, RoleDefinition
-from test_app.models import Inventory
+from ansible_base.rbac.models import ObjectRole, RoleDefinition, TeamAncestor
+from test_app.models import Inventory, Team
 
 
 def run_and_get_output():
@@ -26,3 +27,19 @@ def test_role_definition_wrong_model(organization):
     rd, _ = RoleDefinition.objects.get_or_create(name='foo-def', permissions=['view_organization'])
     orole = ObjectRole.objects.create(object_id=inventory.id, content_type=ContentType.objects.get_for_model(inventory), role_definition=rd)
     assert f"Object role {orole} has permission view_organization for an unlike content type" in run_and_get_output()
+
+
+@pytest.mark.django_db
+def test_team_ancestor_missing(organization, member_rd):
+    parent_team = Team.objects.create(name='parent-team', organization=organization)
+    child_team = Team.objects.create(name='child-team', organization=organization)
+    member_rd.give_permission(parent_team, child_team)
+    assert TeamAncestor.objects.filter(team=child_team, ancestor=parent_team, depth=1).exists()
+    assert "checking for up-to-date team ancestors" in run_and_get_output()
+
+    TeamAncestor.objects.all().delete()
+    cmd = Command()
+    cmd.stdout = StringIO()
+    with pytest.raises(CommandError):
+        cmd.handle()
+    assert f"Team {child_team.id} is missing ancestor entry for team {parent_team.id} with depth 1" in cmd.stdout.getvalue()
@@ -2,6 +2,7 @@ import pytest
 from crum import impersonate
 from rest_framework.exceptions import ValidationError
 
+from ansible_base.rbac.caching import compute_all_team_member_roles, compute_object_role_permissions
 from ansible_base.rbac.models import RoleDefinition, RoleEvaluation, RoleUserAssignment
 from ansible_base.rbac.permission_registry import permission_registry
 from test_app.models import Inventory, Organization, Team, User
@@ -295,3 +296,47 @@ def test_change_team_organization(org_admin_rd, inv_rd):
     for i in range(2):
         assert not admins[0].has_obj_perm(objs[i], 'change'), i
         assert admins[1].has_obj_perm(objs[i], 'change'), i
+
+
+@pytest.mark.django_db
+class TestBulkAssignment:
+    def test_give_permission_bulk(self, organization, inv_rd, admin_user):
+        users = [User.objects.create(username=f'user-{i}') for i in range(5)]
+        inventories = [Inventory.objects.create(name=f'inv-{i}', organization=organization) for i in range(3)]
+        inv_rd.give_permission(users[0], inventories[0])  # some assignments already exist
+
+        with impersonate(admin_user):
+            assignments = inv_rd.give_permission_bulk(users, inventories)
+
+        assert len(assignments) == 15
+        assert RoleUserAssignment.objects.filter(role_definition=inv_rd).count() == 15
+        assert all(assignment.created_by == admin_user for assignment in assignments if assignment.user != users[0])
+        for user in users:
+            assert set(Inventory.access_qs(user, 'change')) == set(inventories)
+
+        # giving the same permissions again does not do anything
+        assert len(inv_rd.give_permission_bulk(users, inventories)) == 15
+
+    def test_bulk_team_membership(self, rando, organization, inventory, inv_rd, member_rd):
+        teams = [Team.objects.create(name=f'team-{i}', organization=organization) for i in range(3)]
+        member_rd.give_permission(rando, teams[0])
+        inv_rd.give_permission(teams[2], inventory)
+
+        # team-0 becomes member of team-1 and team-2, and a user is added to all teams
+        member_rd.give_permission_bulk([teams[0]], teams[1:])
+        assert rando.has_obj_perm(inventory, 'change_inventory')
+
+        new_user = User.objects.create(username='new-user')
+        member_rd.give_permission_bulk([new_user], teams)
+        assert new_user.has_obj_perm(inventory, 'change_inventory')
+        assert set(Team.access_qs(new_user)) == set(teams)
+
+        # result is the same as the single-assignment logic
+        evaluations = set(RoleEvaluation.objects.values_list('role_id', 'codename', 'content_type_id', 'object_id'))
+        compute_all_team_member_roles()
+        compute_object_role_permissions()
+        assert set(RoleEvaluation.objects.values_list('role_id', 'codename', 'content_type_id', 'object_id')) == evaluations
+
+    def test_bulk_wrong_object_type(self, rando, organization, inv_rd):
+        with pytest.raises(ValidationError):
+            inv_rd.give_permission_bulk([rando], [organization])
@@ -126,6 +126,44 @@ def test_superuser_flag_not_considered(inventory):
     assert not user.has_obj_perm(inventory, 'change')
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize('cache_object_perms', [True, False])
+def test_has_obj_perms_bulk(rando, organization, inv_rd, cache_object_perms, django_assert_max_num_queries):
+    inventories = [Inventory.objects.create(name=f'inv-{i}', organization=organization) for i in range(4)]
+    for inv in inventories[:2]:
+        inv_rd.give_permission(rando, inv)
+    rando.singleton_permissions()  # load global permissions
+
+    with override_settings(ANSIBLE_BASE_CACHE_OBJECT_PERMISSIONS=cache_object_perms):
+        with django_assert_max_num_queries(2):  # one query for each type of object
+            results = rando.has_obj_perms_bulk(inventories + [organization], ['change', 'delete'])
+
+    assert results[inventories[0]] == {'change': True, 'delete': False}
+    assert results[inventories[2]] == {'change': False, 'delete': False}
+    assert results[organization] == {'change': False, 'delete': False}
+    for obj, perms in results.items():
+        for codename, has_perm in perms.items():
+            assert rando.has_obj_perm(obj, codename) is has_perm
+
+
+@pytest.mark.django_db
+def test_has_obj_perms_bulk_superuser(inventory):
+    user = permission_registry.user_model.objects.create(username='superuser', is_superuser=True)
+    assert user.has_obj_perms_bulk([inventory], ['change_inventory']) == {inventory: {'change_inventory': True}}
+
+
+@pytest.mark.django_db
+def test_evaluation_query_uses_assignment_table(rando, team, inventory, inv_rd, member_rd):
+    inv_rd.give_permission(team, inventory)
+    member_rd.give_permission(rando, team)
+
+    for actor in (rando, team):
+        qs = Inventory.access_ids_qs(actor, 'change')
+        # the subquery for roles of the actor should not need the object role table
+        assert ObjectRole._meta.db_table not in str(qs.query)
+        assert set(qs) == {(inventory.id,)}
+
+
 @pytest.mark.parametrize(
     'codename,expect',
     [
@@ -1,12 +1,14 @@
+from unittest import mock
 from unittest.mock import MagicMock
 
 import pytest
 from django.apps import apps
 from django.test.utils import override_settings
 
+from ansible_base.rbac.caching import compute_all_team_member_roles, compute_object_role_permissions, compute_team_member_roles
 from ansible_base.rbac.models import ObjectRole, RoleEvaluation, RoleTeamAssignment, RoleUserAssignment
 from ansible_base.rbac.permission_registry import permission_registry
-from ansible_base.rbac.triggers import dab_post_migrate, post_migration_rbac_setup
+from ansible_base.rbac.triggers import dab_post_migrate, deferred_rbac_updates, post_migration_rbac_setup
 from test_app.models import Inventory, Organization
 
 
@@ -172,3 +174,60 @@ def test_delete_signals_team_organization(organization, inventory, team, org_inv
         assert not RoleEvaluation.objects.filter(**org_gfk).exists()
 
     assert not RoleEvaluation.objects.filter(**inv_gfk).exists()
+
+
+@pytest.mark.django_db
+class TestDeferredUpdates:
+    @staticmethod
+    def rbac_state():
+        return (
+            set(ObjectRole.provides_teams.through.objects.values_list('objectrole_id', 'team_id')),
+            set(RoleEvaluation.objects.values_list('role_id', 'codename', 'content_type_id', 'object_id')),
+        )
+
+    def test_deferred_matches_rebuild(self, rando, organization, inventory, team, member_rd, org_team_member_rd, inv_rd):
+        other_team = permission_registry.team_model.objects.create(name='other-team', organization=organization)
+        with deferred_rbac_updates():
+            member_rd.give_permission(rando, team)
+            member_rd.give_permission(team, other_team)
+            inv_rd.give_permission(other_team, inventory)
+            org_team_member_rd.give_permission(rando, organization)
+            org_team_member_rd.remove_permission(rando, organization)
+
+        assert rando.has_obj_perm(inventory, 'change_inventory')
+
+        deferred_state = self.rbac_state()
+        compute_all_team_member_roles()
+        compute_object_role_permissions()
+        assert self.rbac_state() == deferred_state
+
+    def test_recompute_once(self, organization, inventory, inv_rd, member_rd):
+        users = [permission_registry.user_model.objects.create(username=f'user-{i}') for i in range(5)]
+        teams = [permission_registry.team_model.objects.create(name=f'team-{i}', organization=organization) for i in range(5)]
+        inv_rd.give_permission(users[0], inventory)
+
+        with mock.patch('ansible_base.rbac.triggers.compute_object_role_permissions', wraps=compute_object_role_permissions) as mock_compute:
+            with mock.patch('ansible_base.rbac.triggers.compute_team_member_roles', wraps=compute_team_member_roles) as mock_teams:
+                with deferred_rbac_updates():
+                    for user, team in zip(users[1:], teams):
+                        inv_rd.give_permission(user, inventory)
+                        member_rd.give_permission(user, team)
+                    with deferred_rbac_updates():  # nested usage is allowed
+                        inv_rd.remove_permission(users[0], inventory)
+                    mock_compute.assert_not_called()
+        mock_compute.assert_called_once()
+        mock_teams.assert_called_once()
+
+        assert all(user.has_obj_perm(inventory, 'change_inventory') for user in users[1:])
+        assert not users[0].has_obj_perm(inventory, 'change_inventory')
+        assert all(user.has_obj_perm(team, 'member_team') for user, team in zip(users[1:], teams))
+
+    def test_error_does_not_leave_updates_queued(self, rando, inventory, inv_rd):
+        with pytest.raises(ValueError):
+            with deferred_rbac_updates():
+                inv_rd.give_permission(rando, inventory)
+                raise ValueError('failure in the middle')
+
+        assert not RoleUserAssignment.objects.filter(user=rando).exists()  # rolled back
+        inv_rd.give_permission(rando, inventory)
+        assert rando.has_obj_perm(inventory, 'change_inventory')
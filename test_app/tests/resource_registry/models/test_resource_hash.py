@@ -0,0 +1,66 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from ansible_base.resource_registry.models import Resource
+from ansible_base.resource_registry.shared_types import OrganizationType, TeamType
+from test_app.models import Organization, Team
+
+
+@pytest.mark.django_db
+def test_hash_stored_on_save():
+    org = Organization.objects.create(name='hash-org')
+    assert org.resource.resource_hash == OrganizationType(org).get_hash()
+
+    org.description = 'a new description'
+    org.save()
+    org.resource.refresh_from_db()
+    assert org.resource.resource_hash == OrganizationType(org).get_hash()
+
+
+@pytest.mark.django_db
+def test_hash_not_stored_for_local_types(local_authenticator):
+    assert Resource.get_resource_for_object(local_authenticator).resource_hash is None
+
+
+@pytest.mark.django_db
+def test_team_hash_cleared_by_org_ansible_id_change(organization, team):
+    assert team.resource.resource_hash == TeamType(team).get_hash()
+
+    organization.resource.update_resource({'name': organization.name}, ansible_id='a8b3bb5c-1b18-4b16-8b17-3e8ba7b7a1c5', partial=True)
+    team.resource.refresh_from_db()
+    assert team.resource.resource_hash is None
+    assert team.resource.get_content_hash() == TeamType(team).get_hash()
+
+
+@pytest.mark.django_db
+def test_hash_of_unrelated_team_kept_by_org_ansible_id_change(organization, team):
+    other_org = Organization.objects.create(name='other-hash-org')
+    other_team = Team.objects.create(name='other-hash-team', organization=other_org)
+    other_modified = Resource.get_resource_for_object(other_team).modified
+
+    organization.resource.update_resource({'name': organization.name}, ansible_id='a8b3bb5c-1b18-4b16-8b17-3e8ba7b7a1c5', partial=True)
+    team.resource.refresh_from_db()
+    assert team.resource.resource_hash is None
+    other_resource = Resource.get_resource_for_object(other_team)
+    assert other_resource.resource_hash == TeamType(other_team).get_hash()
+    assert other_resource.modified == other_modified
+
+
+@pytest.mark.django_db
+def test_update_resource_hashes_command(organization, team):
+    Resource.objects.update(resource_hash=None)
+
+    out = StringIO()
+    call_command('update_resource_hashes', 'team', stdout=out)
+    assert 'Updated 1 hashes for shared.team' in out.getvalue()
+    assert Resource.objects.get(ansible_id=team.resource.ansible_id).resource_hash == TeamType(team).get_hash()
+    assert Resource.objects.get(ansible_id=organization.resource.ansible_id).resource_hash is None
+
+    # fix a wrong hash
+    Team.objects.filter(pk=team.pk).update(name='changed-without-signals')
+    team.refresh_from_db()
+    call_command('update_resource_hashes', '--all', stdout=out)
+    assert Resource.objects.get(ansible_id=team.resource.ansible_id).resource_hash == TeamType(team).get_hash()
+    assert Resource.objects.get(ansible_id=organization.resource.ansible_id).resource_hash == OrganizationType(organization).get_hash()
@@ -1,10 +1,28 @@
+import threading
+from io import BytesIO
 from pathlib import Path
+from types import GeneratorType
+from unittest import mock
 
 import pytest
+from requests import Response
 
 from ansible_base.lib.testing.util import StaticResourceAPIClient
 from ansible_base.lib.utils.response import get_relative_url
-from ansible_base.resource_registry.tasks.sync import ResourceSyncHTTPError, SyncExecutor
+from ansible_base.resource_registry.models import Resource, ResourceSyncCursor, ResourceType
+from ansible_base.resource_registry.tasks import sync
+from ansible_base.resource_registry.tasks.sync import (
+    ManifestItem,
+    ResourceDeletionError,
+    ResourceSyncHTTPError,
+    SyncExecutor,
+    SyncStatus,
+    fetch_manifest,
+    get_managed_resources,
+    iter_chunks,
+    iter_manifest,
+)
+from test_app.models import Organization
 
 
 @pytest.fixture(scope="function")
@@ -14,10 +32,12 @@ def static_api_client():
     current_directory = current_file_path.parent
     service_url = current_directory.parent / "fixtures"
     service_path = "/static/resource_sync/"
-    return StaticResourceAPIClient(
+    client = StaticResourceAPIClient(
         service_url=str(service_url),
         service_path=str(service_path),
     )
+    client.router = {}  # routes set by a test must not leak into other tests
+    return client
 
 
 @pytest.fixture
@@ -56,6 +76,70 @@ def test_resource_sync(static_api_client, stdout):
     assert 'CREATED 97447387-8596-404f-b0d0-6429b04c8d22 theceo' in stdout.lines
 
 
+@pytest.mark.django_db
+def test_resource_sync_fetches_in_bulk(static_api_client, stdout):
+    with mock.patch.object(static_api_client, 'get_resource') as get_resource:
+        executor = SyncExecutor(api_client=static_api_client, stdout=stdout)
+        executor.run()
+    get_resource.assert_not_called()
+    assert 'CREATED 97447387-8596-404f-b0d0-6429b04c8d22 theceo' in stdout.lines
+
+
+@pytest.mark.django_db
+def test_resource_sync_bulk_not_supported(static_api_client, stdout):
+    static_api_client.router = {"resources/bulk/": {"status_code": 404, "content": "Not Found"}}
+    executor = SyncExecutor(api_client=static_api_client, stdout=stdout)
+    executor.run()
+    assert 'RESOURCE_SERVER does not support bulk requests, resources will be fetched one by one.' in stdout.lines
+    assert executor.bulk_size == 0
+    assert 'CREATED 97447387-8596-404f-b0d0-6429b04c8d22 theceo' in stdout.lines
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('bulk_size', [200, 1, 0])
+def test_resource_sync_workers(static_api_client, stdout, bulk_size):
+    executor = SyncExecutor(api_client=static_api_client, stdout=stdout, workers=2, bulk_size=bulk_size)
+    executor.run()
+
+    assert any('resources with 2 workers.' in line for line in stdout.lines)
+    assert 'CREATED 3e3cc6a4-72fa-43ec-9e17-76ae5a3846ca Serious Company' in stdout.lines
+    assert 'CREATED 97447387-8596-404f-b0d0-6429b04c8d22 theceo' in stdout.lines
+    assert any(line.startswith('Timing | Total') for line in stdout.lines)
+    assert all(item.resource_data for item in executor.results['created'])
+
+
+@pytest.mark.django_db
+def test_resource_sync_workers_bulk_not_supported(static_api_client, stdout):
+    static_api_client.router = {"resources/bulk/": {"status_code": 405, "content": "Method Not Allowed"}}
+    executor = SyncExecutor(api_client=static_api_client, stdout=stdout, workers=2)
+    executor.run()
+    assert executor.bulk_size == 0
+    assert 'CREATED 97447387-8596-404f-b0d0-6429b04c8d22 theceo' in stdout.lines
+
+
+@pytest.mark.django_db
+def test_resource_sync_workers_bulk_support_checked_once(static_api_client, stdout):
+    user_manifest = (Path(static_api_client.base_url) / "resource-types/shared.user/manifest/response").read_text()
+    user_manifest += "".join(f"{uuid},hash\n" for uuid in ("5e2d3b2c-5c4c-4a4d-9b5e-2f0d1b8e6a01", "5e2d3b2c-5c4c-4a4d-9b5e-2f0d1b8e6a02"))
+    static_api_client.router = {
+        "resources/bulk/": {"status_code": 405, "content": "Method Not Allowed"},
+        "resource-types/shared.user/manifest/": {"status_code": 200, "content": user_manifest.encode()},
+    }
+    bulk_threads = []
+
+    def get_resources_bulk(ansible_ids):
+        bulk_threads.append(threading.current_thread())
+        return StaticResourceAPIClient.get_resources_bulk(static_api_client, ansible_ids)
+
+    executor = SyncExecutor(api_client=static_api_client, stdout=stdout, workers=2, bulk_size=1, resource_type_names=["shared.user"])
+    with mock.patch.object(static_api_client, "get_resources_bulk", side_effect=get_resources_bulk):
+        executor.run()
+    # the first chunk is requested in the main thread, the workers fetch the rest one by one
+    assert bulk_threads == [threading.main_thread()]
+    assert stdout.lines.count("RESOURCE_SERVER does not support bulk requests, resources will be fetched one by one.") == 1
+    assert 'CREATED 97447387-8596-404f-b0d0-6429b04c8d22 theceo' in stdout.lines
+
+
 @pytest.mark.django_db
 def test_delete_orphans(admin_api_client, static_api_client, stdout):
     # Create a local user that is managed by resource_server but not returned from the manifest
@@ -75,6 +159,25 @@ def test_delete_orphans(admin_api_client, static_api_client, stdout):
     assert any('Deleted 1' in line for line in stdout.lines)
 
 
+@pytest.mark.django_db
+def test_empty_manifest_does_not_delete_orphans(admin_api_client, static_api_client, stdout):
+    url = get_relative_url("resource-list")
+    resource = {
+        "service_id": "57592fbc-7ecb-405f-9f5f-ebad20932d38",  # from fixtures/static/metadata
+        "resource_type": "shared.user",
+        "resource_data": {"username": "Phi", "last_name": "Lips", "email": "phi@example.com"},
+    }
+    response = admin_api_client.post(url, resource, format="json")
+    assert response.status_code == 201
+    static_api_client.router = {"resource-types/shared.user/manifest/": {"status_code": 200, "content": b"ansible_id,resource_hash\n"}}
+
+    executor = SyncExecutor(api_client=static_api_client, stdout=stdout, resource_type_names=["shared.user"], retain_seconds=0)
+    executor.run()
+    assert 'WARNING: the manifest of shared.user is empty, not deleting local resources as orphans' in stdout.lines
+    assert executor.deleted_count == 0
+    assert Resource.objects.filter(name="Phi").exists()
+
+
 @pytest.mark.django_db
 def test_update_existing_resource(admin_api_client, static_api_client, stdout):
     # Create a local user with different resource_data than the one manifest returns
@@ -119,3 +222,216 @@ def test_noop_existing_resource(admin_api_client, static_api_client, stdout):
     assert len(executor.results["noop"]) == 1
     assert 'NOOP 97447387-8596-404f-b0d0-6429b04c8d22' in stdout.lines
     assert any('Skipped 1' in line for line in stdout.lines)
+
+
+@pytest.mark.django_db
+def test_delta_sync(admin_api_client, static_api_client, stdout):
+    org_manifest_path = "resource-types/shared.organization/manifest/"
+    user_manifest_path = "resource-types/shared.user/manifest/"
+    org_manifest = (Path(static_api_client.base_url) / org_manifest_path / "response").read_bytes()
+    cursor = "2026-10-18T12:00:00+00:00"
+    static_api_client.router = {org_manifest_path: {"status_code": 200, "content": org_manifest, "headers": {"X-Manifest-Cursor": cursor}}}
+
+    # The first sync is a full sync, which saves the cursor
+    executor = SyncExecutor(api_client=static_api_client, stdout=stdout, resource_type_names=["shared.organization"], delta=True)
+    executor.run()
+    assert 'Syncing the full manifest' in stdout.lines
+    assert 'CREATED 3e3cc6a4-72fa-43ec-9e17-76ae5a3846ca Serious Company' in stdout.lines
+    assert ResourceSyncCursor.objects.get(resource_type__name="shared.organization").cursor == cursor
+
+    # Create a local user managed by the resource server, and delete it in the changes
+    response = admin_api_client.post(
+        get_relative_url("resource-list"),
+        {
+            "service_id": "57592fbc-7ecb-405f-9f5f-ebad20932d38",  # from fixtures/static/metadata
+            "resource_type": "shared.user",
+            "resource_data": {"username": "Phi", "last_name": "Lips", "email": "phi@example.com"},
+        },
+        format="json",
+    )
+    assert response.status_code == 201
+    ansible_id = response.data["ansible_id"]
+    ResourceSyncCursor.objects.create(resource_type=ResourceType.objects.get(name="shared.user"), service_id=executor.remote_service_id, cursor=cursor)
+    changes = f"ansible_id,resource_hash,deleted\n{ansible_id},,true\n"
+    next_cursor = "2026-10-18T13:00:00+00:00"
+    static_api_client.router = {user_manifest_path: {"status_code": 200, "content": changes.encode(), "headers": {"X-Manifest-Cursor": next_cursor}}}
+
+    stdout.lines = []
+    with mock.patch.object(static_api_client, 'get_resource_type_manifest', wraps=static_api_client.get_resource_type_manifest) as get_manifest:
+        executor = SyncExecutor(api_client=static_api_client, stdout=stdout, resource_type_names=["shared.user"], delta=True, retain_seconds=0)
+        executor.run()
+    get_manifest.assert_called_once_with("shared.user", since=cursor)
+    assert f'Changes since {cursor}: 0 changed and 1 deleted resources' in stdout.lines
+    assert 'Deleting 1 remotely deleted resources' in stdout.lines
+    assert not Resource.objects.filter(ansible_id=ansible_id).exists()
+    assert ResourceSyncCursor.objects.get(resource_type__name="shared.user").cursor == next_cursor
+
+
+@pytest.mark.django_db
+def test_delta_sync_expired_cursor(static_api_client, stdout):
+    org_manifest_path = "resource-types/shared.organization/manifest/"
+    ResourceSyncCursor.objects.create(
+        resource_type=ResourceType.objects.get(name="shared.organization"),
+        service_id="57592fbc-7ecb-405f-9f5f-ebad20932d38",  # from fixtures/static/metadata
+        cursor="2020-01-01T00:00:00+00:00",
+    )
+    full_manifest = (Path(static_api_client.base_url) / org_manifest_path / "response").read_bytes()
+
+    def get_manifest(name, since=None):
+        response = Response()
+        response.status_code, response.raw = (410, BytesIO(b"{}")) if since else (200, BytesIO(full_manifest))
+        return response
+
+    with mock.patch.object(static_api_client, 'get_resource_type_manifest', side_effect=get_manifest):
+        executor = SyncExecutor(api_client=static_api_client, stdout=stdout, resource_type_names=["shared.organization"], delta=True)
+        executor.run()
+    assert 'Syncing the full manifest' in stdout.lines
+    assert 'CREATED 3e3cc6a4-72fa-43ec-9e17-76ae5a3846ca Serious Company' in stdout.lines
+
+
+@pytest.mark.django_db
+def test_delta_sync_conflict_keeps_cursor(django_user_model, static_api_client, stdout):
+    user_manifest_path = "resource-types/shared.user/manifest/"
+    user_manifest = (Path(static_api_client.base_url) / user_manifest_path / "response").read_bytes()
+    static_api_client.router = {
+        user_manifest_path: {"status_code": 200, "content": user_manifest, "headers": {"X-Manifest-Cursor": "2026-10-18T12:00:00+00:00"}}
+    }
+    # A local user, not managed by the resource server, with the username of the user in the manifest
+    django_user_model.objects.create(username="theceo")
+
+    executor = SyncExecutor(api_client=static_api_client, stdout=stdout, resource_type_names=["shared.user"], delta=True)
+    executor.run()
+    assert 'CONFLICT 97447387-8596-404f-b0d0-6429b04c8d22 theceo' in stdout.lines
+    assert 'Not saving the cursor, 1 resources were not synced' in stdout.lines
+    assert not ResourceSyncCursor.objects.filter(resource_type__name="shared.user").exists()
+
+
+@pytest.mark.django_db
+def test_delta_sync_unavailable_keeps_cursor_of_its_type(static_api_client, stdout):
+    cursor = "2026-10-18T12:00:00+00:00"
+    for manifest_path in ("resource-types/shared.organization/manifest/", "resource-types/shared.user/manifest/"):
+        manifest = (Path(static_api_client.base_url) / manifest_path / "response").read_bytes()
+        static_api_client.router[manifest_path] = {"status_code": 200, "content": manifest, "headers": {"X-Manifest-Cursor": cursor}}
+    original_resource_sync = sync.resource_sync
+
+    def resource_sync(manifest_item, *args, **kwargs):
+        if manifest_item.ansible_id == "3e3cc6a4-72fa-43ec-9e17-76ae5a3846ca":  # the organization
+            return sync.SyncResult(SyncStatus.UNAVAILABLE, manifest_item)
+        return original_resource_sync(manifest_item, *args, **kwargs)
+
+    with mock.patch.object(sync, 'resource_sync', side_effect=resource_sync):
+        executor = SyncExecutor(api_client=static_api_client, stdout=stdout, resource_type_names=["shared.organization", "shared.user"], delta=True)
+        executor.run()
+    assert not ResourceSyncCursor.objects.filter(resource_type__name="shared.organization").exists()
+    assert ResourceSyncCursor.objects.get(resource_type__name="shared.user").cursor == cursor
+
+
+def test_iter_manifest_streams(static_api_client):
+    manifest = iter_manifest("shared.organization", api_client=static_api_client)
+    assert isinstance(manifest, GeneratorType)
+    assert [item.ansible_id for item in manifest] == ["3e3cc6a4-72fa-43ec-9e17-76ae5a3846ca"]
+    assert fetch_manifest("shared.organization", api_client=static_api_client)[0].service_id == "57592fbc-7ecb-405f-9f5f-ebad20932d38"
+
+
+def test_iter_chunks():
+    assert list(iter_chunks(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(iter_chunks([], 2)) == []
+
+
+@pytest.mark.django_db
+def test_conflict_with_orphan_retried(admin_api_client, static_api_client, stdout):
+    # A local user managed by resource_server with the same username as a user of the manifest, but another ansible_id
+    response = admin_api_client.post(
+        get_relative_url("resource-list"),
+        {
+            "service_id": "57592fbc-7ecb-405f-9f5f-ebad20932d38",  # from fixtures/static/metadata
+            "resource_type": "shared.user",
+            "resource_data": {"username": "theceo", "email": "old-ceo@example.com"},
+        },
+        format="json",
+    )
+    assert response.status_code == 201
+
+    executor = SyncExecutor(api_client=static_api_client, stdout=stdout, resource_type_names=["shared.user"], retain_seconds=0)
+    executor.run()
+    assert 'CONFLICT 97447387-8596-404f-b0d0-6429b04c8d22 theceo' in stdout.lines
+    assert 'Deleting 1 orphaned resources' in stdout.lines
+    assert 'CREATED 97447387-8596-404f-b0d0-6429b04c8d22 theceo' in stdout.lines
+    assert any('Created 1 | Updated 0 | Conflict 0' in line for line in stdout.lines)
+    assert Resource.objects.get(ansible_id="97447387-8596-404f-b0d0-6429b04c8d22").content_object.email == "theceo@seriouscompany.com"
+
+
+@pytest.mark.django_db
+def test_delete_orphans_in_batches(admin_api_client, static_api_client, stdout):
+    for i in range(5):
+        response = admin_api_client.post(
+            get_relative_url("resource-list"),
+            {
+                "service_id": "57592fbc-7ecb-405f-9f5f-ebad20932d38",  # from fixtures/static/metadata
+                "resource_type": "shared.user",
+                "resource_data": {"username": f"orphan-{i}"},
+            },
+            format="json",
+        )
+        assert response.status_code == 201
+
+    original_delete_resource = sync.delete_resource
+
+    def delete_resource(resource):
+        if resource.name == "orphan-2":
+            raise ResourceDeletionError()
+        return original_delete_resource(resource)
+
+    executor = SyncExecutor(api_client=static_api_client, stdout=stdout, resource_type_names=["shared.user"], retain_seconds=0, delete_batch_size=2)
+    with mock.patch.object(sync, "delete_resource", side_effect=delete_resource):
+        executor.run()
+    assert 'Deleting 5 orphaned resources' in stdout.lines
+    assert 'Error deleting orphaned resources ' in stdout.lines
+    assert sorted(data["username"] for data in executor.results["deleted"]) == ["orphan-0", "orphan-1", "orphan-3", "orphan-4"]
+    assert list(Resource.objects.filter(name__startswith="orphan-").values_list("name", flat=True)) == ["orphan-2"]
+
+
+@pytest.mark.django_db
+def test_delete_orphans_retained(admin_api_client, static_api_client, stdout):
+    response = admin_api_client.post(
+        get_relative_url("resource-list"),
+        {"service_id": "57592fbc-7ecb-405f-9f5f-ebad20932d38", "resource_type": "shared.user", "resource_data": {"username": "new-orphan"}},
+        format="json",
+    )
+    assert response.status_code == 201
+
+    # Orphans created in the last retain_seconds are kept
+    executor = SyncExecutor(api_client=static_api_client, stdout=stdout, resource_type_names=["shared.user"], retain_seconds=120)
+    executor.run()
+    assert executor.results["deleted"] == []
+    assert Resource.objects.filter(name="new-orphan").exists()
+
+
+@pytest.mark.django_db
+def test_unchanged_resources_no_queries(static_api_client, stdout, django_assert_num_queries):
+    for i in range(5):
+        Organization.objects.create(name=f"unchanged-{i}")
+    resources = Resource.objects.filter(name__startswith="unchanged-")
+    manifest_list = [ManifestItem(ansible_id=str(r.ansible_id), resource_hash=r.resource_hash, service_id=str(r.service_id)) for r in resources]
+
+    executor = SyncExecutor(api_client=static_api_client, stdout=stdout)
+    # one query loads the local resources of the chunk, and unchanged resources need no other queries
+    with django_assert_num_queries(1):
+        results = executor._process_manifest_list(manifest_list)
+    assert [result.status for result in results] == [SyncStatus.NOOP] * 5
+
+
+@pytest.mark.django_db
+def test_get_managed_resources_prefetch(django_assert_num_queries):
+    changed_org = Organization.objects.create(name="changed")
+    unchanged_org = Organization.objects.create(name="unchanged")
+    service_id = str(changed_org.resource.service_id)
+    manifest_list = [
+        ManifestItem(ansible_id=str(changed_org.resource.ansible_id), resource_hash="different", service_id=service_id),
+        ManifestItem(ansible_id=str(unchanged_org.resource.ansible_id), resource_hash=unchanged_org.resource.resource_hash, service_id=service_id),
+    ]
+    # resources, then content objects of the changed ones
+    with django_assert_num_queries(2):
+        managed_resources = get_managed_resources(manifest_list)
+    with django_assert_num_queries(0):
+        assert managed_resources[str(changed_org.resource.ansible_id)].content_object == changed_org
@@ -1,7 +1,14 @@
 import csv
+from datetime import timedelta
 from io import StringIO
 
+import pytest
+from django.utils import timezone
+
 from ansible_base.lib.utils.response import get_relative_url
+from ansible_base.resource_registry.models import Resource, ResourceDeletion
+from ansible_base.resource_registry.shared_types import OrganizationType
+from test_app.models import Organization
 
 
 def test_resource_type_list(admin_api_client):
@@ -44,3 +51,74 @@ def test_resource_type_manifest_404(admin_api_client):
     url = get_relative_url("resourcetype-manifest", kwargs={"name": "doesnt.exist"})
     response = admin_api_client.get(url)
     assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_resource_type_manifest_stored_hashes(admin_api_client, organization, django_assert_max_num_queries):
+    "Manifest is served from the stored hashes, and missing hashes are filled in"
+    Organization.objects.create(name='no-hash-org')
+    Resource.objects.filter(name='no-hash-org').update(resource_hash=None)
+    expected = {str(org.resource.ansible_id): OrganizationType(org).get_hash() for org in Organization.objects.all()}
+
+    url = get_relative_url("resourcetype-manifest", kwargs={"name": "shared.organization"})
+    response = admin_api_client.get(url)
+    assert response.status_code == 200
+    data = StringIO("".join(item.decode() for item in response.streaming_content))
+    assert {row["ansible_id"]: row["resource_hash"] for row in csv.DictReader(data)} == expected
+    assert not Resource.objects.filter(content_type__resource_type__name='shared.organization', resource_hash__isnull=True).exists()
+
+    # with all hashes stored, number of queries does not depend on number of resources
+    for i in range(5):
+        Organization.objects.create(name=f'more-orgs-{i}')
+    with django_assert_max_num_queries(12):
+        response = admin_api_client.get(url)
+        assert len(b"".join(response.streaming_content).splitlines()) == Organization.objects.count() + 1
+
+
+@pytest.mark.django_db
+def test_resource_type_manifest_since(admin_api_client, organization):
+    "With a cursor, only resources changed since then and deletions are listed"
+    url = get_relative_url("resourcetype-manifest", kwargs={"name": "shared.organization"})
+    response = admin_api_client.get(url)
+    assert response.status_code == 200
+    cursor = response["X-Manifest-Cursor"]
+
+    # changes within the overlap of the cursor are always listed, so make the existing resources older
+    Resource.objects.update(modified=timezone.now() - timedelta(minutes=5))
+    changed = Organization.objects.create(name='changed-org')
+    deleted = Organization.objects.create(name='deleted-org')
+    deleted_ansible_id = str(deleted.resource.ansible_id)
+    deleted.delete()
+
+    response = admin_api_client.get(url, data={"since": cursor})
+    assert response.status_code == 200
+    data = StringIO("".join(item.decode() for item in response.streaming_content))
+    rows = {row["ansible_id"]: row for row in csv.DictReader(data)}
+    assert set(rows) == {str(changed.resource.ansible_id), deleted_ansible_id}
+    assert rows[str(changed.resource.ansible_id)]["resource_hash"] == OrganizationType(changed).get_hash()
+    assert rows[str(changed.resource.ansible_id)]["deleted"] == "false"
+    assert rows[deleted_ansible_id]["deleted"] == "true"
+    assert response["X-Manifest-Cursor"] > cursor
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('since, status_code', [('not-a-date', 400), ('2026-01-01T00:00:00', 400), ('2000-01-01T00:00:00+00:00', 410)])
+def test_resource_type_manifest_invalid_since(admin_api_client, organization, since, status_code):
+    url = get_relative_url("resourcetype-manifest", kwargs={"name": "shared.organization"})
+    response = admin_api_client.get(url, data={"since": since})
+    assert response.status_code == status_code
+
+
+@pytest.mark.django_db
+def test_resource_deletion_retention(admin_api_client, organization, settings):
+    settings.RESOURCE_DELETION_RETENTION_SECONDS = 60
+    ResourceDeletion.record(organization.resource)
+    ResourceDeletion.objects.update(deleted=timezone.now() - timedelta(minutes=5))
+    Organization.objects.create(name='deleted-org').delete()
+    # deletions do not remove the expired records, only manifests of changes do
+    assert ResourceDeletion.objects.count() == 2
+
+    url = get_relative_url("resourcetype-manifest", kwargs={"name": "shared.organization"})
+    response = admin_api_client.get(url, data={"since": timezone.now().isoformat()})
+    assert response.status_code == 200
+    assert ResourceDeletion.objects.count() == 1
@@ -1,5 +1,5 @@
 import uuid
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 from django.contrib.contenttypes.models import ContentType
@@ -8,6 +8,7 @@ from ansible_base.authentication.models import AuthenticatorUser
 from ansible_base.lib.utils.response import get_relative_url
 from ansible_base.resource_registry.models import Resource
 from ansible_base.resource_registry.utils.resource_type_processor import ResourceTypeProcessor
+from ansible_base.resource_registry.views import HasResourceRegistryPermissions, ResourceViewSet
 from test_app.models import EncryptionModel, Organization
 from test_app.resource_api import APIConfig
 
@@ -448,3 +449,29 @@ def test_user_social_auth_exception(admin_api_client, django_user_model, saml_au
         with expected_log('ansible_base.resource_registry.utils.sso_provider.logger', 'warning', "Failed to parse server url from"):
             resp = admin_api_client.get(url)
             assert resp.status_code == 200
+
+
+def test_resources_bulk_retrieve(admin_api_client, organization, user):
+    url = get_relative_url("resource-bulk")
+    ansible_ids = [str(organization.resource.ansible_id), str(user.resource.ansible_id), str(uuid.uuid4())]
+    resp = admin_api_client.post(url, {"ansible_ids": ansible_ids}, format="json")
+    assert resp.status_code == 200, resp.data
+
+    results = {item["ansible_id"]: item for item in resp.data["results"]}
+    assert set(results) == set(ansible_ids[:2])
+    assert results[ansible_ids[0]]["resource_type"] == "shared.organization"
+    assert results[ansible_ids[0]]["resource_data"]["name"] == organization.name
+    assert results[ansible_ids[1]]["resource_data"]["username"] == user.username
+
+
+@pytest.mark.parametrize("data", [{}, {"ansible_ids": []}, {"ansible_ids": ["not-a-uuid"]}])
+def test_resources_bulk_retrieve_invalid(admin_api_client, data):
+    resp = admin_api_client.post(get_relative_url("resource-bulk"), data, format="json")
+    assert resp.status_code == 400, resp.data
+
+
+@pytest.mark.parametrize("allowed_actions,expected", [(["retrieve"], True), (["list"], False), ("*", True)])
+def test_resources_bulk_retrieve_service_permission(user, allowed_actions, expected):
+    user.resource_api_actions = allowed_actions
+    view = ResourceViewSet(action="bulk_retrieve")
+    assert HasResourceRegistryPermissions().has_permission(Mock(user=user), view) is expected
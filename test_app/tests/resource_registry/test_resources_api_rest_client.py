@@ -1,13 +1,18 @@
+import http.client
 import uuid
+from io import BytesIO
+from unittest import mock
 
 import jwt
 import pytest
+from requests import Response
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
 
 from ansible_base.authentication.models import AuthenticatorUser
 from ansible_base.resource_registry.models import Resource, service_id
 from ansible_base.resource_registry.resource_server import get_resource_server_config
-from ansible_base.resource_registry.rest_client import ResourceAPIClient, ResourceRequestBody
+from ansible_base.resource_registry.rest_client import ResourceAPIClient, ResourceRequestBody, get_resource_server_client
 
 
 @pytest.fixture
@@ -77,6 +82,15 @@ def test_get_resource(resource_client, organization):
     assert resp.json()["name"] == organization.name
 
 
+@pytest.mark.django_db
+def test_get_resources_bulk(resource_client, organization, admin_user):
+    ansible_ids = [Resource.get_resource_for_object(obj).ansible_id for obj in (organization, admin_user)]
+    resp = resource_client.get_resources_bulk(ansible_ids)
+
+    assert resp.status_code == 200
+    assert set(item["ansible_id"] for item in resp.json()["results"]) == set(str(ansible_id) for ansible_id in ansible_ids)
+
+
 @pytest.mark.django_db
 def test_update_resource(resource_client, organization):
     ansible_id = str(Resource.get_resource_for_object(organization).ansible_id)
@@ -198,3 +212,55 @@ def test_validate_local_user(resource_client, admin_user, member_rd):
 
     resp = resource_client.validate_local_user(username=admin_user.username, password="fake password")
     assert resp.status_code == 401
+
+
+@pytest.mark.django_db
+def test_connections_reused(resource_client, organization):
+    before = resource_client.connection_metrics
+    for _ in range(3):
+        assert resource_client.get_service_metadata().status_code == 200
+    after = resource_client.connection_metrics
+
+    assert after["requests"] - before["requests"] == 3
+    assert after["connections"] - before["connections"] <= 1
+    assert after["reused"] - before["reused"] >= 2
+
+
+def test_session_shared_between_clients(settings):
+    settings.RESOURCE_SERVER = {"URL": "https://resources.example.com", "SECRET_KEY": "a secret", "POOL_SIZE": 3}
+    first = get_resource_server_client("/api/v1/service-index/")
+    second = get_resource_server_client("/api/v1/service-index/", jwt_user_id=uuid.uuid4())
+    assert first.session is second.session
+    assert first.session.get_adapter("https://resources.example.com")._pool_maxsize == 3
+
+    settings.RESOURCE_SERVER["RETRIES"] = 2
+    third = get_resource_server_client("/api/v1/service-index/")
+    assert third.session is not first.session
+    assert third.session.get_adapter("https://resources.example.com").max_retries.total == 2
+
+
+@pytest.mark.django_db
+def test_cookies_not_shared_between_clients(settings):
+    settings.RESOURCE_SERVER = {"URL": "https://cookies.example.com", "SECRET_KEY": "a secret", "POOL_SIZE": 4}
+    sent_cookies = []
+
+    class SetCookieAdapter(HTTPAdapter):
+        "Sets a cookie in every response, like a load balancer with session affinity"
+
+        def send(self, request, **kwargs):
+            sent_cookies.append(request.headers.get("Cookie"))
+            response = Response()
+            response.status_code = 200
+            response.request = request
+            response.url = request.url
+            response._content = b"{}"
+            message = http.client.parse_headers(BytesIO(b"Set-Cookie: affinity=server-1; Path=/\r\n\r\n"))
+            response.raw = mock.Mock(_original_response=mock.Mock(msg=message))
+            return response
+
+    first = get_resource_server_client("/api/v1/service-index/", jwt_user_id=uuid.uuid4())
+    second = get_resource_server_client("/api/v1/service-index/", jwt_user_id=uuid.uuid4())
+    first.session.mount("https://cookies.example.com", SetCookieAdapter())
+    assert first.get_service_metadata().status_code == 200
+    assert second.get_service_metadata().status_code == 200
+    assert sent_cookies == [None, None]
@@ -0,0 +1,218 @@
+import uuid
+from io import StringIO
+from unittest import mock
+
+import pytest
+from crum import impersonate
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from requests import HTTPError, Response
+
+from ansible_base.resource_registry.models import Resource, ReverseSyncEntry
+from ansible_base.resource_registry.tasks import reverse_sync
+from ansible_base.resource_registry.tasks.reverse_sync import process_reverse_sync_outbox
+from test_app.models import Organization
+
+utils_path = 'ansible_base.resource_registry.utils.sync_to_resource_server'
+
+
+@pytest.fixture
+def outbox_settings(settings):
+    settings.RESOURCE_SERVER_SYNC_OUTBOX = True
+    return settings
+
+
+@pytest.mark.django_db
+def test_save_writes_outbox_entry(user, enable_reverse_sync, outbox_settings):
+    with enable_reverse_sync():
+        with mock.patch(f'{utils_path}.get_resource_server_client') as get_resource_server_client:
+            with impersonate(user):
+                org = Organization.objects.create(name='Hello')
+    get_resource_server_client.assert_not_called()
+
+    entry = ReverseSyncEntry.objects.get()
+    assert entry.action == 'create'
+    assert entry.object_id == str(org.pk)
+    assert entry.ansible_id == org.resource.ansible_id
+    assert entry.resource_type == 'shared.organization'
+    assert entry.resource_data['name'] == 'Hello'
+    assert entry.jwt_user_id == str(user.resource.ansible_id)
+
+
+@pytest.mark.django_db
+def test_outbox_sends_changes_in_order(user, enable_reverse_sync, outbox_settings):
+    with enable_reverse_sync():
+        with impersonate(user):
+            org = Organization.objects.create(name='Hello')
+            local_ansible_id = org.resource.ansible_id
+            # Changes are only synced for resources owned by the resource server
+            Resource.objects.filter(pk=org.resource.pk).update(service_id=uuid.uuid4())
+            org.refresh_from_db()
+            org.name = 'World'
+            org.save()
+            org.delete()
+    assert list(ReverseSyncEntry.objects.values_list('action', flat=True)) == ['create', 'update', 'delete']
+
+    server_ansible_id = uuid.uuid4()
+    with mock.patch(f'{utils_path}.get_resource_server_client') as get_resource_server_client:
+        client = get_resource_server_client.return_value
+        client.create_resource.return_value.json.return_value = {'service_id': str(uuid.uuid4()), 'ansible_id': str(server_ansible_id)}
+        counts = process_reverse_sync_outbox(batch_size=10)
+
+    assert counts == {'sent': 3, 'failed': 0}
+    assert not ReverseSyncEntry.objects.exists()
+    assert [c[0] for c in client.method_calls if c[0].endswith('_resource')] == ['create_resource', 'update_resource', 'delete_resource']
+    # The local ansible_id is replaced with the one from the resource server for the later changes
+    assert client.create_resource.call_args.args[0].ansible_id == local_ansible_id
+    client.update_resource.assert_called_once()
+    assert client.update_resource.call_args.args[0] == server_ansible_id
+    client.delete_resource.assert_called_once_with(server_ansible_id)
+
+
+@pytest.mark.django_db
+def test_failed_entry_blocks_later_changes(user, enable_reverse_sync, outbox_settings):
+    with enable_reverse_sync():
+        with impersonate(user):
+            org = Organization.objects.create(name='Hello')
+            other_org = Organization.objects.create(name='Other')
+            Resource.objects.filter(pk=org.resource.pk).update(service_id=uuid.uuid4())
+            org.refresh_from_db()
+            org.name = 'World'
+            org.save()
+
+    def create_resource(body):
+        if body.resource_data['name'] == 'Hello':
+            raise Exception('resource server is down')
+        return mock.MagicMock()
+
+    with mock.patch(f'{utils_path}.get_resource_server_client') as get_resource_server_client:
+        client = get_resource_server_client.return_value
+        client.create_resource.side_effect = create_resource
+        counts = process_reverse_sync_outbox()
+
+    assert counts == {'sent': 1, 'failed': 1}
+    client.update_resource.assert_not_called()
+    entries = list(ReverseSyncEntry.objects.all())
+    assert [e.action for e in entries] == ['create', 'update']
+    failed = entries[0]
+    assert failed.object_id == str(org.pk)
+    assert failed.attempts == 1
+    assert failed.next_attempt > timezone.now()
+    assert 'resource server is down' in failed.last_error
+    assert not ReverseSyncEntry.objects.filter(object_id=str(other_org.pk)).exists()
+
+    # After the delay the failed entry is retried, and then the update is sent
+    ReverseSyncEntry.objects.filter(pk=failed.pk).update(next_attempt=timezone.now())
+    with mock.patch(f'{utils_path}.get_resource_server_client') as get_resource_server_client:
+        counts = process_reverse_sync_outbox()
+    assert counts == {'sent': 2, 'failed': 0}
+    assert not ReverseSyncEntry.objects.exists()
+
+
+def http_error(status_code):
+    response = Response()
+    response.status_code = status_code
+    return HTTPError(f'{status_code} Client Error', response=response)
+
+
+@pytest.mark.django_db
+def test_refused_entry_set_aside(user, enable_reverse_sync, outbox_settings):
+    with enable_reverse_sync():
+        with impersonate(user):
+            org = Organization.objects.create(name='Hello')
+            Resource.objects.filter(pk=org.resource.pk).update(service_id=uuid.uuid4())
+            org.refresh_from_db()
+            org.name = 'World'
+            org.save()
+
+    with mock.patch(f'{utils_path}.get_resource_server_client') as get_resource_server_client:
+        client = get_resource_server_client.return_value
+        client.create_resource.side_effect = http_error(400)
+        counts = process_reverse_sync_outbox()
+
+    # the resource server will never accept the create, so the update is sent after it
+    assert counts == {'sent': 1, 'failed': 1}
+    client.update_resource.assert_called_once()
+    failed = ReverseSyncEntry.objects.get()
+    assert failed.action == 'create'
+    assert failed.failed
+    assert '400 Client Error' in failed.last_error
+
+    out = StringIO()
+    call_command('reverse_sync_outbox', stdout=out)
+    assert 'Sent 0 | Failed 0 | Pending 0 | Set aside 1' in out.getvalue()
+    call_command('reverse_sync_outbox', '--show-failed', stdout=out)
+    assert f'{failed.pk} | create shared.organization {failed.ansible_id}' in out.getvalue()
+
+    with mock.patch(f'{utils_path}.get_resource_server_client'):
+        call_command('reverse_sync_outbox', '--retry-failed', stdout=out)
+    assert 'Sent 1 | Failed 0 | Pending 0 | Set aside 0' in out.getvalue()
+    assert not ReverseSyncEntry.objects.exists()
+
+
+@pytest.mark.django_db
+def test_entry_set_aside_after_max_attempts(user, enable_reverse_sync, outbox_settings):
+    with enable_reverse_sync():
+        with impersonate(user):
+            Organization.objects.create(name='Hello')
+    entry = ReverseSyncEntry.objects.get()
+
+    # the request can succeed when retried
+    reverse_sync.record_failure(entry, http_error(429))
+    assert not entry.failed
+    ReverseSyncEntry.objects.filter(pk=entry.pk).update(attempts=reverse_sync.MAX_ATTEMPTS - 1)
+    entry.refresh_from_db()
+    reverse_sync.record_failure(entry, Exception('resource server is down'))
+    entry.refresh_from_db()
+    assert entry.failed
+    assert reverse_sync.get_ready_entries() == []
+
+
+@pytest.mark.django_db
+def test_entries_sent_outside_of_transaction(user, enable_reverse_sync, outbox_settings):
+    with enable_reverse_sync():
+        with impersonate(user):
+            Organization.objects.create(name='Hello')
+    entry = ReverseSyncEntry.objects.get()
+    # the transactions of the test
+    test_savepoint_ids = list(connection.savepoint_ids)
+
+    def create_resource(body):
+        # the entry was claimed by a transaction that is already committed
+        assert connection.savepoint_ids == test_savepoint_ids
+        assert ReverseSyncEntry.objects.get(pk=entry.pk).next_attempt > timezone.now()
+        return mock.MagicMock()
+
+    with mock.patch(f'{utils_path}.get_resource_server_client') as get_resource_server_client:
+        get_resource_server_client.return_value.create_resource.side_effect = create_resource
+        counts = process_reverse_sync_outbox()
+    assert counts == {'sent': 1, 'failed': 0}
+    assert not ReverseSyncEntry.objects.exists()
+
+
+@pytest.mark.django_db
+def test_entries_not_sent_after_claim_ends(user, enable_reverse_sync, outbox_settings):
+    with enable_reverse_sync():
+        with impersonate(user):
+            Organization.objects.create(name='Hello')
+
+    with mock.patch.object(reverse_sync, 'CLAIM_SECONDS', 0):
+        with mock.patch(f'{utils_path}.get_resource_server_client') as get_resource_server_client:
+            counts = process_reverse_sync_outbox()
+    assert counts == {'sent': 0, 'failed': 0}
+    get_resource_server_client.return_value.create_resource.assert_not_called()
+    # the entry is ready for the next claim
+    assert len(reverse_sync.claim_entries()[0]) == 1
+
+
+@pytest.mark.django_db
+def test_reverse_sync_outbox_command(user, enable_reverse_sync, outbox_settings):
+    with enable_reverse_sync():
+        with impersonate(user):
+            Organization.objects.create(name='Hello')
+
+    out = StringIO()
+    with mock.patch(f'{utils_path}.get_resource_server_client'):
+        call_command('reverse_sync_outbox', stdout=out)
+    assert 'Sent 1 | Failed 0 | Pending 0 | Set aside 0' in out.getvalue()
@@ -3,7 +3,7 @@ from unittest import mock
 import pytest
 
 from ansible_base.resource_registry.signals import handlers
-from test_app.models import EncryptionModel, Organization, Original1, Original2, Proxy1, Proxy2
+from test_app.models import EncryptionModel, Organization, Original1, Original2, Proxy1, Proxy2, Team
 
 
 @pytest.mark.django_db
@@ -66,3 +66,52 @@ def test_decide_to_sync_update_save(organization, enable_reverse_sync, fields, u
         organization.save(update_fields=update_fields)
 
     assert hasattr(organization, '_skip_reverse_resource_sync') == should_skip
+
+
+def test_synced_fields_use_column_of_foreign_keys():
+    assert handlers.get_synced_fields(Team) == {'name': 'name', 'organization': 'organization_id', 'description': 'description'}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'field, should_skip',
+    [
+        ('name', False),
+        ('organization', False),
+        (None, True),
+    ],
+)
+def test_decide_to_sync_update_uses_loaded_values(team, enable_reverse_sync, django_assert_num_queries, field, should_skip):
+    other_org = Organization.objects.create(name='Other')
+    with enable_reverse_sync(mock_away_sync=True):
+        loaded_team = Team.objects.get(pk=team.pk)
+        if field == 'name':
+            loaded_team.name = 'newvalue'
+        elif field == 'organization':
+            loaded_team.organization = other_org
+        # The original values were saved when the team was loaded, so it is not loaded again
+        with django_assert_num_queries(0):
+            assert handlers.get_changed_synced_fields(Team, loaded_team) == ({field} if field else set())
+        loaded_team.save()
+
+    assert hasattr(loaded_team, '_skip_reverse_resource_sync') == should_skip
+
+
+@pytest.mark.django_db
+def test_snapshot_does_not_load_deferred_fields(organization, enable_reverse_sync, django_assert_num_queries):
+    with enable_reverse_sync(mock_away_sync=True):
+        with django_assert_num_queries(1):
+            org = Organization.objects.only('pk', 'name').get(pk=organization.pk)
+        org.description = 'newvalue'
+        assert handlers.get_changed_synced_fields(Organization, org) == {'description'}
+
+
+@pytest.mark.django_db
+def test_decide_to_sync_update_after_save(enable_reverse_sync):
+    with enable_reverse_sync(mock_away_sync=True):
+        org = Organization.objects.create(name='Hello')
+        org.description = 'newvalue'
+        org.save()
+        assert not hasattr(org, '_skip_reverse_resource_sync')
+        org.save()
+        assert hasattr(org, '_skip_reverse_resource_sync')